@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Deteksi anomali robust (rolling median/MAD) secara streaming, dengan state persisten antar build.
+
+- Per stream (satu file state per konsumen, supaya stage paralel tidak rebutan file):
+  .build_cache/anomaly/<stream>.json → per key: window terakhir (t, y), last_t, anomali yang sudah ditemukan
+- update() hanya men-skor periode dengan t > last_t; tiap titik dibandingkan dengan `win` nilai
+  sebelumnya (trailing, tanpa titik itu sendiri — tidak perlu data masa depan)
+- z = (y − median) / (1.4826 · MAD); MAD = 0 → fallback 1.2533 · mean |dev|; anomali kalau |z| > k
+- Window datar (semua nilai sama, skala 0): z = ±Z_MAX kalau nilai menyimpang, 0 kalau sama; anomali
+  ditandai "flat": true. |z| selalu dibatasi Z_MAX (skala numerik ~0 tidak menghasilkan z 1e10)
+- Kalau nilai di window tersimpan berubah (data direvisi) → state key di-reset dan di-skor ulang
+- Anomali tersimpan yang lebih tua dari window dicek ulang tiap run: (t, y) hilang/berubah di input → dibuang
+- Biaya per run ~ O(periode baru × win), tidak tergantung panjang histori
+
+Dipakai oleh build_ops_forecast.py, build_viz_advanced.py dan check_data_quality.py.
+
+Contoh:
+  python scripts/anomaly_stream.py publish/euro_atfm_timeseries.csv --time period_start --value delay_minutes
+  python scripts/anomaly_stream.py daily.csv --key icao --time date --value ifr_hours --window 28 --k 3.5
+"""
+from __future__ import annotations
+import argparse, json, os, warnings
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from build_cache import CACHE_DIR
+
+STATE_DIR = CACHE_DIR / "anomaly"
+MAX_KEEP = 500  # anomali tersimpan per key (yang terbaru)
+Z_MAX = 99.0    # batas |z|; window datar → ±Z_MAX
+
+def to_ms(values) -> np.ndarray:
+    """Tanggal/periode apa pun → epoch ms (int64); gagal parse → NaT dibuang oleh pemanggil."""
+    ts = pd.to_datetime(pd.Series(values), errors="coerce", utc=True).dt.tz_localize(None)
+    return ts.to_numpy().astype("datetime64[ms]").astype(np.int64)
+
+def score_window(hist: np.ndarray, new: np.ndarray, win: int, min_periods: int):
+    """
+    z-score robust tiap nilai `new` terhadap `win` nilai sebelumnya (hist + new sebelumnya).
+    Return (z, median, flat); z NaN kalau window belum punya min_periods nilai,
+    flat = skala window 0 (semua nilai sama) → z = ±Z_MAX / 0.
+    """
+    pad = np.full(max(win - len(hist), 0), np.nan)
+    buf = np.concatenate([pad, hist[-win:], new])
+    w = sliding_window_view(buf[:-1], win)[-len(new):]                   # (len(new), win)
+    cnt = np.isfinite(w).sum(1)
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # window kosong (warm-up) → NaN
+        med = np.nanmedian(w, axis=1)
+        dev = np.abs(w - med[:, None])
+        scale = 1.4826 * np.nanmedian(dev, axis=1)
+        scale = np.where(scale > 0, scale, 1.2533 * np.nanmean(dev, axis=1))
+        flat = ~(scale > 0) & (cnt > 0)
+        z = np.where(flat, np.sign(new - med) * Z_MAX, (new - med) / scale)
+    z = np.where(cnt >= min_periods, np.clip(z, -Z_MAX, Z_MAX), np.nan)
+    return z, med, flat & (cnt >= min_periods)
+
+class AnomalyStream:
+    def __init__(self, name: str, win: int = 12, k: float = 3.0, min_periods: int | None = None,
+                 state_dir: Path = STATE_DIR):
+        self.name = name
+        self.win, self.k = int(win), float(k)
+        self.min_periods = int(min_periods or max(3, self.win // 2))
+        self.path = Path(state_dir) / f"{name}.json"
+        self.params = {"win": self.win, "k": self.k, "min_periods": self.min_periods, "z_max": Z_MAX}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            data = {}
+        force = os.environ.get("BUILD_FORCE", "") not in ("", "0")
+        # parameter berubah → state lama tidak valid
+        self.keys = data.get("keys", {}) if data.get("params") == self.params and not force else {}
+        self.scored = 0
+
+    def _reset_needed(self, st: dict, t: np.ndarray, y: np.ndarray) -> bool:
+        """Nilai di window tersimpan berbeda dengan input (revisi data) → perlu reset."""
+        if not st.get("window_t"):
+            return False
+        wt, wy = np.asarray(st["window_t"], dtype=np.int64), np.asarray(st["window_y"], dtype=float)
+        pos = np.searchsorted(t, wt)
+        hit = (pos < len(t)) & (t[np.minimum(pos, len(t) - 1)] == wt)
+        if not hit.any():
+            return False
+        return not np.allclose(y[pos[hit]], wy[hit], rtol=1e-9, atol=1e-12)
+
+    @staticmethod
+    def _prune_revised(st: dict, t: np.ndarray, y: np.ndarray):
+        """Buang anomali tersimpan yang (t, y)-nya tidak ada lagi di input (baris dihapus/direvisi)."""
+        if not st.get("anomalies"):
+            return
+        at = np.array([a["t"] for a in st["anomalies"]], dtype=np.int64)
+        ay = np.array([a["y"] for a in st["anomalies"]], dtype=float)
+        pos = np.minimum(np.searchsorted(t, at), max(len(t) - 1, 0))
+        ok = (t[pos] == at) & np.isclose(y[pos], ay, rtol=1e-9, atol=1e-12) if len(t) else np.zeros(len(at), bool)
+        if not ok.all():
+            st["anomalies"] = [a for a, k in zip(st["anomalies"], ok) if k]
+
+    def update(self, key: str, t, y) -> list:
+        """Skor periode baru untuk `key`; return anomali baru [{t, y, z, median[, flat]}]."""
+        key = str(key)
+        t = np.asarray(t, dtype=np.int64); y = np.asarray(y, dtype=float)
+        order = np.argsort(t, kind="stable")
+        t, y = t[order], y[order]
+        ok = np.isfinite(y)
+        t, y = t[ok], y[ok]
+        st = self.keys.get(key)
+        known = set()
+        if st is not None and self._reset_needed(st, t, y):
+            # anomali lama yang nilainya tetap tidak dilaporkan lagi sebagai "baru" setelah reset
+            self._prune_revised(st, t, y)
+            known = {(a["t"], a["y"]) for a in st["anomalies"]}
+            st = None
+        if st is not None:
+            self._prune_revised(st, t, y)
+        if st is None:
+            st = {"last_t": None, "window_t": [], "window_y": [], "anomalies": []}
+            self.keys[key] = st
+        new = t > st["last_t"] if st["last_t"] is not None else np.ones(len(t), dtype=bool)
+        if not new.any():
+            return []
+        nt, ny = t[new], y[new]
+        z, med, flat = score_window(np.asarray(st["window_y"], dtype=float), ny, self.win, self.min_periods)
+        self.scored += len(ny)
+        flag = np.abs(np.nan_to_num(z)) > self.k
+        found = [{"t": int(a), "y": float(b), "z": round(float(c), 2), "median": float(d), **({"flat": True} if f else {})}
+                 for a, b, c, d, f in zip(nt[flag], ny[flag], z[flag], med[flag], flat[flag])]
+        st["anomalies"] = (st["anomalies"] + found)[-MAX_KEEP:]
+        found = [a for a in found if (a["t"], a["y"]) not in known]
+        st["window_t"] = (st["window_t"] + nt.tolist())[-self.win:]
+        st["window_y"] = (st["window_y"] + ny.tolist())[-self.win:]
+        st["last_t"] = int(nt[-1])
+        return found
+
+    def update_frame(self, df: pd.DataFrame, time_col: str, value_col: str, key_col: str | None = None) -> pd.DataFrame:
+        """Long DataFrame → anomali baru (key, t, y, z, median, flat) untuk semua key."""
+        t = to_ms(df[time_col])
+        y = pd.to_numeric(df[value_col], errors="coerce").to_numpy(dtype=float)
+        if key_col:
+            codes, uniq = pd.factorize(df[key_col])
+            names = [str(u) for u in uniq]
+        else:
+            codes, names = np.zeros(len(df), dtype=np.int64), ["all"]
+        # baris sebelum window tersimpan tidak perlu disentuh (cukup window untuk cek revisi + periode baru),
+        # kecuali baris anomali lama → ikut supaya revisinya terdeteksi
+        floor = np.array([((self.keys.get(k) or {}).get("window_t") or [np.iinfo(np.int64).min])[0] for k in names],
+                         dtype=np.int64)
+        keep = (codes >= 0) & (t != np.iinfo(np.int64).min)
+        old = keep.copy()
+        old[keep] = t[keep] < floor[codes[keep]]
+        keep[keep] = t[keep] >= floor[codes[keep]]
+        if old.any():
+            known = [(i, a["t"]) for i, k in enumerate(names) for a in self.anomalies(k)]
+            if known:
+                keep[old] = pd.MultiIndex.from_arrays([codes[old], t[old]]).isin(known)
+        valid = (codes >= 0) & (t != np.iinfo(np.int64).min)
+        all_codes, all_t, all_y = codes, t, y
+        codes, t, y = codes[keep], t[keep], y[keep]
+        order = np.lexsort((t, codes))
+        codes, t, y = codes[order], t[order], y[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        rows = []
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(codes)]):
+            if hi > lo:
+                k = names[codes[lo]]
+                kt, ky = t[lo:hi], y[lo:hi]
+                st = self.keys.get(k)
+                if st is not None and self._reset_needed(st, kt[np.isfinite(ky)], ky[np.isfinite(ky)]):
+                    # revisi di window → skor ulang dari histori penuh key ini, bukan hanya baris window
+                    m = valid & (all_codes == codes[lo])
+                    kt, ky = all_t[m], all_y[m]
+                rows += [{"key": k, **a} for a in self.update(k, kt, ky)]
+        out = pd.DataFrame(rows, columns=["key", "t", "y", "z", "median", "flat"])
+        out["flat"] = out["flat"].eq(True)          # NaN (bukan window datar) → False
+        return out
+
+    def anomalies(self, key: str = "all") -> list:
+        """Semua anomali tersimpan untuk key (lama + baru), urut waktu."""
+        return list((self.keys.get(str(key)) or {}).get("anomalies", []))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"params": self.params, "keys": self.keys}, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.path)
+
+def main():
+    ap = argparse.ArgumentParser(description="Incremental robust (median/MAD) anomaly scoring for a CSV series.")
+    ap.add_argument("csv", type=Path)
+    ap.add_argument("--time", required=True, help="Kolom waktu")
+    ap.add_argument("--value", required=True, help="Kolom nilai")
+    ap.add_argument("--key", default=None, help="Kolom key (per lokasi/stasiun); kosong = satu series")
+    ap.add_argument("--window", type=int, default=12)
+    ap.add_argument("--k", type=float, default=3.0)
+    ap.add_argument("--stream", default=None, help="Nama state (default: nama file CSV)")
+    args = ap.parse_args()
+
+    s = AnomalyStream(args.stream or f"cli.{args.csv.stem}", win=args.window, k=args.k)
+    new = s.update_frame(pd.read_csv(args.csv), args.time, args.value, args.key)
+    s.save()
+    print(f"[ok] {s.name}: {s.scored} new period(s) scored, {len(new)} new anomal(ies) → {s.path}")
+    for r in new.itertuples(index=False):
+        flat = ", flat window" if r.flat else ""
+        print(f"  {r.key} {pd.Timestamp(r.t, unit='ms').date()} y={r.y:g} z={r.z:+.2f} (median {r.median:g}{flat})")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Backtest rolling-origin + benchmark untuk forecast ops (euro_atfm_timeseries).
+
+Model:
+  seasonal_trend        model build_ops_forecast; statistik cukup (n, Σt, Σt², Σy, Σty, Σy²) per
+                        bulan-dalam-tahun di-cumsum sekali → semua origin di-fit tanpa refit
+  seasonal_trend_refit  model yang sama, refit dari nol per origin (pembanding biaya CPU)
+  naive                 nilai terakhir
+  seasonal_naive        nilai bulan yang sama tahun sebelumnya
+  ets                   Holt-Winters aditif (ETS(A,A,A)) parameter tetap; satu rekursi untuk semua origin
+
+- Expanding window (default) atau rolling (--window N bulan); origin pertama setelah --min-train bulan
+- Metrik per model: MAE, MAPE, MAE h=1 / h=max, coverage interval, skill vs naive
+- Output: data/derived/ops_forecast_backtest.csv (--publish → copy ke publish/)
+- CPU-time fit per model (median --repeat) tergantung mesin → tidak ikut tabel publish; ditulis ke
+  data/derived/ops_forecast_backtest_timings.csv bersama mae & mae_per_cpu_s (akurasi per detik CPU)
+
+Contoh:
+  python scripts/backtest_ops_forecast.py --publish
+  python scripts/backtest_ops_forecast.py --window 36 --horizon 3
+"""
+from __future__ import annotations
+import argparse, shutil, sys, time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from publish_loader import read_publish
+from build_cache import BuildCache
+from build_ops_forecast import H, LEVEL, detect_columns, to_long, fit_batch, predict_batch
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLISH = ROOT / "publish"
+DERIVED = ROOT / "data" / "derived"
+TABLE = "ops_forecast_backtest"
+TIMING_COLUMNS = ["model", "scheme", "origins", "repeat", "fit_cpu_s", "cpu_ms_per_origin", "mae", "mae_per_cpu_s"]
+COLUMNS = ["model", "scheme", "origins", "horizon", "mae", "mape", "mae_h1", "mae_hmax", "coverage",
+           "skill_vs_naive"]
+
+def load_series(path: Path):
+    """→ (months, y) pada grid bulanan penuh; bulan yang hilang = NaN."""
+    df = read_publish(path)
+    _, date_col, num_col = detect_columns(df, key="")
+    long = to_long(df, None, date_col or df.columns[0], num_col)
+    m = long["m"].to_numpy()
+    months = np.arange(m.min(), m.max() + 1)
+    y = np.full(len(months), np.nan)
+    y[m - months[0]] = long["y"].to_numpy(dtype=float)
+    return months, y
+
+def _lead(h: int) -> np.ndarray:
+    """Offset ke observasi musim yang sama terakhir untuk step 1..h (k − 12·ceil(k/12))."""
+    k = np.arange(1, h + 1)
+    return k - 12 * np.ceil(k / 12).astype(int)
+
+def seasonal_trend_incremental(months, y, origins, h, window=0, level=LEVEL):
+    """Semua origin sekaligus dari cumsum statistik cukup per bulan-dalam-tahun (O(n·12) total)."""
+    n = len(y)
+    ok = np.isfinite(y)
+    t = np.arange(n, dtype=float)
+    yv = np.where(ok, y, 0.0)
+    onehot = np.zeros((n, 12))
+    onehot[np.arange(n), months % 12] = ok
+    stats = np.stack([np.ones(n), t, t * t, yv, t * yv, yv * yv], 1)         # (n, 6)
+    cum = np.concatenate([np.zeros((1, 6, 12)), np.cumsum(stats[:, :, None] * onehot[:, None, :], 0)])
+    hi = origins + 1
+    lo = np.maximum(hi - window, 0) if window else np.zeros_like(hi)
+    cnt, st, stt, sy, sty, syy = np.moveaxis(cum[hi] - cum[lo], 1, 0)        # masing-masing (O, 12)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        si = sy / cnt
+        key_mean = np.nanmean(np.where(cnt > 0, si, np.nan), axis=1)
+        si = np.where(cnt > 0, si, key_mean[:, None])
+        inv = np.where((cnt > 0) & np.isfinite(si) & (si != 0), 1 / si, 0.0)
+    use = inv != 0
+    s0, s_t, s_tt = (cnt * use).sum(1), (st * use).sum(1), (stt * use).sum(1)
+    s_y, s_ty, s_yy = (sy * inv).sum(1), (sty * inv).sum(1), (syy * inv * inv).sum(1)
+    xtx = np.stack([np.stack([s0, s_t], -1), np.stack([s_t, s_tt], -1)], -2)
+    beta = (np.linalg.pinv(xtx) @ np.stack([s_y, s_ty], -1)[..., None])[..., 0]
+    b0, b1 = beta[:, 0], beta[:, 1]
+    rss = s_yy - 2 * (b0 * s_y + b1 * s_ty) + b0 * b0 * s0 + 2 * b0 * b1 * s_t + b1 * b1 * s_tt
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tbar = s_t / s0
+    fit = {"m0": np.full(len(origins), months[0]), "m_last": months[origins], "n": cnt.sum(1),
+           "si": si, "beta": beta, "s2": np.maximum(rss, 0) / np.maximum(s0 - 2, 1),
+           "tbar": tbar, "sxx": s_tt - s0 * np.nan_to_num(tbar) ** 2, "n_fit": s0}
+    _, yhat, lo_, hi_ = predict_batch(fit, h, level)
+    return yhat, lo_, hi_
+
+def seasonal_trend_refit(months, y, origins, h, window=0, level=LEVEL):
+    """Baseline biaya: fit_batch dari nol untuk tiap origin."""
+    out = [np.empty((len(origins), h)) for _ in range(3)]
+    for i, o in enumerate(origins):
+        sl = slice(max(o + 1 - window, 0) if window else 0, o + 1)
+        ok = np.isfinite(y[sl])
+        m = months[sl][ok]
+        fit = fit_batch(np.zeros(len(m), dtype=np.int64), m, y[sl][ok], 1)
+        fit["m_last"][:] = months[o]           # origin bulan kosong → horizon tetap mulai dari origin
+        _, yhat, lo, hi = predict_batch(fit, h, level)
+        out[0][i], out[1][i], out[2][i] = yhat[0], lo[0], hi[0]
+    return tuple(out)
+
+def naive(months, y, origins, h, **_):
+    yf = pd.Series(y).ffill().to_numpy()
+    return np.repeat(yf[origins][:, None], h, 1), None, None
+
+def seasonal_naive(months, y, origins, h, **_):
+    yf = pd.Series(y).ffill().to_numpy()
+    idx = origins[:, None] + _lead(h)[None, :]
+    return yf[np.clip(idx, 0, None)], None, None
+
+def ets_states(y, alpha=0.3, beta=0.05, gamma=0.2, init=24):
+    """Holt-Winters aditif: state (level, trend, musim[12]) setelah tiap observasi."""
+    n = len(y)
+    yi = pd.Series(y[:max(init, 12)]).interpolate(limit_direction="both").to_numpy()
+    level = yi[:12].mean()
+    trend = (yi[12:24].mean() - level) / 12 if len(yi) >= 24 else 0.0
+    season = list(yi[:12] - level)
+    L, B, S = np.empty(n), np.empty(n), np.empty((n, 12))
+    for t in range(n):
+        s = season[t % 12]
+        obs = y[t] if np.isfinite(y[t]) else level + trend + s
+        new_level = alpha * (obs - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[t % 12] = gamma * (obs - new_level) + (1 - gamma) * s
+        level = new_level
+        L[t], B[t], S[t] = level, trend, season
+    return L, B, S
+
+def ets(months, y, origins, h, params=(0.3, 0.05, 0.2), min_train=24, **_):
+    L, B, S = ets_states(y, *params, init=min(24, min_train))
+    k = np.arange(1, h + 1)
+    pos = (origins[:, None] + k[None, :]) % 12
+    return L[origins][:, None] + B[origins][:, None] * k[None, :] + S[origins[:, None], pos], None, None
+
+MODELS = {
+    "seasonal_trend": seasonal_trend_incremental,
+    "seasonal_trend_refit": seasonal_trend_refit,
+    "naive": naive,
+    "seasonal_naive": seasonal_naive,
+    "ets": ets,
+}
+
+def score(yhat, target, lo=None, hi=None) -> dict:
+    ok = np.isfinite(target) & np.isfinite(yhat)
+    err = np.abs(yhat - target)
+    nz = ok & (target != 0)
+    cov = np.nan
+    if lo is not None:
+        tol = 1e-9 * np.maximum(np.abs(target), 1)      # interval degenerate (σ≈0) jangan gagal karena pembulatan
+        cov = float(((target >= lo - tol) & (target <= hi + tol))[ok].mean()) if ok.any() else np.nan
+    col_mae = np.array([err[ok[:, j], j].mean() if ok[:, j].any() else np.nan for j in range(err.shape[1])])
+    return {"mae": float(err[ok].mean()) if ok.any() else np.nan,
+            "mape": float((err[nz] / np.abs(target[nz])).mean() * 100) if nz.any() else np.nan,
+            "mae_h1": col_mae[0], "mae_hmax": col_mae[-1], "coverage": cov}
+
+def backtest(months, y, h=H, min_train=24, window=0, repeat=5, ets_params=(0.3, 0.05, 0.2)) -> tuple[pd.DataFrame, pd.DataFrame]:
+    n = len(y)
+    origins = np.arange(min_train - 1, n - h)
+    if len(origins) == 0:
+        return pd.DataFrame(columns=COLUMNS), pd.DataFrame(columns=TIMING_COLUMNS)
+    target = y[origins[:, None] + np.arange(1, h + 1)[None, :]]
+    kw = {"window": window, "params": ets_params, "min_train": min_train}
+    rows, preds, timings = [], {}, []
+    for name, fn in MODELS.items():
+        args = {k: v for k, v in kw.items() if k in fn.__code__.co_varnames}
+        cpu = []
+        for _ in range(max(1, repeat)):
+            t0 = time.process_time()
+            res = fn(months, y, origins, h, **args)
+            cpu.append(time.process_time() - t0)
+        preds[name] = res[0]
+        sec = float(np.median(cpu))
+        rows.append({"model": name, "scheme": f"rolling_{window}" if window else "expanding",
+                     "origins": len(origins), "horizon": h, **score(res[0], target, res[1], res[2])})
+        timings.append({"model": name, "fit_cpu_s": sec, "cpu_ms_per_origin": sec * 1000 / len(origins)})
+    diff = np.nanmax(np.abs(preds["seasonal_trend"] - preds["seasonal_trend_refit"]))
+    scale = np.nanmax(np.abs(preds["seasonal_trend_refit"])) or 1.0
+    if diff > 1e-6 * scale:
+        print(f"[WARN] incremental vs refit seasonal_trend differ by {diff:.3g}", file=sys.stderr)
+    out = pd.DataFrame(rows, columns=COLUMNS[:-1])
+    naive_mae = out.loc[out["model"] == "naive", "mae"].iloc[0]
+    if naive_mae:
+        out["skill_vs_naive"] = 1 - out["mae"] / naive_mae
+    else:
+        # naive sudah sempurna (series konstan): skill 0 kalau model juga sempurna, selain itu tak terdefinisi
+        out["skill_vs_naive"] = np.where(np.isclose(out["mae"], 0.0, atol=1e-9), 0.0, np.nan)
+    out = out.round({"mae": 4, "mape": 3, "mae_h1": 4, "mae_hmax": 4, "coverage": 3, "skill_vs_naive": 4})
+    return out, _timings_frame(out, timings, repeat)
+
+def _timings_frame(res: pd.DataFrame, timings: list, repeat: int) -> pd.DataFrame:
+    """CPU-time per model + MAE-nya; mae_per_cpu_s = MAE / detik CPU fit (NaN kalau waktu tak terukur)."""
+    t = pd.DataFrame(timings).merge(res[["model", "scheme", "origins", "mae"]], on="model")
+    t["repeat"] = max(1, repeat)
+    cpu = t["fit_cpu_s"].where(t["fit_cpu_s"] > 0)
+    t["mae_per_cpu_s"] = t["mae"] / cpu
+    for r in t.itertuples():
+        print(f"[time] {r.model:<22} {r.fit_cpu_s:.6f}s CPU ({r.cpu_ms_per_origin:.4f} ms/origin, median of {r.repeat})")
+    return t[TIMING_COLUMNS].round({"fit_cpu_s": 6, "cpu_ms_per_origin": 4, "mae_per_cpu_s": 2})
+
+def build(src: Path, out_dir: Path, **kw) -> bool:
+    if not src.exists():
+        print(f"[skip] backtest: missing {src.name}")
+        return False
+    months, y = load_series(src)
+    res, timings = backtest(months, y, **kw)
+    if res.empty:
+        print(f"[skip] backtest: series too short ({len(y)} months)")
+        return False
+    out_dir.mkdir(parents=True, exist_ok=True)
+    res.to_csv(out_dir / f"{TABLE}.csv", index=False)
+    timings.to_csv(out_dir / f"{TABLE}_timings.csv", index=False)
+    print(res.to_string(index=False))
+    print(f"[ok] {TABLE}: {len(res)} model(s), {res['origins'].iloc[0]} origin(s) → {out_dir / f'{TABLE}.csv'}")
+    return True
+
+def main():
+    ap = argparse.ArgumentParser(description="Rolling-origin backtest of the ops forecast against baselines.")
+    ap.add_argument("--publish-dir", type=Path, default=PUBLISH, help="Sumber euro_atfm_timeseries")
+    ap.add_argument("--out-dir", type=Path, default=DERIVED)
+    ap.add_argument("--horizon", type=int, default=H)
+    ap.add_argument("--min-train", type=int, default=24, help="Bulan training minimum sebelum origin pertama")
+    ap.add_argument("--window", type=int, default=0, help="Rolling window (bulan); 0 = expanding")
+    ap.add_argument("--repeat", type=int, default=5, help="Ulangan timing (median)")
+    ap.add_argument("--ets-params", type=float, nargs=3, default=(0.3, 0.05, 0.2), metavar=("ALPHA", "BETA", "GAMMA"))
+    ap.add_argument("--publish", action="store_true", help="Copy CSV hasil ke publish/")
+    args = ap.parse_args()
+
+    src = args.publish_dir / "euro_atfm_timeseries.csv"
+    opts = {"h": args.horizon, "min_train": args.min_train, "window": args.window,
+            "repeat": args.repeat, "ets_params": tuple(args.ets_params)}
+    cache = BuildCache(__file__)
+    cache.run(TABLE, lambda: build(src, args.out_dir, **opts),
+              [src, Path(__file__).resolve().parent / "build_ops_forecast.py"], [args.out_dir / f"{TABLE}.csv", args.out_dir / f"{TABLE}_timings.csv"],
+              extra={**opts, "ets_params": list(opts["ets_params"]), "out": str(args.out_dir)})
+
+    if args.publish and (args.out_dir / f"{TABLE}.csv").exists():
+        PUBLISH.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(args.out_dir / f"{TABLE}.csv", PUBLISH / f"{TABLE}.csv")
+        print(f"[ok] copied {TABLE}.csv to publish/")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,7 +2,7 @@
 """
 Build advanced assets for:
 - Scenario Simulator (what-if on ATFM delays)
-- Hub Ranking (PageRank on route network)
+- Hub Ranking (sparse PageRank on route network, see route_graph.py)
 - Static API shards
 
 Safe: gracefully skips if required CSVs are missing.
@@ -12,6 +12,11 @@ import json
 import pandas as pd
 import numpy as np
 
+from build_cache import BuildCache
+from publish_loader import read_publish
+from route_graph import adjacency_csr, pagerank
+from ensure_hub_rank_assets import hub_rank_figure
+
 ROOT = Path(".")
 DOCS = ROOT / "docs"
 ASSETS = DOCS / "assets"
@@ -21,14 +26,52 @@ PUB = ROOT / "publish"
 ASSETS.mkdir(parents=True, exist_ok=True)
 API.mkdir(parents=True, exist_ok=True)
 
-def build_scenario_assets():
+DEFAULT_MULTIPLIERS = (0.9, 0.8, 0.7, 0.5)
+
+def scenario_engine(total, shares, multipliers=DEFAULT_MULTIPLIERS):
+    """
+    Broadcast what-if engine.
+      total:  (M,) delay per bulan
+      shares: (L,) static share per lokasi, atau (M, L) share per bulan
+      multipliers: (S,) faktor delay yang tersisa di lokasi yang ditangani (0.8 = -20%)
+    Return dict array:
+      per_location (M, L) = total ⊗ shares
+      cum_top      (M, L) = delay kumulatif Top-1..Top-L per bulan
+      savings      (S, L) = total penghematan (semua bulan) untuk Top-N @ multiplier
+    """
+    total = np.asarray(total, dtype=float)
+    shares = np.asarray(shares, dtype=float)
+    mult = np.asarray(multipliers, dtype=float)
+    per_loc = total[:, None] * shares if shares.ndim == 1 else total[:, None] * shares[: len(total)]
+    cum_top = np.cumsum(per_loc, axis=1)
+    savings = np.outer(1.0 - mult, cum_top.sum(axis=0))
+    return {"per_location": per_loc, "cum_top": cum_top, "savings": savings, "multipliers": mult}
+
+def _location_shares(byloc: pd.DataFrame, months: pd.Series, top_n: int):
+    """
+    Static share (by_location tanpa kolom waktu) atau month-specific share
+    (by_location punya period_start → pivot bulan × lokasi, dinormalisasi per bulan).
+    """
+    date_col = next((c for c in ("period_start", "month", "date") if c in byloc.columns), None)
+    totals = byloc.groupby("location", sort=False)["delay_minutes"].sum().sort_values(ascending=False, kind="stable")
+    locs = totals.index[:top_n]
+    if date_col is None:
+        return "static", list(locs), (totals / totals.sum()).loc[locs].to_numpy()
+    m = pd.to_datetime(byloc[date_col], errors="coerce").dt.strftime("%Y-%m")
+    grid = byloc.assign(_m=m).pivot_table(index="_m", columns="location", values="delay_minutes", aggfunc="sum", fill_value=0.0)
+    grid = grid.reindex(index=months, fill_value=0.0)
+    row_sum = grid.sum(axis=1).replace(0, np.nan)
+    share = grid.div(row_sum, axis=0).fillna(0.0)
+    return "monthly", list(locs), share.reindex(columns=locs, fill_value=0.0).to_numpy()
+
+def build_scenario_assets(top_n: int = 25, multipliers=DEFAULT_MULTIPLIERS):
     ts_path = PUB / "euro_atfm_timeseries.csv"
     loc_path = PUB / "euro_atfm_by_location.csv"
     if not ts_path.exists() or not loc_path.exists():
         print(f"[skip] scenario: missing {ts_path.name if not ts_path.exists() else ''} {loc_path.name if not loc_path.exists() else ''}")
         return
 
-    ts = pd.read_csv(ts_path, parse_dates=["period_start"]).sort_values("period_start")
+    ts = read_publish(ts_path).sort_values("period_start")
     if ts.empty or "delay_minutes" not in ts.columns:
         print("[skip] scenario: timeseries empty or no delay_minutes")
         return
@@ -37,38 +80,51 @@ def build_scenario_assets():
     ts24 = ts[ts["period_start"] >= last24].copy()
     ts24["month"] = ts24["period_start"].dt.strftime("%Y-%m")
 
-    byloc = pd.read_csv(loc_path).rename(columns=str.lower)
+    byloc = read_publish(loc_path).rename(columns=str.lower)
     if not {"location","delay_minutes"}.issubset(byloc.columns):
         print("[skip] scenario: by_location missing required cols")
         return
-    byloc = byloc[["location","delay_minutes"]].dropna()
+    byloc = byloc.dropna(subset=["location","delay_minutes"])
     byloc["delay_minutes"] = byloc["delay_minutes"].astype(float).clip(lower=0)
     if byloc["delay_minutes"].sum() == 0:
         print("[skip] scenario: by_location total = 0")
         return
-    byloc = byloc.sort_values("delay_minutes", ascending=False)
-    byloc["share"] = byloc["delay_minutes"] / byloc["delay_minutes"].sum()
 
     months = ts24["month"].tolist()
-    total = ts24["delay_minutes"].astype(float).round(2).tolist()
-
-    locs = byloc["location"].tolist()[:25]
-    shares = dict(zip(byloc["location"], byloc["share"]))
-    locations = {loc: [] for loc in locs}
-    for mval in ts24["delay_minutes"].tolist():
-        for loc in locs:
-            locations[loc].append(round(float(mval) * float(shares[loc]), 2))
-
-    out = {"months": months, "total": total, "locations": locations, "top_locations": locs}
+    total = ts24["delay_minutes"].astype(float).to_numpy()
+    share_model, locs, shares = _location_shares(byloc, ts24["month"], top_n)
+    eng = scenario_engine(total, shares, multipliers)
+    per_loc = np.round(eng["per_location"], 2)
+
+    # format lama (dipakai scenario_simulator.md): dict lokasi → list bulanan
+    out = {
+        "months": months,
+        "total": np.round(total, 2).tolist(),
+        "locations": dict(zip(locs, per_loc.T.tolist())),
+        "top_locations": locs,
+    }
     (ASSETS / "scenario_timeseries.json").write_text(json.dumps(out), encoding="utf-8")
-    print("[ok] scenario_timeseries.json")
 
-def build_hub_rank():
+    # format kolumnar ringkas: matriks (lokasi × bulan) + kumulatif Top-N + savings per multiplier
+    matrix = {
+        "months": months,
+        "locations": locs,
+        "share_model": share_model,
+        "total": np.round(total, 2).tolist(),
+        "per_location": per_loc.T.tolist(),
+        "cum_top": np.round(eng["cum_top"], 2).T.tolist(),
+        "multipliers": eng["multipliers"].tolist(),
+        "savings": np.round(eng["savings"], 2).tolist(),
+    }
+    (ASSETS / "scenario_matrix.json").write_text(json.dumps(matrix, separators=(",", ":")), encoding="utf-8")
+    print(f"[ok] scenario_timeseries.json, scenario_matrix.json ({len(months)} months x {len(locs)} locations, {share_model} share)")
+
+def build_hub_rank(damping: float = 0.85, tol: float = 1e-9, max_iter: int = 100):
     rc_path = PUB / "route_counts.csv"
     if not rc_path.exists():
         print("[skip] hub_rank: missing route_counts.csv")
         return
-    rc = pd.read_csv(rc_path).rename(columns=str.lower)
+    rc = read_publish(rc_path).rename(columns=str.lower)
     if not {"src_iata","dst_iata","num_routes"}.issubset(rc.columns):
         print("[skip] hub_rank: route_counts missing required cols")
         return
@@ -78,69 +134,29 @@ def build_hub_rank():
         return
     rc["num_routes"] = rc["num_routes"].astype(float).clip(lower=0)
 
-    nodes = sorted(set(rc["src_iata"]) | set(rc["dst_iata"]))
-    n = len(nodes)
-    if n == 0:
+    # Sparse CSR adjacency (source in rows); duplicate OD rows are summed
+    nodes, A = adjacency_csr(rc["src_iata"], rc["dst_iata"], rc["num_routes"])
+    if len(nodes) == 0:
         print("[skip] hub_rank: no nodes")
         return
-    idx = {n:i for i,n in enumerate(nodes)}
-
-    # Column-stochastic adjacency (source in columns)
-    A = np.zeros((n, n), dtype=float)
-    for s, d, w in rc.itertuples(index=False):
-        A[idx[d], idx[s]] += float(w)
-    colsum = A.sum(axis=0)
-    colsum[colsum == 0] = 1.0
-    P = A / colsum
-
-    # PageRank
-    dmp = 0.85
-    pr = np.ones(n) / n
-    v = np.ones(n) / n
-    for _ in range(100):
-        pr_new = dmp * (P @ pr) + (1 - dmp) * v
-        if np.linalg.norm(pr_new - pr, 1) < 1e-9:
-            pr = pr_new
-            break
-        pr = pr_new
+
+    pr, n_iter = pagerank(A, damping=damping, tol=tol, max_iter=max_iter)
 
     df = pd.DataFrame({"iata": nodes, "pagerank": pr}).sort_values("pagerank", ascending=False)
     df.to_csv(ASSETS / "hub_rank.csv", index=False)
 
-    top = df.head(30)
-    fig = {
-        "data": [{
-            "type": "bar", "orientation": "h",
-            "x": [round(float(x), 6) for x in top["pagerank"].tolist()],
-            "y": top["iata"].tolist()
-        }],
-        "layout": {
-            "margin": {"l": 80, "r": 10, "t": 20, "b": 40},
-            "xaxis": {"title": "PageRank"},
-            "yaxis": {"title": "Airport (IATA)"},
-            "height": 520
-        }
-    }
-    (ASSETS / "hub_rank.json").write_text(json.dumps(fig), encoding="utf-8")
-    print("[ok] hub_rank.csv, hub_rank.json")
+    hub_rank_figure(df, n=30, horizontal=True).write(ASSETS)
+    print(f"[ok] hub_rank.csv, hub_rank.json ({len(nodes)} nodes, {A.nnz} edges, {n_iter} iters)")
 
 def build_static_api():
     (DOCS / "api").mkdir(parents=True, exist_ok=True)
 
-    # last 24 months timeseries
-    ts_path = PUB / "euro_atfm_timeseries.csv"
-    if ts_path.exists():
-        ts = pd.read_csv(ts_path, parse_dates=["period_start"]).sort_values("period_start")
-        if not ts.empty:
-            last24 = ts["period_start"].max() - pd.DateOffset(months=23)
-            ts = ts[ts["period_start"] >= last24].copy()
-            ts["period_start"] = ts["period_start"].dt.strftime("%Y-%m-%d")
-            (DOCS / "api" / "euro_atfm_timeseries_last24.json").write_text(ts.to_json(orient="records"), encoding="utf-8")
+    # last 24 months timeseries: ditulis build_api_last24.py (satu writer; format month/delay_min)
 
     # top-100 degree
     deg_path = PUB / "airport_degree.csv"
     if deg_path.exists():
-        deg = pd.read_csv(deg_path)
+        deg = read_publish(deg_path)
         if not deg.empty and "deg_total" in deg.columns:
             deg_top = deg.sort_values("deg_total", ascending=False).head(100)
             (DOCS / "api" / "airport_degree_top100.json").write_text(deg_top.to_json(orient="records"), encoding="utf-8")
@@ -154,10 +170,30 @@ def build_static_api():
     (DOCS / "api" / "index.json").write_text(json.dumps(idx), encoding="utf-8")
     print("[ok] api shards")
 
-def main():
-    build_scenario_assets()
-    build_hub_rank()
-    build_static_api()
+PARTS = ("scenario", "hub_rank", "static_api")
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Build scenario / hub rank / static API assets.")
+    ap.add_argument("parts", nargs="*", choices=PARTS, help="Subset to build (default: all)")
+    parts = set(ap.parse_args(argv).parts or PARTS)
+
+    # rebuild hanya artifact yang input/script-nya berubah
+    cache = BuildCache(__file__)
+    here = Path(__file__).resolve().parent
+    graph_py = here / "route_graph.py"
+    if "scenario" in parts:
+        cache.run("scenario", build_scenario_assets,
+                  [PUB / "euro_atfm_timeseries.csv", PUB / "euro_atfm_by_location.csv"],
+                  [ASSETS / "scenario_timeseries.json", ASSETS / "scenario_matrix.json"])
+    if "hub_rank" in parts:
+        cache.run("hub_rank", build_hub_rank,
+                  [PUB / "route_counts.csv", graph_py, here / "ensure_hub_rank_assets.py", here / "chart_spec.py"],
+                  [ASSETS / "hub_rank.csv", ASSETS / "hub_rank.json"])
+    if "static_api" in parts:
+        cache.run("static_api", build_static_api,
+                  [PUB / "airport_degree.csv", API / "euro_atfm_timeseries_last24.json"],
+                  [API / "index.json"])
 
 if __name__ == "__main__":
     main()
@@ -3,6 +3,9 @@ from pathlib import Path
 import json
 import pandas as pd
 
+from publish_loader import read_publish
+from build_cache import BuildCache
+
 ROOT = Path(__file__).resolve().parents[1]
 DOCS = ROOT / "docs"
 API = DOCS / "api"
@@ -24,7 +27,7 @@ def pick(cols, options):
             return c
     return None
 
-def main():
+def build():
     global SRC
     SRC = find_src()
     API.mkdir(parents=True, exist_ok=True)
@@ -35,7 +38,7 @@ def main():
         print("[warn] source CSV not found; wrote empty []")
         return 0
 
-    df = pd.read_csv(SRC)
+    df = read_publish(SRC)
     if df.empty:
         out.write_text("[]", encoding="utf-8")
         print("[warn] source empty; wrote []")
@@ -82,5 +85,13 @@ def main():
     print(f"[ok] wrote {out} with {len(items)} rows")
     return 0
 
+def main():
+    cache = BuildCache(__file__)
+    src = find_src()
+    # satu-satunya writer file ini; "format" memaksa rebuild sekali atas file lama dari build_adv_assets
+    cache.run("last24", build, [src] if src else [], [API / "euro_atfm_timeseries_last24.json"],
+              extra={"format": "month/delay_min"})
+    return 0
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Static API v1: tiap dataset publish/*.csv dipecah jadi shard JSON per partisi key/waktu.
+
+- Aturan partisi di PARTITIONS (dataset tanpa aturan → page per PAGE_ROWS baris):
+    * euro_atfm_timeseries  → per tahun period_start
+    * airport_degree, dim_airport_clean → per huruf pertama IATA
+    * route_counts          → per bandara asal (src_iata)  → api/v1/route_counts/DXB.json
+- Shard yang lebih besar dari --page-rows dipecah lagi jadi page (<key>.p2.json, ...)
+- docs/api/v1/index.json: ringkasan per dataset (kolom, template path, rows, bytes);
+  docs/api/v1/<dataset>/_shards.json: per shard rows / bytes / jumlah page /
+  key bounds (min/max kolom partisi)
+- Incremental per dataset (md5 CSV + script, lihat build_cache.py)
+
+File lama (api/index.json, *_last24.json, *_top100.json) tetap dibuat oleh build_adv_assets/build_api_last24.
+
+Contoh:
+  python scripts/build_api_shards.py
+  curl .../api/v1/route_counts/DXB.json
+"""
+from __future__ import annotations
+import argparse, json, re, shutil
+from pathlib import Path
+from datetime import datetime, timezone
+import pandas as pd
+
+from publish_loader import read_publish
+from build_cache import BuildCache
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLISH = ROOT / "publish"
+API = ROOT / "docs" / "api"
+V1 = API / "v1"
+PAGE_ROWS = 5000
+
+# dataset stem → (mode, kolom); mode: "year" | "prefix" | "key"
+PARTITIONS = {
+    "euro_atfm_timeseries": ("year", "period_start"),
+    "airport_degree": ("prefix", "iata"),
+    "dim_airport_clean": ("prefix", "iata"),
+    "route_counts": ("key", "src_iata"),
+}
+
+_SAFE = re.compile(r"[^A-Za-z0-9_-]")
+
+def shard_keys(df: pd.DataFrame, mode: str, col: str) -> pd.Series:
+    """Label shard per baris (string aman untuk nama file; NA → _null)."""
+    s = df[col]
+    if mode == "year":
+        key = pd.to_datetime(s, errors="coerce").dt.year.astype("Int64").astype("string")
+    elif mode == "prefix":
+        key = s.astype("string").str.strip().str[:1].str.upper()
+    else:
+        key = s.astype("string").str.strip()
+    key = key.str.replace(_SAFE, "_", regex=True)
+    return key.mask(key.isna() | (key == ""), "_null").astype(str)
+
+def _bound(v):
+    if pd.isna(v):
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.strftime("%Y-%m-%d")
+    return v.item() if hasattr(v, "item") else v
+
+def _records_json(df: pd.DataFrame) -> str:
+    out = df.copy()
+    for c in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[c]):
+            out[c] = out[c].dt.strftime("%Y-%m-%d")
+    return out.to_json(orient="records", force_ascii=False)
+
+def build_dataset(csv_path: Path, out_root: Path = V1, page_rows: int = PAGE_ROWS) -> bool:
+    name = csv_path.stem
+    df = read_publish(csv_path)
+    out_dir = out_root / name
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    mode, col = PARTITIONS.get(name, ("page", None))
+    if col is not None and col not in df.columns:
+        mode, col = "page", None
+    if mode == "page":
+        keys = pd.Series(["all"] * len(df), index=df.index)
+    else:
+        keys = shard_keys(df, mode, col)
+        df = df.sort_values(col, kind="stable")
+        keys = keys.loc[df.index]
+
+    shards = []
+    for key, part in df.groupby(keys.to_numpy(), sort=True):
+        pages = []
+        for i, lo in enumerate(range(0, max(len(part), 1), page_rows), start=1):
+            chunk = part.iloc[lo:lo + page_rows]
+            fname = f"{key}.json" if i == 1 else f"{key}.p{i}.json"
+            p = out_dir / fname
+            p.write_text(_records_json(chunk), encoding="utf-8")
+            pages.append(p.stat().st_size)
+        entry = {"key": key, "rows": len(part), "bytes": sum(pages), "pages": len(pages)}
+        if col is not None:
+            entry["min"], entry["max"] = _bound(part[col].min()), _bound(part[col].max())
+        shards.append(entry)
+    if not shards:
+        (out_dir / "all.json").write_text("[]", encoding="utf-8")
+        shards.append({"key": "all", "rows": 0, "bytes": 2, "pages": 1})
+
+    meta = {
+        "dataset": name,
+        "columns": [str(c) for c in df.columns],
+        "partition": {"mode": mode, "column": col},
+        "template": f"api/v1/{name}/{{key}}.json",
+        "page_template": f"api/v1/{name}/{{key}}.p{{page}}.json",
+        "page_rows": page_rows,
+        "rows": int(len(df)),
+        "bytes": sum(s["bytes"] for s in shards),
+        "shards": shards,
+    }
+    (out_dir / "_shards.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    print(f"[ok] api/v1/{name}: {len(shards)} shard(s), {len(df)} rows ({mode}{'' if col is None else ' ' + col})")
+    return True
+
+def _owned(d: Path) -> bool:
+    """Folder berisi _shards.json yang ditulis build_dataset untuk dataset bernama sama."""
+    try:
+        meta = json.loads((d / "_shards.json").read_text(encoding="utf-8"))
+    except Exception:
+        return False
+    return meta.get("dataset") == d.name and "shards" in meta and "page_rows" in meta
+
+def write_index(names: list, out_root: Path = V1) -> Path:
+    datasets = {}
+    for name in names:
+        meta_path = out_root / name / "_shards.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            shards = meta.pop("shards")
+            meta["shards"] = len(shards)
+            meta["shard_index"] = f"api/v1/{name}/_shards.json"
+            if meta["partition"]["column"] is not None and shards:
+                meta["min"] = min((s["min"] for s in shards if s["min"] is not None), default=None)
+                meta["max"] = max((s["max"] for s in shards if s["max"] is not None), default=None)
+            datasets[name] = meta
+    index = {"generated_at": datetime.now(timezone.utc).isoformat(), "version": 1, "datasets": datasets}
+    out = out_root / "index.json"
+    out.write_text(json.dumps(index, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    print(f"[ok] api/v1/index.json: {len(datasets)} dataset(s)")
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Shard publish datasets into a static paged JSON API.")
+    ap.add_argument("--csv-dir", type=Path, default=PUBLISH)
+    ap.add_argument("--out", type=Path, default=V1)
+    ap.add_argument("--page-rows", type=int, default=PAGE_ROWS, help="Maks baris per file shard")
+    args = ap.parse_args()
+
+    files = sorted(args.csv_dir.glob("*.csv"))
+    if not files:
+        print(f"[skip] no CSV in {args.csv_dir}")
+        return 0
+    cache = BuildCache(__file__)
+    for p in files:
+        cache.run(f"v1:{p.stem}", lambda p=p: build_dataset(p, args.out, args.page_rows),
+                  [p], [args.out / p.stem / "_shards.json"],
+                  extra={"page_rows": args.page_rows, "out": str(args.out)})
+    # dataset yang CSV-nya sudah tidak ada → buang shard-nya (hanya folder milik script ini)
+    names = {p.stem for p in files}
+    for d in args.out.glob("*/"):
+        if d.is_dir() and d.name not in names and _owned(d):
+            shutil.rmtree(d)
+            print(f"[ok] removed stale shards {d}")
+    write_index(sorted(names), args.out)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,6 +2,8 @@
 from pathlib import Path
 import pandas as pd
 
+from publish_loader import read_publish
+
 CSV_DIR = Path("publish")
 OUT_DIR = Path("docs/pages")
 
@@ -58,7 +60,7 @@ def by_location():
         print(f"[SKIP] {src.name} tidak ditemukan")
         return
 
-    df = pd.read_csv(src)
+    df = read_publish(src)
     # cari kolom lokasi
     loc_col = _first_existing(
         df.columns,
@@ -90,7 +92,7 @@ def timeseries():
         print(f"[SKIP] {src.name} tidak ditemukan")
         return
 
-    df = pd.read_csv(src)
+    df = read_publish(src)
 
     # deteksi kolom tanggal sederhana
     date_col = None
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Content-hash build cache untuk pipeline docs.
+
+Setiap artifact dicatat di manifest (.build_cache/<script>.json) dengan:
+- md5 semua input (publish/*.csv, dll.)
+- md5 source script yang membangunnya (= versi script)
+- parameter ekstra (env/opsi yang mempengaruhi output)
+
+Artifact di-rebuild hanya kalau salah satu di atas berubah atau output-nya hilang.
+Satu manifest per script; stage paralel yang memakai script yang sama (mis. build_adv_assets)
+me-merge ke manifest itu di bawah flock (<manifest>.lock).
+
+Env:
+  BUILD_FORCE=1   abaikan cache, rebuild semua
+"""
+from __future__ import annotations
+import os, json, hashlib
+from contextlib import contextmanager
+from pathlib import Path
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa lock (build paralel hanya di runner Linux)
+    fcntl = None
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = Path(os.environ.get("BUILD_CACHE_DIR", ROOT / ".build_cache"))
+
+def md5sum(p: Path) -> str:
+    h = hashlib.md5()
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(1<<20), b""): h.update(chunk)
+    return h.hexdigest()
+
+def _rel(p: Path) -> str:
+    p = Path(p).resolve()
+    try:
+        return str(p.relative_to(ROOT))
+    except ValueError:
+        return str(p)
+
+class BuildCache:
+    def __init__(self, script: str):
+        self.script = Path(script).resolve()
+        self.path = CACHE_DIR / f"{self.script.stem}.json"
+        self.force = os.environ.get("BUILD_FORCE", "") not in ("", "0")
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            data = {}
+        self.files = data.get("files", {})          # rel -> [size, mtime_ns, md5]
+        self.artifacts = data.get("artifacts", {})  # key -> signature
+        self.version = self.file_md5(self.script)
+        self._touched = set()
+
+    def file_md5(self, p: Path) -> str | None:
+        """md5 file, di-memo by (size, mtime) supaya file yang tidak berubah tidak di-hash ulang."""
+        p = Path(p)
+        if not p.exists():
+            return None
+        st = p.stat()
+        rel = _rel(p)
+        memo = self.files.get(rel)
+        if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+            return memo[2]
+        digest = md5sum(p)
+        self.files[rel] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def signature(self, inputs, extra=None) -> dict:
+        return {
+            "script": self.version,
+            "inputs": {_rel(p): self.file_md5(p) for p in inputs},
+            "extra": extra,
+        }
+
+    def fresh(self, key: str, inputs, outputs, extra=None) -> bool:
+        if self.force:
+            return False
+        if not all(Path(o).exists() for o in outputs):
+            return False
+        return self.artifacts.get(key) == json.loads(json.dumps(self.signature(inputs, extra)))
+
+    def record(self, key: str, inputs, extra=None):
+        self.artifacts[key] = self.signature(inputs, extra)
+        self._touched.add(key)
+
+    def forget(self, key: str):
+        self.artifacts.pop(key, None)
+        self._touched.add(key)
+
+    @contextmanager
+    def _locked(self):
+        """Kunci eksklusif read-merge-replace manifest antar proses."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path.with_suffix(".lock"), "w") as lk:
+            fcntl.flock(lk, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lk, fcntl.LOCK_UN)
+
+    def save(self):
+        """Merge ke manifest terbaru di disk (stage lain bisa menulis key lain dari script yang sama)."""
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            try:
+                disk = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception:
+                disk = {}
+            artifacts = disk.get("artifacts", {})
+            for key in self._touched:
+                if key in self.artifacts:
+                    artifacts[key] = self.artifacts[key]
+                else:
+                    artifacts.pop(key, None)
+            files = {**disk.get("files", {}), **self.files}
+            payload = {"files": files, "artifacts": artifacts}
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(payload, indent=1, sort_keys=True), encoding="utf-8")
+            tmp.replace(self.path)
+
+    def run(self, key: str, fn, inputs, outputs, extra=None):
+        """
+        Jalankan fn() kalau artifact `key` stale; skip kalau fresh.
+        Return hasil fn() (None kalau di-skip). Signature dicatat hanya kalau fn() tidak
+        return False dan semua output ada.
+        """
+        inputs = [Path(p) for p in inputs]
+        if self.fresh(key, inputs, outputs, extra):
+            print(f"[cache] {key} up to date")
+            return None
+        result = fn()
+        if result is not False and all(Path(o).exists() for o in outputs):
+            self.record(key, inputs, extra)
+        else:
+            self.forget(key)
+        self.save()
+        return result
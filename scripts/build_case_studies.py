@@ -2,9 +2,9 @@
 import os, sys, textwrap
 from pathlib import Path
 import pandas as pd
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+
+from publish_loader import read_publish
+from chart_pool import ChartPool, ChartJob
 
 ROOT = Path(__file__).resolve().parents[1]
 DOCS = ROOT / "docs"
@@ -15,13 +15,6 @@ CASE_DIR = DOCS / "case_studies"
 ASSETS.mkdir(parents=True, exist_ok=True)
 CASE_DIR.mkdir(parents=True, exist_ok=True)
 
-def savefig(name):
-    p = ASSETS / name
-    plt.tight_layout()
-    plt.savefig(p, dpi=144, bbox_inches="tight")
-    plt.close()
-    return f"assets/{name}"
-
 def month_floor(s):
     s = pd.to_datetime(s, errors="coerce", utc=True).dt.tz_localize(None)
     return s.dt.to_period("M").dt.to_timestamp()
@@ -30,11 +23,11 @@ def write_md(path, title, body):
     path.write_text(f"# {title}\n\n{body}\n", encoding="utf-8")
 
 # ---- Case 1: Ops Delay Watch
-def case_ops_delay():
+def case_ops_delay(pool: ChartPool):
     csv = PUBLISH / "euro_atfm_timeseries.csv"
     if not csv.exists():
         return
-    df = pd.read_csv(csv)
+    df = read_publish(csv)
     # kolom tanggal fleksibel: period_start / date / period
     for cand in ["period_start", "date", "period"]:
         if cand in df.columns:
@@ -52,11 +45,11 @@ def case_ops_delay():
     monthly = d24.groupby("_month", as_index=False)["delay_minutes"].sum()
 
     # Line 24 bulan
-    plt.figure(figsize=(8,3))
-    plt.plot(monthly["_month"], monthly["delay_minutes"], marker="o")
-    plt.title("ATFM delay (en-route) — 24 bulan terakhir")
-    plt.xlabel("Month"); plt.ylabel("Delay minutes")
-    line_fn = savefig("case_ops_delay_24m.png")
+    line_fn = pool.submit(ChartJob("case_ops_delay_24m", ASSETS / "case_ops_delay_24m.png", "line",
+                                   {"x": monthly["_month"].to_numpy(),
+                                    "series": [{"y": monthly["delay_minutes"].to_numpy(), "marker": "o"}]},
+                                   {"title": "ATFM delay (en-route) — 24 bulan terakhir", "xlabel": "Month",
+                                    "ylabel": "Delay minutes", "dpi": 144, "bbox": "tight"}))
 
     # YoY bar (kalau ada >= 12 bulan)
     yoy_text = ""
@@ -70,7 +63,7 @@ def case_ops_delay():
     top_tbl = ""
     loc_csv = PUBLISH / "euro_atfm_by_location.csv"
     if loc_csv.exists():
-        loc = pd.read_csv(loc_csv)
+        loc = read_publish(loc_csv)
         top = loc.sort_values("delay_minutes", ascending=False).head(10).copy()
         top_tbl = top.to_markdown(index=False)
 
@@ -86,26 +79,24 @@ def case_ops_delay():
     write_md(CASE_DIR / "ops_delay_watch.md", "Ops Delay Watch (EUROCONTROL)", body)
 
 # ---- Case 2: Network Strength
-def case_network_strength():
+def case_network_strength(pool: ChartPool):
     deg_csv = PUBLISH / "airport_degree.csv"
     od_csv  = PUBLISH / "top_od_pairs.csv"
     if not deg_csv.exists():
         return
-    deg = pd.read_csv(deg_csv)
+    deg = read_publish(deg_csv)
     deg["deg_total"] = deg[[c for c in deg.columns if c.lower().startswith("deg")]].sum(axis=1)
     top20 = deg.sort_values("deg_total", ascending=False).head(20)
 
     # Bar top-20 degree
-    plt.figure(figsize=(8,3))
-    plt.bar(top20["iata"].astype(str), top20["deg_total"])
-    plt.xticks(rotation=60, ha="right")
-    plt.title("Top-20 airport by degree (total)")
-    plt.xlabel("IATA"); plt.ylabel("Degree")
-    bar_fn = savefig("case_network_degree_top20.png")
+    bar_fn = pool.submit(ChartJob("case_network_degree_top20", ASSETS / "case_network_degree_top20.png", "bar",
+                                  {"labels": top20["iata"].astype(str).tolist(), "values": top20["deg_total"].to_numpy()},
+                                  {"title": "Top-20 airport by degree (total)", "xlabel": "IATA", "ylabel": "Degree",
+                                   "rotate": 60}))
 
     od_tbl = ""
     if od_csv.exists():
-        od = pd.read_csv(od_csv).sort_values("num_routes", ascending=False).head(20)
+        od = read_publish(od_csv).sort_values("num_routes", ascending=False).head(20)
         od_tbl = od.to_markdown(index=False)
 
     body = textwrap.dedent(f"""
@@ -119,6 +110,9 @@ def case_network_strength():
     write_md(CASE_DIR / "network_strength.md", "Network Strength (OpenFlights)", body)
 
 if __name__ == "__main__":
-    case_ops_delay()
-    case_network_strength()
+    # markdown selalu ditulis ulang (murah); PNG di-render pool hanya kalau hash data berubah
+    pool = ChartPool(__file__)
+    case_ops_delay(pool)
+    case_network_strength(pool)
+    pool.run()
     print("Case studies built.")
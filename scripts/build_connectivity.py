@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Multi-hop connectivity & shortest path di graf rute OpenFlights (scipy.sparse.csgraph).
+
+Output (data/derived/, --publish → copy ke publish/):
+  - airport_connectivity  per bandara: jumlah tujuan nonstop / one-stop / two-stop
+                          (berdasarkan jumlah leg minimum), total reachable, rata-rata leg
+  - od_shortest_paths     semua pasangan antar Top-N hub (deg_total) + --pairs:
+                          min_hops & hop_path, jarak great-circle langsung, shortest_km &
+                          km_path (Dijkstra berbobot haversine), circuity = shortest_km / direct_km
+
+BFS dijalankan batched (blok sumber) di C lewat csgraph.shortest_path, bukan loop per node.
+Incremental by md5 route_counts + dim_airport_clean + script (build_cache.py).
+
+Contoh:
+  python scripts/build_connectivity.py --publish
+  python scripts/build_connectivity.py --hubs 100 --pairs DXB-JFK,CGK-LHR
+"""
+from __future__ import annotations
+import argparse, shutil
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from route_graph import encode_edges, haversine_km
+from publish_loader import read_publish
+from build_cache import BuildCache
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLISH = ROOT / "publish"
+DERIVED = ROOT / "data" / "derived"
+TABLES = ("airport_connectivity", "od_shortest_paths")
+BLOCK = 512
+
+def load_graph(publish_dir: Path = PUBLISH):
+    """nodes, adjacency biner (CSR), adjacency berbobot km (CSR), lat, lon per node."""
+    rc = read_publish(publish_dir / "route_counts.csv").dropna(subset=["src_iata", "dst_iata"])
+    nodes, si, di, _ = encode_edges(rc["src_iata"].astype(str), rc["dst_iata"].astype(str))
+    n = len(nodes)
+    A = sparse.csr_matrix((np.ones(len(si)), (si, di)), shape=(n, n))
+    A.data[:] = 1.0
+
+    dim = read_publish(publish_dir / "dim_airport_clean.csv").drop_duplicates("iata").set_index("iata")
+    lat = pd.to_numeric(dim["lat"], errors="coerce").reindex(nodes).to_numpy()
+    lon = pd.to_numeric(dim["lon"], errors="coerce").reindex(nodes).to_numpy()
+    km = haversine_km(lat[si], lon[si], lat[di], lon[di])
+    ok = np.isfinite(km)
+    # csgraph menganggap bobot 0 sebagai "tidak ada edge" → beri lantai kecil
+    W = sparse.csr_matrix((np.maximum(km[ok], 1e-3), (si[ok], di[ok])), shape=(n, n))
+    return nodes, A, W, lat, lon
+
+def connectivity_table(nodes, A, block: int = BLOCK) -> pd.DataFrame:
+    n = len(nodes)
+    counts = np.zeros((n, 4), dtype=np.int64)   # leg 1, 2, 3, reachable
+    hop_sum = np.zeros(n)
+    for lo in range(0, n, block):
+        idx = np.arange(lo, min(lo + block, n))
+        D = csgraph.shortest_path(A, method="D", unweighted=True, indices=idx)
+        reach = np.isfinite(D) & (D > 0)
+        for k in (1, 2, 3):
+            counts[idx, k - 1] = (D == k).sum(axis=1)
+        counts[idx, 3] = reach.sum(axis=1)
+        hop_sum[idx] = np.where(reach, D, 0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_hops = np.where(counts[:, 3] > 0, hop_sum / counts[:, 3], np.nan)
+    return pd.DataFrame({
+        "iata": nodes,
+        "nonstop": counts[:, 0],
+        "one_stop": counts[:, 1],
+        "two_stop": counts[:, 2],
+        "reachable": counts[:, 3],
+        "mean_hops": np.round(mean_hops, 3),
+    })
+
+def _paths(pred: np.ndarray, rows: np.ndarray, dsts: np.ndarray, nodes) -> list:
+    """Rekonstruksi path dari matriks predecessor untuk banyak pasangan sekaligus (vectorised per langkah)."""
+    steps = [dsts]
+    cur = dsts.copy()
+    active = pred[rows, cur] >= 0
+    while active.any():
+        nxt = np.where(active, pred[rows, np.where(active, cur, 0)], -9999)
+        steps.append(nxt)
+        cur = np.where(active, nxt, cur)
+        active = active & (pred[rows, np.where(nxt >= 0, nxt, 0)] >= 0) & (nxt >= 0)
+    chain = np.stack(steps[::-1], axis=1)
+    names = np.asarray(nodes, dtype=object)
+    out = []
+    for r in range(len(rows)):
+        ids = chain[r][chain[r] >= 0]
+        out.append(">".join(names[ids]) if len(ids) > 1 else "")
+    return out
+
+def od_table(nodes, A, W, lat, lon, sources, targets=None) -> pd.DataFrame:
+    """Shortest hop & km path dari tiap `sources` ke tiap `targets` (default: sources juga)."""
+    src = np.unique(np.asarray(sources, dtype=np.int64))
+    if not len(src):
+        return pd.DataFrame(columns=["src_iata", "dst_iata", "min_hops", "hop_path",
+                                     "direct_km", "shortest_km", "km_path", "circuity"])
+    D_h, P_h = csgraph.shortest_path(A, method="D", unweighted=True, indices=src, return_predecessors=True)
+    D_k, P_k = csgraph.dijkstra(W, indices=src, return_predecessors=True)
+    if targets is None:
+        rows, cols = np.nonzero(np.ones((len(src), len(src)), dtype=bool))
+        dsts = src[cols]
+    else:
+        rows, dsts = targets
+    keep = src[rows] != dsts
+    rows, dsts = rows[keep], dsts[keep]
+
+    hops = D_h[rows, dsts]
+    km = D_k[rows, dsts]
+    direct = haversine_km(lat[src[rows]], lon[src[rows]], lat[dsts], lon[dsts])
+    reach_h, reach_k = np.isfinite(hops), np.isfinite(km)
+    hop_path = np.array([""] * len(rows), dtype=object)
+    km_path = np.array([""] * len(rows), dtype=object)
+    if reach_h.any():
+        hop_path[reach_h] = _paths(P_h, rows[reach_h], dsts[reach_h], nodes)
+    if reach_k.any():
+        km_path[reach_k] = _paths(P_k, rows[reach_k], dsts[reach_k], nodes)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        circuity = np.where(reach_k & (direct > 0), km / direct, np.nan)
+    return pd.DataFrame({
+        "src_iata": nodes[src[rows]],
+        "dst_iata": nodes[dsts],
+        "min_hops": pd.array(np.where(reach_h, hops, np.nan), dtype="Float64").astype("Int64"),
+        "hop_path": hop_path,
+        "direct_km": np.round(direct, 1),
+        "shortest_km": np.round(np.where(reach_k, km, np.nan), 1),
+        "km_path": km_path,
+        "circuity": np.round(circuity, 3),
+    })
+
+def build(publish_dir: Path = PUBLISH, out_dir: Path = DERIVED, hubs: int = 50, pairs: str = "") -> bool:
+    needed = [publish_dir / "route_counts.csv", publish_dir / "dim_airport_clean.csv"]
+    missing = [p.name for p in needed if not p.exists()]
+    if missing:
+        print(f"[skip] connectivity: missing {missing}")
+        return False
+    nodes, A, W, lat, lon = load_graph(publish_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    conn = connectivity_table(nodes, A)
+    conn.to_csv(out_dir / "airport_connectivity.csv", index=False)
+    print(f"[ok] airport_connectivity: {len(conn)} rows")
+
+    # OD: semua pasangan antar Top-N hub (deg_total = nonstop out + in) + pasangan eksplisit
+    deg = np.asarray(A.sum(axis=1)).ravel() + np.asarray(A.sum(axis=0)).ravel()
+    hub_ids = np.lexsort((nodes, -deg))[:hubs]
+    od = od_table(nodes, A, W, lat, lon, hub_ids)
+    id_of = {c: i for i, c in enumerate(nodes.tolist())}
+    extra = [tuple(p.strip().upper().split("-", 1)) for p in pairs.split(",") if "-" in p]
+    extra = [(id_of[a], id_of[b]) for a, b in extra if a in id_of and b in id_of and a != b]
+    if extra:
+        s_ids = np.array([a for a, _ in extra])
+        uniq, rows = np.unique(s_ids, return_inverse=True)
+        od = pd.concat([od, od_table(nodes, A, W, lat, lon, uniq, (rows, np.array([b for _, b in extra])))])
+        od = od.drop_duplicates(["src_iata", "dst_iata"])
+    od = od.sort_values(["src_iata", "dst_iata"]).reset_index(drop=True)
+    od.to_csv(out_dir / "od_shortest_paths.csv", index=False)
+    print(f"[ok] od_shortest_paths: {len(od)} rows ({min(hubs, len(nodes))} hubs, {len(extra)} extra pair(s))")
+    return True
+
+def main():
+    ap = argparse.ArgumentParser(description="Multi-hop connectivity and shortest paths over route_counts.")
+    ap.add_argument("--publish-dir", type=Path, default=PUBLISH, help="Sumber route_counts & dim_airport_clean")
+    ap.add_argument("--out-dir", type=Path, default=DERIVED)
+    ap.add_argument("--hubs", type=int, default=50, help="OD all-pairs antar Top-N hub by degree")
+    ap.add_argument("--pairs", type=str, default="", help="Pasangan tambahan, mis. DXB-JFK,CGK-LHR")
+    ap.add_argument("--publish", action="store_true", help="Copy CSV hasil ke publish/")
+    args = ap.parse_args()
+
+    cache = BuildCache(__file__)
+    cache.run("connectivity", lambda: build(args.publish_dir, args.out_dir, args.hubs, args.pairs),
+              [args.publish_dir / "route_counts.csv", args.publish_dir / "dim_airport_clean.csv",
+               Path(__file__).resolve().parent / "route_graph.py"],
+              [args.out_dir / f"{t}.csv" for t in TABLES],
+              extra={"hubs": args.hubs, "pairs": args.pairs, "out": str(args.out_dir)})
+
+    if args.publish:
+        PUBLISH.mkdir(parents=True, exist_ok=True)
+        for t in TABLES:
+            src = args.out_dir / f"{t}.csv"
+            if src.exists():
+                shutil.copy2(src, PUBLISH / src.name)
+        print(f"[ok] copied {len(TABLES)} table(s) to publish/")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
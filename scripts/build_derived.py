@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+ETL OpenFlights → data/derived (menggantikan langkah SQL/notebook manual).
+
+Input (dari get_data.sh):
+  data/openflights/airports.dat, data/openflights/routes.dat
+Output (CSV + Parquet di data/derived/, opsional copy CSV ke publish/):
+  - route_counts       src_iata, dst_iata, num_routes
+  - airport_degree     iata, deg_out, deg_in, deg_total
+  - top_od_pairs       100 OD dengan num_routes terbesar
+  - dim_airport_clean  iata, icao, airport_name, city, country, lat, lon, tz
+
+Semua transform berupa SQL DuckDB (vectorised). Incremental: kalau md5 file raw
+dan script tidak berubah, ETL di-skip (lihat build_cache.py). BUILD_FORCE=1 untuk paksa.
+
+Contoh:
+  python scripts/build_derived.py --publish
+"""
+from __future__ import annotations
+import argparse, shutil
+from pathlib import Path
+import duckdb
+
+from build_cache import BuildCache
+
+ROOT = Path(__file__).resolve().parents[1]
+RAW = ROOT / "data" / "openflights"
+DERIVED = ROOT / "data" / "derived"
+PUBLISH = ROOT / "publish"
+
+TABLES = ("route_counts", "airport_degree", "top_od_pairs", "dim_airport_clean")
+
+def _lit(p: Path) -> str:
+    return "'" + str(p).replace("'", "''") + "'"
+
+SQL = {
+    "airports": """
+        CREATE OR REPLACE TEMP TABLE airports AS
+        SELECT * FROM read_csv({path}, header=false, nullstr='\\N', quote='"', columns={{
+            'id': 'INTEGER', 'name': 'VARCHAR', 'city': 'VARCHAR', 'country': 'VARCHAR',
+            'iata': 'VARCHAR', 'icao': 'VARCHAR', 'lat': 'DOUBLE', 'lon': 'DOUBLE',
+            'alt_ft': 'INTEGER', 'tz_offset': 'DOUBLE', 'dst': 'VARCHAR', 'tz': 'VARCHAR',
+            'type': 'VARCHAR', 'src': 'VARCHAR'
+        }})
+    """,
+    "routes": """
+        CREATE OR REPLACE TEMP TABLE routes AS
+        SELECT * FROM read_csv({path}, header=false, nullstr='\\N', columns={{
+            'airline': 'VARCHAR', 'airline_id': 'INTEGER', 'src': 'VARCHAR', 'src_id': 'INTEGER',
+            'dst': 'VARCHAR', 'dst_id': 'INTEGER', 'codeshare': 'VARCHAR', 'stops': 'INTEGER',
+            'equipment': 'VARCHAR'
+        }})
+    """,
+    # routes.dat memakai IATA (3 huruf) atau ICAO (4 huruf) → ambil pasangan IATA saja
+    "route_counts": """
+        SELECT src AS src_iata, dst AS dst_iata, COUNT(*)::INTEGER AS num_routes
+        FROM routes
+        WHERE length(src) = 3 AND length(dst) = 3
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """,
+    # degree = jumlah tujuan/asal unik (baris route_counts), bukan jumlah varian rute
+    "airport_degree": """
+        WITH o AS (SELECT src_iata AS iata, COUNT(*) AS deg_out FROM route_counts GROUP BY 1),
+             i AS (SELECT dst_iata AS iata, COUNT(*) AS deg_in FROM route_counts GROUP BY 1)
+        SELECT COALESCE(o.iata, i.iata) AS iata,
+               COALESCE(deg_out, 0)::INTEGER AS deg_out,
+               COALESCE(deg_in, 0)::INTEGER AS deg_in,
+               (COALESCE(deg_out, 0) + COALESCE(deg_in, 0))::INTEGER AS deg_total
+        FROM o FULL OUTER JOIN i ON o.iata = i.iata
+        ORDER BY deg_total DESC, iata
+    """,
+    "top_od_pairs": """
+        SELECT src_iata, dst_iata, num_routes
+        FROM route_counts
+        ORDER BY num_routes DESC, src_iata, dst_iata
+        LIMIT 100
+    """,
+    "dim_airport_clean": """
+        SELECT iata, icao, name AS airport_name, city, country, lat, lon, tz
+        FROM airports
+        WHERE iata IS NOT NULL AND length(trim(iata)) = 3 AND icao IS NOT NULL
+        ORDER BY id
+    """,
+}
+
+def outputs(out_dir: Path) -> list:
+    return [out_dir / f"{t}.{ext}" for t in TABLES for ext in ("csv", "parquet")]
+
+def build(raw_dir: Path = RAW, out_dir: Path = DERIVED) -> bool:
+    airports, routes = raw_dir / "airports.dat", raw_dir / "routes.dat"
+    missing = [p.name for p in (airports, routes) if not p.exists()]
+    if missing:
+        print(f"[skip] derived: missing {missing} in {raw_dir} (jalankan get_data.sh)")
+        return False
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(":memory:")
+    con.execute(SQL["airports"].format(path=_lit(airports)))
+    con.execute(SQL["routes"].format(path=_lit(routes)))
+    # route_counts dipakai ulang oleh degree & top OD → materialise sekali
+    con.execute(f"CREATE OR REPLACE TEMP TABLE route_counts AS {SQL['route_counts']}")
+
+    for t in TABLES:
+        query = "SELECT * FROM route_counts" if t == "route_counts" else SQL[t]
+        con.execute(f"CREATE OR REPLACE TEMP TABLE _out AS {query}")
+        con.execute(f"COPY _out TO {_lit(out_dir / f'{t}.csv')} (HEADER, DELIMITER ',')")
+        con.execute(f"COPY _out TO {_lit(out_dir / f'{t}.parquet')} (FORMAT PARQUET)")
+        n = con.execute("SELECT COUNT(*) FROM _out").fetchone()[0]
+        print(f"[ok] {t}: {n} rows → {out_dir.relative_to(ROOT) if out_dir.is_relative_to(ROOT) else out_dir}")
+    con.close()
+    return True
+
+def main():
+    ap = argparse.ArgumentParser(description="Build data/derived network tables from raw OpenFlights via DuckDB.")
+    ap.add_argument("--raw-dir", type=Path, default=RAW)
+    ap.add_argument("--out-dir", type=Path, default=DERIVED)
+    ap.add_argument("--publish", action="store_true", help="Copy CSV hasil ke publish/ untuk BI & docs")
+    args = ap.parse_args()
+
+    cache = BuildCache(__file__)
+    cache.run("openflights", lambda: build(args.raw_dir, args.out_dir),
+              [args.raw_dir / "airports.dat", args.raw_dir / "routes.dat"],
+              outputs(args.out_dir), extra={"out": str(args.out_dir)})
+
+    if args.publish:
+        PUBLISH.mkdir(parents=True, exist_ok=True)
+        for t in TABLES:
+            src = args.out_dir / f"{t}.csv"
+            if src.exists():
+                shutil.copy2(src, PUBLISH / src.name)
+        print(f"[ok] copied {len(TABLES)} table(s) to publish/")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # scripts/build_docs.py
 # Runtime: Python 3.12
-# Deps: pandas, matplotlib
+# Deps: pandas, matplotlib (via chart_pool.py)
 
 import io
 from pathlib import Path
@@ -9,13 +9,11 @@ import json
 import re
 import warnings
 
-# Headless backend for CI
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
 import pandas as pd
 
+from build_cache import BuildCache
+from chart_pool import ChartPool, ChartJob, VERSION as CHART_VERSION
+
 ROOT = Path(__file__).resolve().parents[1]
 PUBLISH_DIR = ROOT / "publish"
 DOCS = ROOT / "docs"
@@ -76,16 +74,11 @@ def _last_24_months(s: pd.Series) -> pd.Series:
     start = (last.to_period("M") - 23).to_timestamp()
     return s.loc[start:]
 
-def _save_plot(series: pd.Series, out_png: Path, title: str):
-    out_png.parent.mkdir(parents=True, exist_ok=True)
-    plt.figure(figsize=(8, 3))
-    series.plot()
-    plt.title(title)
-    plt.xlabel("Month")
-    plt.ylabel(series.name or "value")
-    plt.tight_layout()
-    plt.savefig(out_png)
-    plt.close()
+def _plot_job(series: pd.Series, out_png: Path, title: str) -> ChartJob:
+    # dirender belakangan oleh ChartPool (paralel, skip kalau data 24 bulan tidak berubah)
+    return ChartJob(out_png.stem, out_png, "line",
+                    {"x": series.index.to_numpy(), "series": [{"y": series.to_numpy(dtype=float)}]},
+                    {"title": title, "xlabel": "Month", "ylabel": series.name or "value", "date_x": True})
 
 def _markdown_table(df: pd.DataFrame, limit: int = 20) -> str:
     try:
@@ -99,7 +92,7 @@ def _write_schema(csv_path: Path, df: pd.DataFrame):
         json.dumps(schema, indent=2), encoding="utf-8"
     )
 
-def _write_markdown(csv_path: Path, df: pd.DataFrame, monthly: pd.Series, filtered: pd.Series):
+def _write_markdown(csv_path: Path, df: pd.DataFrame, monthly: pd.Series, filtered: pd.Series, has_plot: bool = False):
     md_path = DATASETS_DIR / f"{csv_path.stem}.md"
 
     # SELALU pakai link relatif dari folder datasets/
@@ -116,7 +109,7 @@ def _write_markdown(csv_path: Path, df: pd.DataFrame, monthly: pd.Series, filter
     out.write(f"# {csv_path.stem.replace('_',' ').title()}{period}\n\n")
     out.write(f"**Source CSV:** [{csv_path.name}]({rel_csv})\n\n")
 
-    if (PLOTS_DIR / f"{csv_path.stem}_timeseries.png").exists():
+    if has_plot or (PLOTS_DIR / f"{csv_path.stem}_timeseries.png").exists():
         out.write(f"![trend]({rel_png})\n\n")
 
     out.write("## Summary\n\n")
@@ -137,7 +130,7 @@ def _write_markdown(csv_path: Path, df: pd.DataFrame, monthly: pd.Series, filter
 
     md_path.write_text(out.getvalue(), encoding="utf-8")
 
-def _process_csv(csv_path: Path) -> None:
+def _process_csv(csv_path: Path, pool: ChartPool) -> bool:
     try:
         df = _read_csv(csv_path)
         _write_schema(csv_path, df)
@@ -146,6 +139,7 @@ def _process_csv(csv_path: Path) -> None:
 
         monthly = pd.Series(dtype=float)
         filtered = pd.Series(dtype=float)
+        has_plot = False
 
         if dt_col:
             if not pd.api.types.is_datetime64_any_dtype(df[dt_col]):
@@ -153,24 +147,50 @@ def _process_csv(csv_path: Path) -> None:
             monthly = _monthly_series(df, dt_col, num_cols)
             filtered = _last_24_months(monthly)
             if not filtered.empty:
-                _save_plot(filtered, PLOTS_DIR / f"{csv_path.stem}_timeseries.png", title=f"{csv_path.stem} – Monthly")
+                pool.submit(_plot_job(filtered, PLOTS_DIR / f"{csv_path.stem}_timeseries.png", title=f"{csv_path.stem} – Monthly"))
+                has_plot = True
             # Batasi preview tabel ke 24 bulan terakhir
             mx = df[dt_col].max()
             if pd.notnull(mx):
                 df = df[df[dt_col] >= (pd.Timestamp(mx) - pd.DateOffset(months=24))]
 
-        _write_markdown(csv_path, df, monthly, filtered)
+        _write_markdown(csv_path, df, monthly, filtered, has_plot)
         print(f"[OK] Built page for {csv_path.name}")
+        return True
     except Exception as e:
         print(f"[WARN] Skipping {csv_path.name}: {e}")
+        return False
+
+def _page_outputs(csv_path: Path) -> list:
+    """md + schema; plus PNG kalau halaman yang ada me-link trend chart (hilang → halaman & chart di-build ulang)."""
+    md = DATASETS_DIR / f"{csv_path.stem}.md"
+    outs = [md, SCHEMA_DIR / f"{csv_path.stem}.columns.json"]
+    png = PLOTS_DIR / f"{csv_path.stem}_timeseries.png"
+    if md.exists() and f"{png.name})" in md.read_text(encoding="utf-8"):
+        outs.append(png)
+    return outs
 
 def main() -> int:
     csvs = sorted(PUBLISH_DIR.glob("*.csv"))
     if not csvs:
         print("No CSVs found in publish/ — nothing to build.")
         return 0
+    cache = BuildCache(__file__)
+    pool = ChartPool(__file__)
+    extra = {"chart_pool": CHART_VERSION}
     for csv_path in csvs:
-        _process_csv(csv_path)
+        # page + schema (+ chart job) di-rebuild hanya kalau CSV/script/chart_pool berubah atau PNG hilang;
+        # chart job hanya ada kalau halaman di-rebuild, jadi PNG ikut jadi output entry page
+        key = f"page:{csv_path.stem}"
+        if cache.fresh(key, [csv_path], _page_outputs(csv_path), extra):
+            print(f"[cache] {key} up to date")
+            continue
+        if _process_csv(csv_path, pool):
+            cache.record(key, [csv_path], extra)
+        else:
+            cache.forget(key)
+    cache.save()
+    pool.run()
     return 0
 
 if __name__ == "__main__":
@@ -1,20 +1,19 @@
 #!/usr/bin/env python3
-import json, hashlib
+import json
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
+from publish_loader import read_publish
+from build_cache import md5sum
+import chart_spec as cs
+
 ROOT = Path(__file__).resolve().parents[1]
 PUB = ROOT / "publish"
 DOCS = ROOT / "docs"
 ASSETS = DOCS / "assets"
 ASSETS.mkdir(parents=True, exist_ok=True)
 
-def md5sum(p: Path) -> str:
-    h = hashlib.md5()
-    with open(p, "rb") as f:
-        for chunk in iter(lambda: f.read(1<<20), b""): h.update(chunk)
-    return h.hexdigest()
-
 def guess_lat_lon(df: pd.DataFrame):
     # cari berbagai varian nama kolom koordinat
     lat_cands = [
@@ -27,17 +26,68 @@ def guess_lat_lon(df: pd.DataFrame):
     lon = next((c for c in lon_cands if c in df.columns), None)
     return lat, lon
 
-def build_airports_geojson():
+# property yang dipakai peta (docs/case_studies/network_map.md)
+MAP_PROPS = ("iata", "airport_name", "city", "country", "deg_total")
+
+def _json_column(s: pd.Series) -> list:
+    """Encode satu kolom ke list token JSON (null untuk NA) tanpa loop per-cell di Python-level pandas."""
+    mask = s.isna().to_numpy()
+    if pd.api.types.is_bool_dtype(s):
+        tok = ["true" if v else "false" for v in s.fillna(False).to_numpy().tolist()]
+    elif pd.api.types.is_integer_dtype(s) or pd.api.types.is_float_dtype(s):
+        vals = s.astype(float if pd.api.types.is_float_dtype(s) else "Int64").to_numpy(dtype=object, na_value=None)
+        tok = json.dumps(vals.tolist())[1:-1].split(", ") if len(vals) else []
+    else:
+        enc = json.encoder.encode_basestring_ascii
+        tok = [enc(str(v)) for v in s.to_numpy(dtype=object).tolist()]
+    if mask.any():
+        tok = ["null" if m else t for t, m in zip(tok, mask)]
+    return tok
+
+def write_geojson_points(out: Path, lon, lat, props: pd.DataFrame, batch: int = 5000) -> int:
+    """
+    Streaming GeoJSON writer (FeatureCollection of Points).
+    Koordinat & property di-encode per kolom dari array NumPy, lalu feature ditulis
+    per batch ke file → tidak pernah menyimpan FeatureCollection utuh di memory.
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    n = len(lon)
+    keys = [json.dumps(str(k)) for k in props.columns]
+    tmp = out.with_suffix(out.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write('{"type": "FeatureCollection", "features": [')
+        for lo in range(0, n, batch):
+            hi = min(lo + batch, n)
+            xs = json.dumps(lon[lo:hi].tolist())[1:-1].split(", ")
+            ys = json.dumps(lat[lo:hi].tolist())[1:-1].split(", ")
+            cols = [_json_column(props[c].iloc[lo:hi]) for c in props.columns]
+            parts = []
+            for i in range(hi - lo):
+                body = ", ".join(f"{k}: {col[i]}" for k, col in zip(keys, cols))
+                parts.append(
+                    '{"type": "Feature", "geometry": {"type": "Point", "coordinates": ['
+                    + xs[i] + ", " + ys[i] + ']}, "properties": {' + body + "}}"
+                )
+            if lo:
+                f.write(", ")
+            f.write(", ".join(parts))
+        f.write("]}")
+    tmp.replace(out)
+    return n
+
+def build_airports_geojson(props=None, out_name: str = "airports.geojson"):
+    """props=None → semua kolom hasil merge; props=MAP_PROPS → property set ringkas untuk peta."""
     deg_csv = PUB / "airport_degree.csv"
     dim_alt = PUB / "dim_airport_clean.csv"
     if not deg_csv.exists():
         print("[map] airport_degree.csv not found → skip")
         return
-    deg = pd.read_csv(deg_csv)
+    deg = read_publish(deg_csv)
     if not dim_alt.exists():
         print("[map] dim_airport_clean.csv not found in publish → skip")
         return
-    d = pd.read_csv(dim_alt)
+    d = read_publish(dim_alt)
     for c in d.columns:
         if c.lower() == "iata":
             d = d.rename(columns={c:"iata"})
@@ -46,48 +96,25 @@ def build_airports_geojson():
         print("[map] lat/lon/iata not found → skip")
         return
     m = pd.merge(d, deg, on="iata", how="inner").dropna(subset=[lat, lon])
-    features = []
-    for _, r in m.iterrows():
-        try:
-            latv = float(r[lat]); lonv = float(r[lon])
-        except: 
-            continue
-        props = {k: (None if pd.isna(v) else v) for k,v in r.items()}
-        features.append({
-            "type":"Feature",
-            "geometry":{"type":"Point","coordinates":[lonv, latv]},
-            "properties":props
-        })
-    fc = {"type":"FeatureCollection", "features":features}
-    out = ASSETS / "airports.geojson"
-    out.write_text(json.dumps(fc), encoding="utf-8")
-    print(f"[map] wrote {out}")
+    latv = pd.to_numeric(m[lat], errors="coerce")
+    lonv = pd.to_numeric(m[lon], errors="coerce")
+    ok = (latv.notna() & lonv.notna()).to_numpy()
+    m = m[ok]
+    cols = [c for c in (props or m.columns) if c in m.columns]
+    out = ASSETS / out_name
+    n = write_geojson_points(out, lonv[ok].to_numpy(), latv[ok].to_numpy(), m[cols].reset_index(drop=True))
+    print(f"[map] wrote {out} ({n} features, {len(cols)} props)")
 
 def build_sankey_json():
     p = PUB / "top_od_pairs.csv"
     if not p.exists():
         print("[sankey] top_od_pairs.csv not found → skip")
         return
-    df = pd.read_csv(p).dropna()
-    df = df.sort_values("num_routes", ascending=False).head(30)
-    nodes = sorted(set(df["src_iata"].astype(str)) | set(df["dst_iata"].astype(str)))
-    index = {n:i for i,n in enumerate(nodes)}
-    links = {
-        "source":[index[s] for s in df["src_iata"].astype(str)],
-        "target":[index[t] for t in df["dst_iata"].astype(str)],
-        "value": df["num_routes"].astype(float).tolist()
-    }
-    fig = {
-      "data":[{
-        "type":"sankey",
-        "node":{"label":nodes,"pad":10,"thickness":10},
-        "link":links
-      }],
-      "layout":{"margin":{"l":10,"r":10,"t":20,"b":20}, "font":{"size":10}}
-    }
-    out = ASSETS / "route_flow_sankey.json"
-    out.write_text(json.dumps(fig), encoding="utf-8")
-    print(f"[sankey] wrote {out}")
+    df = read_publish(p).dropna()
+    # top-30 link via chart_spec (argpartition, tanpa sort seluruh tabel OD)
+    fig = cs.Figure("route_flow_sankey", [cs.sankey(df["src_iata"], df["dst_iata"], df["num_routes"], n=30)],
+                    {"margin": {"l": 10, "r": 10, "t": 20, "b": 20}, "font": {"size": 10}})
+    fig.write(ASSETS)
 
 def build_explorer_manifest_and_downloads():
     files = sorted((ROOT / "publish").glob("*.csv"))
@@ -95,7 +122,7 @@ def build_explorer_manifest_and_downloads():
     lines = ["# Downloads", "", "| File | Size (KB) | MD5 |", "|---|---:|---|"]
     for f in files:
         size = f.stat().st_size
-        md5 = __import__("hashlib").md5(f.read_bytes()).hexdigest()
+        md5 = md5sum(f)
         # preview columns (optional manifest)
         try:
             import pandas as pd
@@ -108,14 +135,20 @@ def build_explorer_manifest_and_downloads():
     (DOCS / "downloads.md").write_text("\n".join(lines) + "\n", encoding="utf-8")
     print("[explorer] wrote datasets.json and downloads.md")
 
-def main():
-    build_airports_geojson()
-    build_sankey_json()
-    build_explorer_manifest_and_downloads()
+PARTS = ("map", "sankey", "downloads")
 
-    build_airports_geojson()
-    build_sankey_json()
-    build_explorer_manifest_and_downloads()
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Build map GeoJSON / route-flow sankey / downloads page.")
+    ap.add_argument("parts", nargs="*", choices=PARTS, help="Subset to build (default: all)")
+    parts = set(ap.parse_args(argv).parts or PARTS)
+    if "map" in parts:
+        build_airports_geojson()
+        build_airports_geojson(props=MAP_PROPS, out_name="airports_map.geojson")
+    if "sankey" in parts:
+        build_sankey_json()
+    if "downloads" in parts:
+        build_explorer_manifest_and_downloads()
 
 if __name__ == "__main__":
     main()
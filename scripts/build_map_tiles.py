@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Quadtree tiles (slippy-map z/x/y) untuk peta bandara & rute.
+
+- Bandara (dim_airport_clean ⋈ airport_degree) dipotong per tile Web Mercator
+  z = 0..--max-zoom; di zoom < max, tiap tile hanya menyimpan Top-N bandara by deg_total
+- Rute (route_counts) jadi garis great-circle (slerp, vectorised) dan disimpan di tile
+  bandara asal dan tile bandara tujuan (front-end dedupe per src→dst); di zoom < max hanya rute
+  antar bandara yang lolos thinning, Top-N by num_routes per tile
+- index.json: zoom range, jumlah feature & bytes per tile → front-end cukup fetch tile
+  yang terlihat
+
+Output: docs/assets/tiles/{airports,routes}/{z}/{x}/{y}.geojson + docs/assets/tiles/index.json
+"""
+from __future__ import annotations
+import argparse, json, shutil
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from build_extras import ASSETS, PUB, MAP_PROPS, _json_column, guess_lat_lon, write_geojson_points
+from publish_loader import read_publish
+
+TILES = ASSETS / "tiles"
+MAX_LAT = 85.05112878
+
+def tile_xy(lon, lat, z: int):
+    """Lon/lat (derajat) → index tile Web Mercator di zoom z (vectorised)."""
+    n = 1 << z
+    lat = np.clip(np.asarray(lat, dtype=float), -MAX_LAT, MAX_LAT)
+    x = np.floor((np.asarray(lon, dtype=float) + 180.0) / 360.0 * n)
+    rad = np.radians(lat)
+    y = np.floor((1.0 - np.log(np.tan(rad) + 1.0 / np.cos(rad)) / np.pi) / 2.0 * n)
+    return np.clip(x, 0, n - 1).astype(np.int64), np.clip(y, 0, n - 1).astype(np.int64)
+
+def great_circle(lon1, lat1, lon2, lat2, n_points: int = 16):
+    """Titik great-circle untuk E rute sekaligus → array (E, n_points, 2) [lon, lat], lon di-unwrap."""
+    p1 = np.radians(np.column_stack([lat1, lon1]))
+    p2 = np.radians(np.column_stack([lat2, lon2]))
+
+    def xyz(p):
+        return np.column_stack([np.cos(p[:, 0]) * np.cos(p[:, 1]), np.cos(p[:, 0]) * np.sin(p[:, 1]), np.sin(p[:, 0])])
+
+    a, b = xyz(p1), xyz(p2)
+    omega = np.arccos(np.clip((a * b).sum(axis=1), -1.0, 1.0))[:, None, None]
+    t = np.linspace(0.0, 1.0, n_points)[None, :, None]
+    so = np.sin(omega)
+    safe = so > 1e-12
+    w1 = np.where(safe, np.sin((1 - t) * omega) / np.where(safe, so, 1.0), 1 - t)
+    w2 = np.where(safe, np.sin(t * omega) / np.where(safe, so, 1.0), t)
+    v = w1 * a[:, None, :] + w2 * b[:, None, :]
+    lat = np.degrees(np.arctan2(v[..., 2], np.hypot(v[..., 0], v[..., 1])))
+    lon = np.degrees(np.unwrap(np.arctan2(v[..., 1], v[..., 0]), axis=1))
+    return np.stack([lon, lat], axis=-1)
+
+def _rank_within(keys: np.ndarray, score: np.ndarray) -> np.ndarray:
+    """Rank (0 = terbesar) tiap baris di dalam grup `keys`."""
+    order = np.lexsort((-score, keys))
+    k_sorted = keys[order]
+    start = np.r_[0, np.flatnonzero(k_sorted[1:] != k_sorted[:-1]) + 1]
+    run = np.repeat(start, np.diff(np.r_[start, len(k_sorted)]))
+    rank = np.empty(len(keys), dtype=np.int64)
+    rank[order] = np.arange(len(keys)) - run
+    return rank
+
+def _groups(keys: np.ndarray, mask: np.ndarray):
+    """Yield (key, index baris) untuk baris yang lolos mask, satu argsort (bukan scan per tile)."""
+    idx = np.flatnonzero(mask)
+    idx = idx[np.argsort(keys[idx], kind="stable")]
+    k = keys[idx]
+    cuts = np.flatnonzero(k[1:] != k[:-1]) + 1
+    for part in np.split(idx, cuts):
+        if len(part):
+            yield int(keys[part[0]]), part
+
+def encode_lines(coords: np.ndarray, props: pd.DataFrame) -> list:
+    """Encode tiap rute sekali ke string Feature LineString; tile tinggal join subset-nya."""
+    geo = [json.dumps(c, separators=(",", ":")) for c in coords.tolist()]
+    keys = [json.dumps(str(k)) for k in props.columns]
+    cols = [_json_column(props[c]) for c in props.columns]
+    return [
+        '{"type":"Feature","geometry":{"type":"LineString","coordinates":' + g
+        + '},"properties":{' + ",".join(f"{k}:{col[i]}" for k, col in zip(keys, cols)) + "}}"
+        for i, g in enumerate(geo)
+    ]
+
+def write_features(out: Path, features: list) -> int:
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text('{"type":"FeatureCollection","features":[' + ",".join(features) + "]}", encoding="utf-8")
+    return len(features)
+
+def load_network():
+    deg_csv, dim_csv, rc_csv = PUB / "airport_degree.csv", PUB / "dim_airport_clean.csv", PUB / "route_counts.csv"
+    if not deg_csv.exists() or not dim_csv.exists():
+        print("[tiles] airport_degree/dim_airport_clean not found → skip")
+        return None, None
+    d = read_publish(dim_csv)
+    lat, lon = guess_lat_lon(d)
+    if not lat or not lon or "iata" not in d.columns:
+        print("[tiles] lat/lon/iata not found → skip")
+        return None, None
+    ap = pd.merge(d, read_publish(deg_csv), on="iata", how="inner")
+    ap["lat"] = pd.to_numeric(ap[lat], errors="coerce")
+    ap["lon"] = pd.to_numeric(ap[lon], errors="coerce")
+    ap = ap.dropna(subset=["lat", "lon"]).drop_duplicates("iata").reset_index(drop=True)
+
+    routes = None
+    if rc_csv.exists():
+        rc = read_publish(rc_csv)[["src_iata", "dst_iata", "num_routes"]].dropna()
+        idx = pd.Index(ap["iata"])
+        rc["s"] = idx.get_indexer(rc["src_iata"])
+        rc["d"] = idx.get_indexer(rc["dst_iata"])
+        routes = rc[(rc["s"] >= 0) & (rc["d"] >= 0)].reset_index(drop=True)
+    return ap, routes
+
+def build_tiles(max_zoom: int = 6, airports_per_tile: int = 50, routes_per_tile: int = 200,
+                gc_points: int = 16, out_dir: Path = TILES):
+    ap, routes = load_network()
+    if ap is None:
+        return False
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    props = ap[[c for c in MAP_PROPS if c in ap.columns]]
+    lon, lat = ap["lon"].to_numpy().round(5), ap["lat"].to_numpy().round(5)
+    score = ap["deg_total"].fillna(0).to_numpy(dtype=float) if "deg_total" in ap.columns else np.zeros(len(ap))
+
+    lines = None
+    if routes is not None and len(routes):
+        s, d = routes["s"].to_numpy(), routes["d"].to_numpy()
+        lines = np.round(great_circle(lon[s], lat[s], lon[d], lat[d], gc_points), 3)
+        lines = encode_lines(lines, routes[["src_iata", "dst_iata", "num_routes"]])
+
+    index = {"max_zoom": max_zoom, "layers": {"airports": {}, "routes": {}}}
+    for z in range(max_zoom + 1):
+        x, y = tile_xy(lon, lat, z)
+        key = x * (1 << z) + y
+        keep = np.ones(len(ap), dtype=bool) if z == max_zoom else _rank_within(key, score) < airports_per_tile
+        for t, sel in _groups(key, keep):
+            tx, ty = int(t // (1 << z)), int(t % (1 << z))
+            out = out_dir / "airports" / str(z) / str(tx) / f"{ty}.geojson"
+            out.parent.mkdir(parents=True, exist_ok=True)
+            n = write_geojson_points(out, lon[sel], lat[sel], props.iloc[sel])
+            index["layers"]["airports"][f"{z}/{tx}/{ty}"] = {"n": n, "bytes": out.stat().st_size}
+
+        if lines is None:
+            continue
+        s, d = routes["s"].to_numpy(), routes["d"].to_numpy()
+        # rute masuk tile asal DAN tile tujuan (kalau beda) → tetap tergambar walau asal di luar viewport;
+        # front-end dedupe per src→dst
+        cross = key[d] != key[s]
+        rid = np.r_[np.arange(len(routes)), np.flatnonzero(cross)]
+        rkey = np.r_[key[s], key[d][cross]]
+        rkeep = (keep[s] & keep[d])[rid]
+        w = routes["num_routes"].to_numpy(dtype=float)[rid]
+        if z < max_zoom:
+            rkeep &= _rank_within(np.where(rkeep, rkey, -1), np.where(rkeep, w, -1)) < routes_per_tile
+        for t, sel in _groups(rkey, rkeep):
+            tx, ty = int(t // (1 << z)), int(t % (1 << z))
+            out = out_dir / "routes" / str(z) / str(tx) / f"{ty}.geojson"
+            n = write_features(out, [lines[i] for i in rid[sel]])
+            index["layers"]["routes"][f"{z}/{tx}/{ty}"] = {"n": n, "bytes": out.stat().st_size}
+
+    (out_dir / "index.json").write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    n_tiles = sum(len(v) for v in index["layers"].values())
+    total = sum(t["bytes"] for v in index["layers"].values() for t in v.values())
+    print(f"[tiles] wrote {n_tiles} tiles (z0..{max_zoom}, {total/1024:.0f} KB) → {out_dir}")
+    return True
+
+def main():
+    ap = argparse.ArgumentParser(description="Cut airports/routes into z/x/y GeoJSON tiles.")
+    ap.add_argument("--max-zoom", type=int, default=6)
+    ap.add_argument("--airports-per-tile", type=int, default=50, help="Thinning (zoom < max) by deg_total")
+    ap.add_argument("--routes-per-tile", type=int, default=200, help="Thinning (zoom < max) by num_routes")
+    ap.add_argument("--gc-points", type=int, default=16, help="Titik per garis great-circle")
+    args = ap.parse_args()
+    build_tiles(args.max_zoom, args.airports_per_tile, args.routes_per_tile, args.gc_points)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
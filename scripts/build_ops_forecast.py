@@ -1,61 +1,267 @@
 #!/usr/bin/env python3
+"""
+Forecast ops (trend linear × indeks musiman bulanan) — batch multi-series dalam satu pass NumPy.
+
+- Input long format (key, bulan, nilai); tanpa kolom key → satu series "all"
+- Indeks musiman = rata-rata per (key, bulan-dalam-tahun) via bincount; bulan kosong → rata-rata key
+- Trend di-fit pada series ter-deseasonalise; normal equation (K, 2, 2) di-solve batch (pinv)
+- Prediction interval OLS: se² = s²·(1 + 1/n + (t − t̄)² / Sxx), dikali indeks musiman
+- Anomali per key dari anomaly_stream (hanya bulan baru yang di-skor; state di .build_cache/anomaly/)
+- Output:
+    docs/assets/ops_forecast.json          series EUR (euro_atfm_timeseries) untuk halaman ops
+    docs/assets/ops_forecast_series.json   satu payload ringkas per key, per tabel sumber
+
+Env: PUBLISH_DIR, OUTPUT_JSON, SERIES_JSON, FORECAST_H (default 6), FORECAST_LEVEL (default 0.95)
+
+Contoh:
+  python scripts/build_ops_forecast.py
+  python scripts/build_ops_forecast.py --source data/derived/weather/weather_monthly.csv:icao:ifr_hours
+"""
 from __future__ import annotations
-import os, json
+import os, json, argparse
 from pathlib import Path
 from datetime import datetime, timezone
+from statistics import NormalDist
 import pandas as pd
 import numpy as np
 
+from publish_loader import read_publish
+from build_cache import BuildCache
+from anomaly_stream import AnomalyStream
+
 PUBLISH_DIR = Path(os.environ.get("PUBLISH_DIR","publish"))
 OUTPUT_JSON = Path(os.environ.get("OUTPUT_JSON","docs/assets/ops_forecast.json"))
+SERIES_JSON = Path(os.environ.get("SERIES_JSON","docs/assets/ops_forecast_series.json"))
+H = int(os.environ.get("FORECAST_H","6"))
+LEVEL = float(os.environ.get("FORECAST_LEVEL","0.95"))
+MIN_LEN = 8
+# anomali: robust z terhadap median/MAD 12 bulan sebelumnya (state incremental, anomaly_stream.py)
+ANOM_WIN, ANOM_K = 12, 2.5
+# tabel keyed di PUBLISH_DIR yang ikut di-forecast batch (tanpa kolom waktu → di-skip)
+SOURCES = ("euro_atfm_timeseries", "euro_atfm_by_location")
 
-def write_payload(payload):
-    OUTPUT_JSON.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_JSON.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-    print(f"Wrote {OUTPUT_JSON} (status={payload.get('status')})")
+def write_payload(payload, path=None):
+    path = Path(path or OUTPUT_JSON)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"Wrote {path} (status={payload.get('status')})")
 
-def main():
+def detect_columns(df: pd.DataFrame, key: str | None = None, value: str | None = None):
+    """(key_col | None, date_col | None, value_col | None) dari nama/dtype kolom; value eksplisit menang."""
+    date_col = next((c for c in df.columns if 'period' in c.lower() or 'date' in c.lower() or 'month' in c.lower()), None)
+    num_col = value or next((c for c in df.columns if c not in (date_col, key) and pd.api.types.is_numeric_dtype(df[c])), None)
+    if key is None:
+        key = next((c for c in df.columns if c not in (date_col, num_col) and not pd.api.types.is_numeric_dtype(df[c])), None)
+    return key, date_col, num_col
+
+def to_long(df: pd.DataFrame, key_col, date_col, value_col) -> pd.DataFrame:
+    """→ kolom key, m (bulan sejak 1970-01), y; duplikat (key, bulan) dijumlah, urut (key, m)."""
+    d = pd.DataFrame({
+        "key": df[key_col].astype(str) if key_col else "all",
+        "m": pd.to_datetime(df[date_col], errors="coerce").to_numpy().astype("datetime64[M]"),
+        "y": pd.to_numeric(df[value_col], errors="coerce"),
+    }).dropna()
+    d["m"] = d["m"].to_numpy().astype("datetime64[M]").astype(np.int64)
+    return d.groupby(["key", "m"], as_index=False, sort=True)["y"].sum()
+
+def fit_batch(codes: np.ndarray, m: np.ndarray, y: np.ndarray, n_keys: int) -> dict:
+    """
+    Fit semua series sekaligus. codes/m/y sudah urut (code, m).
+    Return array per key: m0, m_last, n, si (K, 12), beta (K, 2), s2, tbar, sxx, n_fit.
+    """
+    K = n_keys
+    n = np.bincount(codes, minlength=K)
+    starts = np.r_[0, np.cumsum(n)[:-1]]
+    has = n > 0
+    m0 = np.zeros(K, dtype=np.int64); m_last = np.zeros(K, dtype=np.int64)
+    m0[has] = m[starts[has]]
+    m_last[has] = m[starts[has] + n[has] - 1]
+    t = (m - m0[codes]).astype(float)
+    moy = m % 12
+
+    cell = codes * 12 + moy
+    cnt = np.bincount(cell, minlength=K * 12).reshape(K, 12)
+    tot = np.bincount(cell, weights=y, minlength=K * 12).reshape(K, 12)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        si = tot / cnt
+        key_mean = np.nanmean(np.where(cnt > 0, si, np.nan), axis=1) if K else np.zeros(0)
+        si = np.where(cnt > 0, si, key_mean[:, None])
+        yds = y / si[codes, moy]
+    w = np.isfinite(yds).astype(float)
+    yds = np.where(w > 0, yds, 0.0)
+
+    s0 = np.bincount(codes, weights=w, minlength=K)
+    st = np.bincount(codes, weights=w * t, minlength=K)
+    stt = np.bincount(codes, weights=w * t * t, minlength=K)
+    sy = np.bincount(codes, weights=w * yds, minlength=K)
+    sty = np.bincount(codes, weights=w * t * yds, minlength=K)
+    xtx = np.stack([np.stack([s0, st], -1), np.stack([st, stt], -1)], -2)
+    xty = np.stack([sy, sty], -1)
+    beta = (np.linalg.pinv(xtx) @ xty[..., None])[..., 0]
+
+    r = yds - (beta[codes, 0] + beta[codes, 1] * t)
+    s2 = np.bincount(codes, weights=w * r * r, minlength=K) / np.maximum(s0 - 2, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tbar = st / s0
+    sxx = stt - s0 * np.nan_to_num(tbar) ** 2
+    return {"m0": m0, "m_last": m_last, "n": n, "si": si, "beta": beta, "s2": s2,
+            "tbar": tbar, "sxx": sxx, "n_fit": s0}
+
+def fitted_values(fit: dict, codes: np.ndarray, m: np.ndarray) -> np.ndarray:
+    t = (m - fit["m0"][codes]).astype(float)
+    b = fit["beta"][codes]
+    return (b[:, 0] + b[:, 1] * t) * fit["si"][codes, m % 12]
+
+def predict_batch(fit: dict, h: int = H, level: float = LEVEL):
+    """(months (K, h), yhat, lo, hi) — interval OLS pada skala deseasonalise, lalu × indeks musiman."""
+    K = len(fit["n"])
+    steps = np.arange(1, h + 1)
+    mf = fit["m_last"][:, None] + steps[None, :]
+    tf = (mf - fit["m0"][:, None]).astype(float)
+    trend = fit["beta"][:, :1] + fit["beta"][:, 1:] * tf
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lever = np.where(fit["sxx"][:, None] > 0, (tf - fit["tbar"][:, None]) ** 2 / fit["sxx"][:, None], 0.0)
+        se = np.sqrt(fit["s2"][:, None] * (1 + 1 / fit["n_fit"][:, None] + lever))
+    si_f = fit["si"][np.arange(K)[:, None], mf % 12]
+    yhat = np.clip(trend * si_f, 0, None)
+    lo = np.clip((trend - z * se) * si_f, 0, None)
+    hi = np.clip((trend + z * se) * si_f, 0, None)
+    return mf, yhat, lo, hi
+
+def forecast_frame(long: pd.DataFrame, h: int = H, level: float = LEVEL):
+    """long (key, m, y) → (keys, codes, fit, prediksi) untuk semua key dalam satu pass."""
+    codes, keys = pd.factorize(long["key"], sort=True)
+    m, y = long["m"].to_numpy(), long["y"].to_numpy(dtype=float)
+    fit = fit_batch(codes, m, y, len(keys))
+    return keys, codes, fit, predict_batch(fit, h, level)
+
+def _ms(months) -> np.ndarray:
+    return np.asarray(months, dtype=np.int64).astype("datetime64[M]").astype("datetime64[ms]").astype(np.int64)
+
+def _ym(month: int) -> str:
+    return str(np.int64(month).astype("datetime64[M]"))
+
+def _anomalies(stream: AnomalyStream, key: str, m: np.ndarray, y: np.ndarray) -> list:
+    stream.update(key, _ms(m), y)
+    return [{"t": a["t"], "y": a["y"], "z": a["z"], **({"flat": True} if a.get("flat") else {})}
+            for a in stream.anomalies(key)]
+
+def series_payloads(long: pd.DataFrame, h: int = H, level: float = LEVEL, stream: AnomalyStream | None = None) -> dict:
+    """Satu payload ringkas per key (bulanan; waktu cukup start/end, array nilai)."""
+    keys, codes, fit, (mf, yhat, lo, hi) = forecast_frame(long, h, level)
+    m, y = long["m"].to_numpy(), long["y"].to_numpy(dtype=float)
+    bounds = np.r_[0, np.cumsum(fit["n"])]
+    out = {}
+    for i, k in enumerate(keys):
+        if fit["n"][i] < MIN_LEN:
+            out[k] = {"status": "too_short", "n": int(fit["n"][i])}
+            continue
+        out[k] = {
+            "status": "ok", "n": int(fit["n"][i]),
+            "start": _ym(fit["m0"][i]), "end": _ym(fit["m_last"][i]),
+            "beta": np.round(fit["beta"][i], 6).tolist(),
+            "sigma": round(float(np.sqrt(fit["s2"][i])), 6),
+            "seasonality": np.round(fit["si"][i], 4).tolist(),
+            "forecast": {"start": _ym(mf[i, 0]), "y": np.round(yhat[i], 3).tolist(),
+                         "lo": np.round(lo[i], 3).tolist(), "hi": np.round(hi[i], 3).tolist()},
+        }
+        if stream is not None:
+            sl = slice(bounds[i], bounds[i + 1])
+            out[k]["anomalies"] = _anomalies(stream, k, m[sl], y[sl])
+    return out
+
+def build():
     now = datetime.now(timezone.utc).isoformat()
+    empty = {"generated_at":now,"series":[],"fitted":[],"forecast":[],"anomalies":[],"seasonality":[]}
     try:
         src = PUBLISH_DIR/"euro_atfm_timeseries.csv"
         if not src.exists():
-            write_payload({"status":"no_input","generated_at":now,"series":[],"fitted":[],"forecast":[],"anomalies":[],"seasonality":[]})
+            write_payload({"status":"no_input", **empty})
             return 0
-        df = pd.read_csv(src)
-        date_col = next((c for c in df.columns if 'period' in c.lower() or 'date' in c.lower()), df.columns[0])
-        num_col = next((c for c in df.columns if c != date_col and pd.api.types.is_numeric_dtype(df[c])), None)
+        df = read_publish(src)
+        _, date_col, num_col = detect_columns(df, key="")
+        date_col = date_col or df.columns[0]
         if num_col is None:
-            write_payload({"status":"no_numeric","generated_at":now,"series":[],"fitted":[],"forecast":[],"anomalies":[],"seasonality":[]})
+            write_payload({"status":"no_numeric", **empty})
             return 0
-        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-        s = pd.Series(df[num_col].values, index=pd.DatetimeIndex(df[date_col])).sort_index().dropna()
-        if len(s) < 8:
-            write_payload({"status":"too_short","generated_at":now,"series":[],"fitted":[],"forecast":[],"anomalies":[],"seasonality":[]})
+        long = to_long(df, None, date_col, num_col)
+        if len(long) < MIN_LEN:
+            write_payload({"status":"too_short", **empty})
             return 0
-        by_m = s.groupby(s.index.month).mean()
-        si = s.index.to_series().apply(lambda t: by_m.get(t.month, by_m.mean()))
-        t = np.arange(len(s), dtype=float)
-        y_ds = (s/si).replace([np.inf,-np.inf], np.nan).bfill().ffill()
-        X = np.column_stack([np.ones_like(t), t])
-        beta, *_ = np.linalg.lstsq(X, y_ds.to_numpy(), rcond=None)
-        trend = pd.Series(beta[0]+beta[1]*t, index=s.index)
-        fitted = trend*si
-        h = 6
-        fut_idx = pd.date_range(s.index[-1]+pd.offsets.MonthBegin(), periods=h, freq="MS")
-        fut_trend = pd.Series(beta[0]+beta[1]*np.arange(len(s), len(s)+h, dtype=float), index=fut_idx)
-        fut_si = fut_idx.to_series().apply(lambda x: by_m.get(x.month, by_m.mean()))
-        forecast = (fut_trend*fut_si).clip(lower=0)
-        def pairs(a): return [{"t": int(pd.Timestamp(i).timestamp()*1000), "y": float(v)} for i,v in a.dropna().items()]
+        _, codes, fit, (mf, yhat, lo, hi) = forecast_frame(long)
+        m, y = long["m"].to_numpy(), long["y"].to_numpy(dtype=float)
+        fitted = fitted_values(fit, codes, m)
+        stream = AnomalyStream("ops_forecast", win=ANOM_WIN, k=ANOM_K)
+        anomalies = _anomalies(stream, "all", m, y)
+        stream.save()
+        def pairs(ts, ys): return [{"t": int(a), "y": float(b)} for a, b in zip(_ms(ts), ys) if np.isfinite(b)]
+        forecast = [{"t": int(a), "y": float(b), "lo": float(c), "hi": float(d)}
+                    for a, b, c, d in zip(_ms(mf[0]), yhat[0], lo[0], hi[0])]
         payload = {
             "status":"ok","generated_at":now,
-            "series":pairs(s),"fitted":pairs(fitted),"forecast":pairs(forecast),
-            "anomalies":[], "seasonality":[{"m":int(i),"si":float(v)} for i,v in by_m.items()]
+            "series":pairs(m, y),"fitted":pairs(m, fitted),"forecast":forecast,
+            "interval":{"level":LEVEL,"sigma":float(np.sqrt(fit["s2"][0]))},
+            "anomalies":anomalies, "seasonality":[{"m":i+1,"si":float(v)} for i,v in enumerate(fit["si"][0])]
         }
         write_payload(payload)
         return 0
     except Exception as e:
-        write_payload({"status":"error","generated_at":now,"error":str(e),"series":[],"fitted":[],"forecast":[],"anomalies":[],"seasonality":[]})
+        write_payload({"status":"error","error":str(e), **empty})
         return 0
 
+def build_series(sources: list) -> int:
+    """sources: [(name, path, key_col | None, value_col | None)] → SERIES_JSON {sources: {name: {series: {key: payload}}}}."""
+    now = datetime.now(timezone.utc).isoformat()
+    out = {}
+    for name, path, key, value in sources:
+        if not path.exists():
+            continue
+        # parquet mirror hanya untuk tabel publish; --source di luar PUBLISH_DIR dibaca tanpa menulis mirror
+        in_publish = path.resolve().parent == PUBLISH_DIR.resolve()
+        df = read_publish(path, mirror=in_publish) if path.suffix == ".csv" else pd.read_csv(path)
+        missing = [c for c in (key, value) if c and c not in df.columns]
+        if missing:
+            print(f"[skip] {name}: column(s) not found: {', '.join(missing)}")
+            continue
+        key_col, date_col, num_col = detect_columns(df, key, value)
+        if date_col is None or num_col is None:
+            print(f"[skip] {name}: no {'time' if date_col is None else 'numeric'} column to forecast")
+            continue
+        long = to_long(df, key_col, date_col, num_col)
+        stream = AnomalyStream(f"ops_forecast_series.{name}", win=ANOM_WIN, k=ANOM_K)
+        series = series_payloads(long, stream=stream)
+        stream.save()
+        ok = sum(1 for p in series.values() if p["status"] == "ok")
+        out[name] = {"key": key_col, "date": date_col, "value": num_col, "keys": len(series), "series": series}
+        print(f"[ok] {name}: {ok}/{len(series)} series forecast (h={H})")
+    SERIES_JSON.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"status": "ok" if out else "no_input", "generated_at": now, "h": H, "level": LEVEL,
+               "freq": "MS", "sources": out}
+    SERIES_JSON.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+    print(f"Wrote {SERIES_JSON} ({len(out)} source(s))")
+    return 0
+
+def _parse_source(spec: str):
+    """PATH[:KEY[:VALUE]] → (name, path, key | None, value | None); VALUE kosong → kolom numerik pertama."""
+    path, _, rest = spec.partition(":")
+    key, _, value = rest.partition(":")
+    return Path(path).stem, Path(path), key or None, value or None
+
+def main():
+    ap = argparse.ArgumentParser(description="Seasonal-trend ops forecast, batched over keyed series.")
+    ap.add_argument("--source", action="append", default=[], metavar="PATH[:KEY[:VALUE]]",
+                    help="Tabel keyed tambahan (long format: key, bulan, nilai); VALUE = kolom yang di-forecast")
+    args = ap.parse_args()
+
+    cache = BuildCache(__file__)
+    cache.run("ops_forecast", build, [PUBLISH_DIR/"euro_atfm_timeseries.csv"], [OUTPUT_JSON],
+              extra={"output": str(OUTPUT_JSON), "h": H, "level": LEVEL})
+    sources = [(n, PUBLISH_DIR/f"{n}.csv", None, None) for n in SOURCES] + [_parse_source(s) for s in args.source]
+    cache.run("ops_forecast_series", lambda: build_series(sources), [p for _, p, _, _ in sources], [SERIES_JSON],
+              extra={"output": str(SERIES_JSON), "h": H, "level": LEVEL,
+                     "sources": [[n, k, v] for n, _, k, v in sources]})
+    return 0
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Enrichment jarak rute: route_counts ⋈ koordinat dim_airport_clean → haversine (satu pass NumPy).
+
+Output (data/derived/, --publish → copy ke publish/):
+  - route_distances        src_iata, dst_iata, num_routes, distance_km, distance_band,
+                           seats_proxy, ask_proxy (seats_proxy × km; kosong kalau equipment tidak diketahui)
+  - airport_stage_length   per bandara asal: routes_out, avg_stage_km (bobot num_routes),
+                           median_stage_km, max_stage_km, share_long_haul
+
+Equipment diambil dari data/openflights/routes.dat kalau ada (get_data.sh); kode pesawat
+IATA dipetakan ke kursi tipikal via SEATS. Tanpa file raw, kolom kapasitas dibiarkan kosong.
+Join pakai hash index (get_indexer), bukan merge, supaya tetap murah di jutaan baris.
+Incremental by md5 input + script (build_cache.py).
+
+Contoh:
+  python scripts/build_route_distances.py --publish
+"""
+from __future__ import annotations
+import argparse, shutil
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from route_graph import haversine_km
+from publish_loader import read_publish
+from build_cache import BuildCache
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLISH = ROOT / "publish"
+DERIVED = ROOT / "data" / "derived"
+RAW_ROUTES = ROOT / "data" / "openflights" / "routes.dat"
+TABLES = ("route_distances", "airport_stage_length")
+
+# batas band (km) → label
+BAND_EDGES = (1500.0, 4000.0, 8000.0)
+BAND_LABELS = ("short", "medium", "long", "ultra_long")
+
+# kursi tipikal per kode equipment IATA (konfigurasi 2-kelas umum; proxy, bukan data operator)
+SEATS = {
+    "319": 134, "320": 165, "321": 199, "32A": 165, "32B": 199, "32N": 180, "32Q": 220, "318": 110,
+    "332": 277, "333": 300, "339": 287, "359": 315, "351": 350, "388": 525, "380": 525,
+    "733": 132, "734": 150, "735": 115, "736": 110, "737": 140, "738": 175, "739": 185, "7M8": 178, "7M9": 193,
+    "752": 200, "753": 240, "762": 216, "763": 250, "764": 245, "744": 416, "748": 410,
+    "772": 314, "773": 368, "77L": 317, "77W": 365, "788": 242, "789": 290, "781": 330,
+    "E70": 72, "E75": 80, "E90": 100, "E95": 116, "ER3": 37, "ER4": 50, "ERJ": 50,
+    "CR2": 50, "CRJ": 50, "CR7": 70, "CR9": 86, "CRK": 90,
+    "AT4": 48, "AT5": 48, "AT7": 70, "ATR": 70, "DH8": 50, "DH4": 76, "DHT": 19, "SF3": 34, "BEH": 19,
+    "100": 100, "717": 117, "M88": 150, "M90": 155, "146": 100, "AR8": 100, "SU9": 98, "CS3": 145, "CS1": 115,
+}
+
+def distance_band(km: np.ndarray) -> np.ndarray:
+    labels = np.array(BAND_LABELS + ("",), dtype=object)
+    pos = np.searchsorted(np.asarray(BAND_EDGES), km, side="right")
+    return labels[np.where(np.isfinite(km), pos, len(BAND_LABELS))]
+
+def seats_by_od(raw_routes: Path) -> pd.Series:
+    """Σ kursi tipikal per (src, dst) dari varian rute routes.dat (rata-rata equipment per baris)."""
+    r = pd.read_csv(raw_routes, header=None, na_values="\\N", keep_default_na=False, dtype=str,
+                    usecols=[2, 4, 8], names=["src_iata", "dst_iata", "equipment"])
+    r = r[(r["src_iata"].str.len() == 3) & (r["dst_iata"].str.len() == 3)].reset_index(drop=True)
+    tok = r["equipment"].fillna("").str.split().explode()
+    seats = tok.map(SEATS).astype(float)
+    per_row = seats.groupby(level=0).mean()
+    r["seats"] = per_row.reindex(r.index)
+    return r.groupby(["src_iata", "dst_iata"])["seats"].sum(min_count=1)
+
+def enrich(rc: pd.DataFrame, dim: pd.DataFrame, seats: pd.Series | None = None) -> pd.DataFrame:
+    dim = dim.drop_duplicates("iata")
+    idx = pd.Index(dim["iata"].astype(str))
+    lat = pd.to_numeric(dim["lat"], errors="coerce").to_numpy()
+    lon = pd.to_numeric(dim["lon"], errors="coerce").to_numpy()
+    si = idx.get_indexer(rc["src_iata"].astype(str))
+    di = idx.get_indexer(rc["dst_iata"].astype(str))
+    ok = (si >= 0) & (di >= 0)
+    km = np.full(len(rc), np.nan)
+    km[ok] = haversine_km(lat[si[ok]], lon[si[ok]], lat[di[ok]], lon[di[ok]])
+
+    out = rc[["src_iata", "dst_iata", "num_routes"]].copy()
+    out["distance_km"] = np.round(km, 1)
+    out["distance_band"] = distance_band(km)
+    if seats is not None and len(seats):
+        key = pd.MultiIndex.from_frame(out[["src_iata", "dst_iata"]])
+        s = seats.reindex(key).to_numpy()
+    else:
+        s = np.full(len(out), np.nan)
+    out["seats_proxy"] = np.round(s, 0)
+    out["ask_proxy"] = np.round(s * km, 0)
+    return out
+
+def stage_length(rd: pd.DataFrame) -> pd.DataFrame:
+    d = rd.dropna(subset=["distance_km"])
+    w = d["num_routes"].astype(float)
+    g = d.assign(_wkm=d["distance_km"] * w, _w=w,
+                 _long=(d["distance_km"] >= BAND_EDGES[1]).astype(float)).groupby("src_iata", sort=True)
+    agg = g.agg(routes_out=("dst_iata", "size"), _wkm=("_wkm", "sum"), _w=("_w", "sum"),
+                median_stage_km=("distance_km", "median"), max_stage_km=("distance_km", "max"),
+                share_long_haul=("_long", "mean"))
+    agg["avg_stage_km"] = np.where(agg["_w"] > 0, agg["_wkm"] / agg["_w"], np.nan)
+    agg = agg.reset_index().rename(columns={"src_iata": "iata"})
+    agg = agg[["iata", "routes_out", "avg_stage_km", "median_stage_km", "max_stage_km", "share_long_haul"]]
+    return agg.round({"avg_stage_km": 1, "median_stage_km": 1, "max_stage_km": 1, "share_long_haul": 3})
+
+def build(publish_dir: Path = PUBLISH, out_dir: Path = DERIVED, raw_routes: Path = RAW_ROUTES) -> bool:
+    needed = [publish_dir / "route_counts.csv", publish_dir / "dim_airport_clean.csv"]
+    missing = [p.name for p in needed if not p.exists()]
+    if missing:
+        print(f"[skip] route distances: missing {missing}")
+        return False
+    seats = seats_by_od(raw_routes) if raw_routes.exists() else None
+    if seats is None:
+        print(f"[route_distances] {raw_routes.name} not found → seats/ask proxy left empty")
+    rd = enrich(read_publish(needed[0]), read_publish(needed[1]), seats)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rd.to_csv(out_dir / "route_distances.csv", index=False)
+    st = stage_length(rd)
+    st.to_csv(out_dir / "airport_stage_length.csv", index=False)
+    print(f"[ok] route_distances: {len(rd)} rows ({rd['distance_km'].notna().sum()} with distance, "
+          f"{rd['ask_proxy'].notna().sum()} with ask proxy)")
+    print(f"[ok] airport_stage_length: {len(st)} rows")
+    return True
+
+def main():
+    ap = argparse.ArgumentParser(description="Great-circle distance enrichment for route_counts.")
+    ap.add_argument("--publish-dir", type=Path, default=PUBLISH, help="Sumber route_counts & dim_airport_clean")
+    ap.add_argument("--out-dir", type=Path, default=DERIVED)
+    ap.add_argument("--raw-routes", type=Path, default=RAW_ROUTES, help="OpenFlights routes.dat (equipment)")
+    ap.add_argument("--publish", action="store_true", help="Copy CSV hasil ke publish/")
+    args = ap.parse_args()
+
+    inputs = [args.publish_dir / "route_counts.csv", args.publish_dir / "dim_airport_clean.csv",
+              Path(__file__).resolve().parent / "route_graph.py"]
+    if args.raw_routes.exists():
+        inputs.append(args.raw_routes)
+    cache = BuildCache(__file__)
+    cache.run("route_distances", lambda: build(args.publish_dir, args.out_dir, args.raw_routes), inputs,
+              [args.out_dir / f"{t}.csv" for t in TABLES],
+              extra={"raw_routes": args.raw_routes.exists(), "out": str(args.out_dir)})
+
+    if args.publish:
+        PUBLISH.mkdir(parents=True, exist_ok=True)
+        for t in TABLES:
+            src = args.out_dir / f"{t}.csv"
+            if src.exists():
+                shutil.copy2(src, PUBLISH / src.name)
+        print(f"[ok] copied {len(TABLES)} table(s) to publish/")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
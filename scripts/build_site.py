@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Satu entry point untuk build docs/site.
+
+- Stage + dependensi dideklarasikan di STAGES (DAG)
+- Stage yang independen jalan paralel di process pool; worker sudah import
+  pandas/numpy/matplotlib sekali, lalu tiap script dieksekusi via runpy
+  (tidak bayar ulang interpreter + import seperti `python scripts/...` per step)
+- Waktu per stage dicetak & ditulis ke .build_cache/build_timings.json
+
+Contoh:
+  python scripts/build_site.py                 # semua stage, jobs = CPU
+  python scripts/build_site.py --jobs 1        # serial, in-process
+  python scripts/build_site.py --only viz hub_rank
+  python scripts/build_site.py --skip quality dictionary
+"""
+from __future__ import annotations
+import os, sys, json, time, argparse, runpy, traceback
+from pathlib import Path
+from datetime import datetime, timezone
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+TIMINGS = ROOT / ".build_cache" / "build_timings.json"
+
+# name -> (commands, deps, allow_fail); command = [script, *argv]
+STAGES = {
+    "prepare": ([
+        ["create_missing_assets.py"],
+        ["repair_mkdocs_yaml.py"],
+        ["ensure_mkdocs_extra_js.py"],
+        ["normalize_docs_links.py"],
+        ["create_missing_assets.py"],
+    ], [], False),
+    "dataset_index": ([["build_datasets_index.py"], ["fix_datasets_json_paths.py"]], ["prepare"], False),
+    "docs_pages": ([["build_docs.py"]], ["prepare"], False),
+    "viz": ([["build_viz_advanced.py"]], ["prepare"], False),
+    "scenario": ([["build_adv_assets.py", "scenario"]], ["prepare"], False),
+    "hub_rank": ([["build_adv_assets.py", "hub_rank"], ["ensure_hub_rank_assets.py"]], ["prepare"], False),
+    # last24 dulu: index.json dari static_api hanya me-list file yang sudah ada
+    "api": ([["build_api_last24.py"], ["build_adv_assets.py", "static_api"], ["build_api_shards.py"]], ["prepare"], True),
+    "od_index": ([["od_index.py", "--build"]], [], True),
+    "map_tiles": ([["build_map_tiles.py"]], ["prepare"], True),
+    # datasets.json/downloads ditulis stage dataset_index → di sini hanya peta & sankey
+    "extras": ([["build_extras.py", "map", "sankey"]], ["prepare"], True),
+    "forecast": ([["build_ops_forecast.py"]], ["prepare"], True),
+    "quality": ([["check_data_quality.py", "--jobs", "1"]], [], False),
+    "warehouse": ([["sync_warehouse.py"]], [], True),
+    "dictionary": ([["make_data_dictionary.py", "--csv-dir", "publish", "--out", "docs/data_dictionary.md"]], [], False),
+}
+
+def _warm_imports():
+    """Initializer worker: import library berat sekali per proses."""
+    os.chdir(ROOT)
+    if str(SCRIPTS) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS))
+    import matplotlib
+    matplotlib.use("Agg")
+    import chart_pool  # noqa: F401  (matplotlib Figure/Agg, tanpa pyplot)
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+
+def _run_script(cmd: list) -> None:
+    script = str(SCRIPTS / cmd[0])
+    old_argv = sys.argv
+    sys.argv = [script, *cmd[1:]]
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"{cmd[0]} exited with {e.code}")
+    finally:
+        sys.argv = old_argv
+
+def run_stage(name: str) -> dict:
+    _warm_imports()
+    cmds = STAGES[name][0]
+    t0 = time.perf_counter()
+    steps = []
+    status, error = "ok", None
+    for cmd in cmds:
+        s0 = time.perf_counter()
+        try:
+            _run_script(cmd)
+        except Exception as e:
+            status, error = "failed", f"{cmd[0]}: {e}"
+            traceback.print_exc()
+            steps.append({"cmd": " ".join(cmd), "seconds": round(time.perf_counter() - s0, 3)})
+            break
+        steps.append({"cmd": " ".join(cmd), "seconds": round(time.perf_counter() - s0, 3)})
+    return {"stage": name, "status": status, "error": error,
+            "seconds": round(time.perf_counter() - t0, 3), "steps": steps, "pid": os.getpid()}
+
+def plan(only=None, skip=None) -> dict:
+    """Subset DAG; dependensi dari stage yang dipilih ikut dimasukkan (kecuali di-skip)."""
+    skip = set(skip or [])
+    wanted = set(only or STAGES)
+    todo, stack = set(), list(wanted)
+    while stack:
+        s = stack.pop()
+        if s in todo or s in skip:
+            continue
+        todo.add(s)
+        stack.extend(STAGES[s][1])
+    return {s: [d for d in STAGES[s][1] if d in todo] for s in STAGES if s in todo}
+
+def execute(dag: dict, jobs: int) -> list:
+    results, done, failed = [], set(), set()
+    pending = dict(dag)
+
+    def ready():
+        return [s for s, deps in pending.items() if all(d in done for d in deps)]
+
+    def blocked():
+        return [s for s, deps in pending.items() if any(d in failed for d in deps)]
+
+    def finish(r):
+        results.append(r)
+        allow_fail = STAGES[r["stage"]][2]
+        mark = "ok" if r["status"] == "ok" else ("failed (allowed)" if allow_fail else "FAILED")
+        print(f"[stage] {r['stage']:<14} {r['seconds']:>7.2f}s  {mark}", flush=True)
+        if r["status"] == "ok" or allow_fail:
+            done.add(r["stage"])
+        else:
+            failed.add(r["stage"])
+
+    def skip_blocked():
+        for s in blocked():
+            pending.pop(s)
+            failed.add(s)
+            results.append({"stage": s, "status": "skipped", "error": "dependency failed", "seconds": 0.0, "steps": []})
+            print(f"[stage] {s:<14}    skip  (dependency failed)", flush=True)
+
+    if jobs <= 1:
+        while pending:
+            skip_blocked()
+            nxt = ready()
+            if not nxt:
+                break
+            pending.pop(nxt[0])
+            finish(run_stage(nxt[0]))
+        return results
+
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    running = {}
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_warm_imports) as ex:
+        while pending or running:
+            skip_blocked()
+            for s in ready():
+                pending.pop(s)
+                running[ex.submit(run_stage, s)] = s
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                s = running.pop(fut)
+                try:
+                    finish(fut.result())
+                except Exception as e:
+                    finish({"stage": s, "status": "failed", "error": str(e), "seconds": 0.0, "steps": []})
+    return results
+
+def main():
+    ap = argparse.ArgumentParser(description="Build docs/site assets via a stage DAG.")
+    ap.add_argument("--jobs", type=int, default=int(os.getenv("BUILD_JOBS", "0")),
+                    help="Jumlah worker process (0 = semua CPU, 1 = serial in-process)")
+    ap.add_argument("--only", nargs="*", choices=list(STAGES), help="Jalankan stage ini (+ dependensinya)")
+    ap.add_argument("--skip", nargs="*", choices=list(STAGES), default=[], help="Lewati stage ini")
+    args = ap.parse_args()
+
+    os.chdir(ROOT)
+    dag = plan(args.only, args.skip)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    jobs = min(jobs, max(len(dag), 1))
+    print(f"[build] {len(dag)} stage(s), jobs={jobs}: {', '.join(dag)}", flush=True)
+
+    t0 = time.perf_counter()
+    if jobs <= 1:
+        _warm_imports()
+    else:
+        # stage sudah paralel → chart_pool di dalam stage render in-process (hindari pool di dalam pool)
+        os.environ.setdefault("CHART_JOBS", "1")
+    results = execute(dag, jobs)
+    total = round(time.perf_counter() - t0, 3)
+
+    TIMINGS.parent.mkdir(parents=True, exist_ok=True)
+    TIMINGS.write_text(json.dumps({
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "jobs": jobs,
+        "wall_seconds": total,
+        "stages": results,
+    }, indent=2), encoding="utf-8")
+    print(f"[build] done in {total:.2f}s (sum of stages {sum(r['seconds'] for r in results):.2f}s) → {TIMINGS.relative_to(ROOT)}")
+
+    hard_fail = [r["stage"] for r in results if r["status"] != "ok" and not STAGES[r["stage"]][2]]
+    if hard_fail:
+        print(f"[build] failed: {hard_fail}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,9 +3,11 @@ import json
 from pathlib import Path
 import pandas as pd
 import numpy as np
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+
+from publish_loader import read_publish
+from anomaly_stream import AnomalyStream, to_ms
+from chart_pool import ChartPool, ChartJob
+import chart_spec as cs
 
 ROOT = Path(__file__).resolve().parents[1]
 DOCS = ROOT / "docs"
@@ -17,63 +19,48 @@ def month_floor(s):
     s = pd.to_datetime(s, errors="coerce", utc=True).dt.tz_localize(None)
     return s.dt.to_period("M").dt.to_timestamp()
 
-def robust_anomalies(y, win=5, k=3.0):
-    med = y.rolling(win, center=True, min_periods=1).median()
-    mad = (y - med).abs().rolling(win, center=True, min_periods=1).median()
-    mad = mad.replace(0, mad[mad>0].min() if (mad>0).any() else 1e-9)
-    z = (y - med) / (1.4826 * mad)
-    return z.abs() > k, med
-
-def savefig(name):
-    p = ASSETS / name
-    plt.tight_layout()
-    plt.savefig(p, dpi=144, bbox_inches="tight")
-    plt.close()
-    return f"assets/{name}"
+def robust_anomalies(months, y, stream="viz_ops_delay", win=12, k=3.0):
+    """Mask anomali untuk (months, y); hanya bulan baru yang di-skor (state di anomaly_stream)."""
+    s = AnomalyStream(stream, win=win, k=k)
+    t = to_ms(months)
+    s.update("all", t, y.to_numpy(dtype=float))
+    s.save()
+    flagged = {a["t"] for a in s.anomalies("all")}
+    return pd.Series([x in flagged for x in t], index=y.index)
 
-def plot_ops_timeseries():
+def plot_ops_timeseries(pool: ChartPool):
     csv = PUBLISH / "euro_atfm_timeseries.csv"
     if not csv.exists(): return None, None
-    df = pd.read_csv(csv)
+    df = read_publish(csv)
     col_date = next((c for c in ["period_start","date","period"] if c in df.columns), None)
     if col_date is None or "delay_minutes" not in df.columns: return None, None
 
     df["_m"] = month_floor(df[col_date])
     maxd = df["_m"].max()
     start = (maxd - pd.offsets.DateOffset(months=23)).to_pydatetime()
-    d = df[df["_m"] >= start].groupby("_m", as_index=False)["delay_minutes"].sum()
+    full = df.groupby("_m", as_index=False)["delay_minutes"].sum()
+    d = full[full["_m"] >= start].reset_index(drop=True)
 
-    anom_mask, _ = robust_anomalies(d["delay_minutes"], win=5, k=3.0)
-    ma = d["delay_minutes"].rolling(3, center=True, min_periods=1).mean()
+    # state stream & figure interaktif dari series penuh (LTTB kalau panjang); PNG & KPI 24 bulan terakhir
+    anom_full = robust_anomalies(full["_m"], full["delay_minutes"])
+    ma_full = full["delay_minutes"].rolling(3, center=True, min_periods=1).mean()
 
-    plt.figure(figsize=(8.8,3.2))
-    plt.plot(d["_m"], d["delay_minutes"], marker="o", label="Delay (min)")
-    plt.plot(d["_m"], ma, linestyle="--", label="3M moving avg")
-    plt.scatter(d["_m"][anom_mask], d["delay_minutes"][anom_mask], s=48, zorder=5)
-    for x,y in zip(d["_m"][anom_mask], d["delay_minutes"][anom_mask]):
-        plt.annotate("anomaly", (x,y), textcoords="offset points", xytext=(0,8), ha="center", fontsize=8)
-    plt.title("EUROCONTROL ATFM — 24 bulan (anomali & 3M MA)")
-    plt.xlabel("Month"); plt.ylabel("Delay minutes"); plt.grid(True, alpha=.25)
-    static_png = savefig("ops_delay_24m_advanced.png")
-
-    def iso(x): return [str(ts.date()) for ts in x]
-    fig = {
-      "data":[
-        {"type":"scatter","mode":"lines+markers","name":"Delay (min)","x":iso(d["_m"]), "y":d["delay_minutes"].round(2).tolist()},
-        {"type":"scatter","mode":"lines","name":"3M MA","x":iso(d["_m"]), "y":ma.round(2).tolist(), "line":{"dash":"dash"}},
-        {"type":"scatter","mode":"markers","name":"Anomalies","x":iso(d["_m"][anom_mask]), "y":d["delay_minutes"][anom_mask].round(2).tolist(),
-         "marker":{"color":"crimson","size":9}}
-      ],
-      "layout":{
-        "margin":{"l":40,"r":10,"t":20,"b":40},
-        "xaxis":{"rangeslider":{"visible":True}},
-        "yaxis":{"title":"Delay minutes"},
-        "template":"plotly_white",
-        "showlegend":True,
-        "hovermode":"x unified"
-      }
-    }
-    (ASSETS / "ops_delay_plotly.json").write_text(json.dumps(fig), encoding="utf-8")
+    fig = cs.Figure("ops_delay_plotly", [
+        cs.line(full["_m"], full["delay_minutes"], "Delay (min)", markers=True),
+        cs.line(full["_m"], ma_full, "3M MA", dash="dash"),
+        cs.points(full["_m"][anom_full], full["delay_minutes"][anom_full], "Anomalies", color="crimson"),
+    ], {
+        "margin": {"l": 40, "r": 10, "t": 20, "b": 40},
+        "xaxis": {"rangeslider": {"visible": True}, "range": cs.iso(np.array([start, maxd], dtype="datetime64[ns]"))},
+        "yaxis": {"title": "Delay minutes"},
+        "template": "plotly_white",
+        "showlegend": True,
+        "hovermode": "x unified"
+    })
+    fig.write(ASSETS)
+    static_png = fig.png(pool, ASSETS / "ops_delay_24m_advanced.png", window=(start, maxd), annotate="anomaly",
+                         title="EUROCONTROL ATFM — 24 bulan (anomali & 3M MA)", xlabel="Month",
+                         ylabel="Delay minutes", grid=True, figsize=(8.8, 3.2), dpi=144, bbox="tight")
 
     if len(d) >= 12:
         this12 = d.tail(12)["delay_minutes"].sum()
@@ -91,43 +78,34 @@ def plot_ops_timeseries():
     (ASSETS / "ops_delay_kpis.json").write_text(json.dumps(kpis), encoding="utf-8")
     return static_png, kpis
 
-def plot_small_multiples_top_locations():
+def plot_small_multiples_top_locations(pool: ChartPool):
     csv = PUBLISH / "euro_atfm_by_location.csv"
     if not csv.exists(): return None
-    loc = pd.read_csv(csv)
+    loc = read_publish(csv)
     if not {"location","delay_minutes"}.issubset(loc.columns): return None
+    tot = loc.assign(location=loc["location"].astype(str)).groupby("location", sort=False)["delay_minutes"].sum()
     top = loc.sort_values("delay_minutes", ascending=False).head(12)["location"].astype(str).tolist()
-    plt.figure(figsize=(9,6))
-    cols = 3; rows = int(np.ceil(len(top)/cols))
-    for i, name in enumerate(top, 1):
-        ax = plt.subplot(rows, cols, i)
-        val = loc.loc[loc["location"]==name, "delay_minutes"].sum()
-        ax.bar([name], [val])
-        ax.set_title(name, fontsize=9)
-        ax.set_xticks([]); ax.set_yticks([])
-    plt.suptitle("Top-12 locations — total delay (mini panels)")
-    return savefig("ops_delay_top_locations_smallmultiples.png")
+    return pool.submit(ChartJob("ops_delay_top_locations_smallmultiples",
+                                ASSETS / "ops_delay_top_locations_smallmultiples.png", "small_multiples",
+                                {"labels": top, "values": tot.reindex(top).to_numpy()},
+                                {"title": "Top-12 locations — total delay (mini panels)", "cols": 3}))
 
-def network_bars():
+def network_bars(pool: ChartPool):
     deg_csv = PUBLISH / "airport_degree.csv"
     if not deg_csv.exists(): return None
-    df = pd.read_csv(deg_csv)
+    df = read_publish(deg_csv)
     if not {"iata","deg_out","deg_in","deg_total"}.issubset(df.columns): return None
-    top = df.sort_values("deg_total", ascending=False).head(20)
-    plt.figure(figsize=(9,3.2))
-    plt.bar(top["iata"].astype(str), top["deg_total"])
-    for i,(x,y) in enumerate(zip(top["iata"], top["deg_total"])):
-        plt.text(i, y, f"{int(y)}", ha="center", va="bottom", fontsize=8)
-    plt.title("Top-20 airport degree (total)")
-    plt.xticks(rotation=60, ha="right")
-    plt.ylabel("Degree")
-    plt.grid(axis="y", alpha=.2)
-    return savefig("network_degree_top20.png")
+    fig = cs.Figure("network_degree_top20", [cs.bars(df["iata"], df["deg_total"], n=20)])
+    return fig.png(pool, ASSETS / "network_degree_top20.png", title="Top-20 airport degree (total)", ylabel="Degree",
+                   rotate=60, value_labels=True, grid_y=True, figsize=(9, 3.2))
 
 def main():
-    static_png, _ = plot_ops_timeseries()
-    sm_png = plot_small_multiples_top_locations()
-    deg_png = network_bars()
+    # data/JSON selalu dihitung ulang (murah); PNG di-render pool hanya kalau hash data berubah
+    pool = ChartPool(__file__)
+    static_png, _ = plot_ops_timeseries(pool)
+    sm_png = plot_small_multiples_top_locations(pool)
+    deg_png = network_bars(pool)
+    pool.run()
     created = [p for p in [static_png, sm_png, deg_png] if p]
     print("Assets created:", created)
 
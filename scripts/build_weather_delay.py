@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Join cuaca (NOAA ISD, hasil parse_isd.py) ↔ delay ATFM.
+
+1) Agregat harian per station-year (di-cache per file Parquet; run ulang hanya memproses
+   station-year yang berubah/baru):
+     obs, ifr_hours (ceiling < 1000 ft atau visibility < 3 SM), max_wind_ms, max_gust_ms,
+     precip_hours, precip_mm (AA1 periode 1 jam), mean_temp_c, min_vis_m
+2) Agregat bulanan per ICAO dari harian
+3) Join ke euro_atfm_timeseries (per period_start × ICAO), pakai searchsorted di key terurut:
+     - as-of: bulan cuaca terakhir ≤ period_start (maks. --asof-months bulan sebelumnya)
+     - windowed: jumlah/max trailing --window bulan (cumsum + dua searchsorted)
+4) euro_atfm_by_location (per ANSP) ↔ rata-rata bulanan cuaca bandara utama ANSP (ANSP_AIRPORTS)
+
+Output data/derived/weather/: weather_daily.parquet, weather_monthly.csv,
+weather_atfm_join.csv, weather_by_location.csv
+
+Contoh:
+  python scripts/download_isd.py --icaos LFPG EDDF EGLL --year 2019 2024
+  python scripts/parse_isd.py && python scripts/build_weather_delay.py --window 3
+"""
+from __future__ import annotations
+import argparse, json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from build_cache import BuildCache
+from publish_loader import read_publish
+
+ROOT = Path(__file__).resolve().parents[1]
+ISD_DIR = ROOT / "data" / "noaa_isd"
+PARQUET_DIR = ISD_DIR / "parquet"
+AGG_DIR = ISD_DIR / "agg"
+INDEX_JSON = ISD_DIR / "isd_index.json"
+PUBLISH = ROOT / "publish"
+OUT = ROOT / "data" / "derived" / "weather"
+
+IFR_CEILING_M = 305.0    # 1000 ft
+IFR_VIS_M = 4828.0       # 3 statute miles
+
+# ANSP (euro_atfm_by_location) → bandara utama di wilayahnya
+ANSP_AIRPORTS = {
+    "HungaroControl": "LHBP", "Croatia Control": "LDZA", "DFS": "EDDF", "DSNA": "LFPG",
+    "ENAIRE": "LEMD", "HASP": "LGAV", "ENAV": "LIRF", "Austro Control": "LOWW",
+    "NAV Portugal": "LPPT", "Skyguide": "LSZH", "PANSA": "EPWA", "ROMATSA": "LROP",
+    "LPS SR": "LZIB", "Belgium-Lux.": "EBBR", "BULATSA": "LBSF", "ANS CR": "LKPR",
+    "NAVIAIR": "EKCH", "Malta Air Traffic": "LMML", "Oro Navigacija": "EYVI", "EANS": "EETN",
+    "AirNav Ireland": "EIDW", "LGS": "EVRA", "LVNL": "EHAM", "Slovenia Control": "LJLJ",
+    "Fintraffic": "EFHK", "Avinor": "ENGM", "LFV": "ESSA", "DCAC Cyprus": "LCLK",
+}
+
+def station_icao() -> dict:
+    """'USAF-WBAN' → ICAO dari index download_isd.py (kosong kalau belum ada)."""
+    if not INDEX_JSON.exists():
+        return {}
+    stations = json.loads(INDEX_JSON.read_text(encoding="utf-8")).get("stations", {})
+    return {f"{u}-{w}": icao for icao, rows in stations.items() for u, w, *_ in rows}
+
+def daily_aggregates(obs: pd.DataFrame) -> pd.DataFrame:
+    """Observasi (parse_isd) → satu baris per (station, date)."""
+    if obs.empty:
+        return pd.DataFrame()
+    hour = obs["ts"].dt.floor("h")
+    ifr = (obs["ceiling_m"] < IFR_CEILING_M) | (obs["visibility_m"] < IFR_VIS_M)
+    wet = obs["precip_mm"] > 0
+    # jam unik dengan kondisi IFR / hujan (banyak laporan per jam tidak dihitung dobel)
+    hourly = pd.DataFrame({"station": obs["station"], "hour": hour, "ifr": ifr, "wet": wet}) \
+        .groupby(["station", "hour"], sort=False)[["ifr", "wet"]].any().reset_index()
+    hourly["date"] = hourly["hour"].dt.floor("D")
+    hrs = hourly.groupby(["station", "date"]).agg(obs_hours=("hour", "size"), ifr_hours=("ifr", "sum"),
+                                                  precip_hours=("wet", "sum"))
+    one_h = obs["precip_mm"].where(obs["precip_hours"] == 1)
+    d = obs.assign(date=obs["ts"].dt.floor("D"), _p1=one_h).groupby(["station", "date"]).agg(
+        obs=("ts", "size"), max_wind_ms=("wind_speed_ms", "max"), max_gust_ms=("gust_ms", "max"),
+        precip_mm=("_p1", "sum"), mean_temp_c=("temp_c", "mean"), min_vis_m=("visibility_m", "min"))
+    return d.join(hrs).reset_index()
+
+def build_daily(files: list, cache: BuildCache) -> pd.DataFrame:
+    """Agregat harian semua station-year; hanya file yang berubah yang dihitung ulang."""
+    AGG_DIR.mkdir(parents=True, exist_ok=True)
+    frames, fresh, rebuilt = [], 0, 0
+    for f in files:
+        out = AGG_DIR / f"{f.parent.name.split('=', 1)[-1]}_{f.stem}.parquet"
+        key = f"daily:{out.name}"
+        if cache.fresh(key, [f], [out]):
+            fresh += 1
+        else:
+            daily_aggregates(pd.read_parquet(f)).to_parquet(out, index=False)
+            cache.record(key, [f])
+            rebuilt += 1
+        frames.append(pd.read_parquet(out))
+    cache.save()
+    print(f"[weather] daily aggregates: {rebuilt} station-year(s) rebuilt, {fresh} cached")
+    frames = [x for x in frames if not x.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def monthly_aggregates(daily: pd.DataFrame) -> pd.DataFrame:
+    m = daily.assign(month=daily["date"].dt.to_period("M").dt.to_timestamp())
+    return m.groupby(["icao", "month"]).agg(
+        days=("date", "nunique"), obs_hours=("obs_hours", "sum"), ifr_hours=("ifr_hours", "sum"),
+        precip_hours=("precip_hours", "sum"), precip_mm=("precip_mm", "sum"),
+        max_gust_ms=("max_gust_ms", "max"), max_wind_ms=("max_wind_ms", "max"),
+        mean_temp_c=("mean_temp_c", "mean"),
+    ).reset_index()
+
+def _month_int(s) -> np.ndarray:
+    return pd.to_datetime(s).to_numpy().astype("datetime64[M]").astype(np.int64)
+
+def asof_window_join(periods: pd.DataFrame, monthly: pd.DataFrame, window: int = 3,
+                     asof_months: int = 1) -> pd.DataFrame:
+    """
+    periods: (period_start, delay_minutes); monthly: (icao, month, ...).
+    Hasil: satu baris per period × icao. Semua lookup = searchsorted di key (icao, month) terurut.
+    """
+    monthly = monthly.sort_values(["icao", "month"]).reset_index(drop=True)
+    icaos = monthly["icao"].unique()
+    code = pd.Index(icaos).get_indexer(monthly["icao"])
+    span = 1 << 32
+    keys = code.astype(np.int64) * span + _month_int(monthly["month"])
+
+    p = _month_int(periods["period_start"])
+    q_code = np.repeat(np.arange(len(icaos)), len(p))
+    q_month = np.tile(p, len(icaos))
+    q = q_code * span + q_month
+
+    # as-of: baris terakhir ≤ query di icao yang sama
+    idx = np.searchsorted(keys, q, side="right") - 1
+    ok = (idx >= 0) & (code[np.clip(idx, 0, None)] == q_code)
+    idx_safe = np.clip(idx, 0, None)
+    ok &= (q_month - (keys[idx_safe] - q_code * span)) <= asof_months
+
+    # windowed: bulan di (period - window, period] → prefix sum
+    lo = np.searchsorted(keys, q - (window - 1), side="left")
+    hi = idx + 1
+    out = pd.DataFrame({
+        "period_start": np.tile(pd.to_datetime(periods["period_start"]).to_numpy(), len(icaos)),
+        "icao": icaos[q_code],
+        "delay_minutes": np.tile(periods["delay_minutes"].to_numpy(dtype=float), len(icaos)),
+        "asof_month": np.where(ok, monthly["month"].to_numpy()[idx_safe], np.datetime64("NaT")),
+    })
+    for col in ("ifr_hours", "precip_hours", "max_gust_ms"):
+        v = monthly[col].to_numpy(dtype=float)
+        out[col] = np.where(ok, v[idx_safe], np.nan)
+    for col in ("ifr_hours", "precip_hours", "obs_hours"):
+        c = np.r_[0.0, np.cumsum(np.nan_to_num(monthly[col].to_numpy(dtype=float)))]
+        out[f"{col}_w{window}"] = np.where(hi > lo, c[np.maximum(hi, 0)] - c[lo], np.nan)
+    # max trailing window: window kecil → max dari `window` shift as-of
+    g = monthly["max_gust_ms"].to_numpy(dtype=float)
+    best = np.full(len(q), np.nan)
+    for k in range(window):
+        j = hi - 1 - k
+        valid = (j >= lo) & (j >= 0)
+        best = np.fmax(best, np.where(valid, g[np.clip(j, 0, None)], np.nan))
+    out[f"max_gust_ms_w{window}"] = best
+    return out
+
+def by_location(loc: pd.DataFrame, monthly: pd.DataFrame) -> pd.DataFrame:
+    def icao_for(name: str):
+        return next((icao for key, icao in ANSP_AIRPORTS.items() if key.lower() in name.lower()), None)
+
+    out = loc[["location", "delay_minutes"]].copy()
+    out["icao"] = out["location"].astype(str).map(icao_for)
+    clim = monthly.groupby("icao").agg(months=("month", "nunique"), ifr_hours_per_month=("ifr_hours", "mean"),
+                                       precip_hours_per_month=("precip_hours", "mean"),
+                                       max_gust_ms=("max_gust_ms", "max")).reset_index()
+    return out.merge(clim, on="icao", how="left")
+
+def build(window: int = 3, asof_months: int = 1, out_dir: Path = OUT) -> bool:
+    files = sorted(PARQUET_DIR.glob("station=*/*.parquet"))
+    if not files:
+        print(f"[skip] no parsed ISD Parquet in {PARQUET_DIR} (jalankan parse_isd.py)")
+        return False
+    cache = BuildCache(__file__)
+    daily = build_daily(files, cache)
+    if daily.empty:
+        print("[skip] weather: no observations")
+        return False
+    st2icao = station_icao()
+    daily["icao"] = daily["station"].map(st2icao).fillna(daily["station"])
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    daily.to_parquet(out_dir / "weather_daily.parquet", index=False)
+    monthly = monthly_aggregates(daily)
+    monthly.to_csv(out_dir / "weather_monthly.csv", index=False)
+    print(f"[ok] weather_monthly: {len(monthly)} rows ({monthly['icao'].nunique()} airport(s))")
+
+    ts_csv = PUBLISH / "euro_atfm_timeseries.csv"
+    if ts_csv.exists():
+        ts = read_publish(ts_csv).dropna(subset=["period_start"]).sort_values("period_start")
+        j = asof_window_join(ts, monthly, window, asof_months)
+        j.to_csv(out_dir / "weather_atfm_join.csv", index=False)
+        print(f"[ok] weather_atfm_join: {len(j)} rows, {int(j['asof_month'].notna().sum())} matched (window={window})")
+    loc_csv = PUBLISH / "euro_atfm_by_location.csv"
+    if loc_csv.exists():
+        bl = by_location(read_publish(loc_csv), monthly)
+        bl.to_csv(out_dir / "weather_by_location.csv", index=False)
+        print(f"[ok] weather_by_location: {len(bl)} rows, {int(bl['months'].notna().sum())} with weather")
+    return True
+
+def main():
+    ap = argparse.ArgumentParser(description="Aggregate ISD weather and join it to ATFM delay series.")
+    ap.add_argument("--window", type=int, default=3, help="Trailing window (bulan) untuk windowed join")
+    ap.add_argument("--asof-months", type=int, default=1, help="Toleransi as-of: bulan cuaca maks. sekian bulan sebelum period")
+    ap.add_argument("--out-dir", type=Path, default=OUT)
+    args = ap.parse_args()
+    build(args.window, args.asof_months, args.out_dir)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Render service PNG matplotlib: job chart → process pool, API Figure OO (tanpa state global pyplot).
+
+- ChartJob = (name, out, template, data, opts); data sudah disiapkan di proses pemanggil
+  (list/array kecil), worker hanya menggambar
+- Template (TEMPLATES) = fungsi gambar + default ukuran/dpi; Figure per (template, figsize)
+  di-cache per proses dan dipakai ulang (fig.clear()) antar job
+- Skip: md5 (template, data, opts) + versi chart_pool.py dicatat di manifest build_cache
+  pemanggil (key chart:<name>); PNG di-render ulang hanya kalau hash berubah atau file hilang
+- Waktu render per chart dicetak & ditulis ke .build_cache/chart_timings/<script>.json
+
+Env:
+  CHART_JOBS   jumlah worker (default 0 = semua CPU; 1 = render in-process). Kalau tidak diset dan
+               proses ini sendiri worker pool (mis. stage build_site), render in-process
+
+Contoh:
+  pool = ChartPool(__file__)
+  pool.submit(ChartJob("ops_24m", ASSETS / "ops.png", "line", {"x": x, "series": [{"y": y}]}, {"title": "..."}))
+  pool.run()
+"""
+from __future__ import annotations
+import os, sys, json, time, hashlib, multiprocessing
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from build_cache import BuildCache, CACHE_DIR, md5sum
+
+TIMINGS_DIR = CACHE_DIR / "chart_timings"
+VERSION = md5sum(Path(__file__))
+
+@dataclass
+class ChartJob:
+    name: str
+    out: Path
+    template: str
+    data: dict
+    opts: dict = field(default_factory=dict)
+
+# ---- templates: fn(fig, data, opts) -> None ----
+
+def _line(fig, data, opts):
+    ax = fig.add_subplot()
+    x = data.get("x")
+    for s in data["series"]:
+        ax.plot(s.get("x", x), s["y"], label=s.get("label"), linestyle=s.get("linestyle", "-"), marker=s.get("marker"))
+    pts = data.get("points")
+    if pts and len(pts["x"]):
+        ax.scatter(pts["x"], pts["y"], s=48, zorder=5, label=pts.get("label"))
+        for px, py in zip(pts["x"], pts["y"]):
+            if pts.get("annotate"):
+                ax.annotate(pts["annotate"], (px, py), textcoords="offset points", xytext=(0, 8), ha="center", fontsize=8)
+    ax.set_title(opts.get("title", ""))
+    ax.set_xlabel(opts.get("xlabel", "")); ax.set_ylabel(opts.get("ylabel", ""))
+    if opts.get("grid"):
+        ax.grid(True, alpha=.25)
+    if opts.get("legend"):
+        ax.legend(fontsize=8)
+    if opts.get("date_x"):
+        fig.autofmt_xdate()
+
+def _bar(fig, data, opts):
+    ax = fig.add_subplot()
+    labels = [str(v) for v in data["labels"]]
+    ax.bar(labels, data["values"])
+    if opts.get("value_labels"):
+        for i, v in enumerate(data["values"]):
+            ax.text(i, v, f"{int(v)}", ha="center", va="bottom", fontsize=8)
+    ax.set_title(opts.get("title", ""))
+    ax.set_xlabel(opts.get("xlabel", "")); ax.set_ylabel(opts.get("ylabel", ""))
+    if opts.get("rotate"):
+        ax.tick_params(axis="x", labelrotation=opts["rotate"])
+        for t in ax.get_xticklabels():
+            t.set_horizontalalignment("right")
+    if opts.get("grid_y"):
+        ax.grid(axis="y", alpha=.2)
+
+def _small_multiples(fig, data, opts):
+    """Panel kecil per label (satu bar per panel); grid dibuat sekali via fig.subplots."""
+    labels, values = data["labels"], data["values"]
+    cols = opts.get("cols", 3)
+    rows = max(1, int(np.ceil(len(labels) / cols)))
+    axes = np.atleast_1d(fig.subplots(rows, cols, squeeze=False)).ravel()
+    for ax, name, val in zip(axes, labels, values):
+        ax.bar([str(name)], [val])
+        ax.set_title(str(name), fontsize=9)
+        ax.set_xticks([]); ax.set_yticks([])
+    for ax in axes[len(labels):]:
+        ax.set_visible(False)
+    fig.suptitle(opts.get("title", ""))
+
+# nama → (fungsi, default: figsize, dpi, bbox)
+TEMPLATES = {
+    "line": (_line, {"figsize": (8, 3), "dpi": 100, "bbox": None}),
+    "bar": (_bar, {"figsize": (8, 3), "dpi": 144, "bbox": "tight"}),
+    "small_multiples": (_small_multiples, {"figsize": (9, 6), "dpi": 144, "bbox": "tight"}),
+}
+
+_FIGS: dict = {}
+
+def _figure(template: str, figsize) -> Figure:
+    """Figure dipakai ulang per (template, figsize) di proses ini."""
+    key = (template, tuple(figsize))
+    fig = _FIGS.get(key)
+    if fig is None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        _FIGS[key] = fig
+    else:
+        fig.clear()
+    return fig
+
+def render(job: ChartJob) -> float:
+    """Gambar satu job ke PNG (atomic replace); return detik."""
+    t0 = time.perf_counter()
+    fn, defaults = TEMPLATES[job.template]
+    opts = {**defaults, **job.opts}
+    fig = _figure(job.template, opts["figsize"])
+    fn(fig, job.data, opts)
+    fig.tight_layout()
+    out = Path(job.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.stem + ".tmp.png")
+    fig.savefig(tmp, dpi=opts["dpi"], bbox_inches=opts["bbox"])
+    tmp.replace(out)
+    return time.perf_counter() - t0
+
+def _render_safe(job: ChartJob):
+    try:
+        return job.name, render(job), None
+    except Exception as e:
+        return job.name, None, f"{type(e).__name__}: {e}"
+
+def _jsonable(o):
+    if isinstance(o, np.ndarray):
+        return o.astype(str).tolist() if o.dtype.kind in "mMO" else o.tolist()
+    if isinstance(o, (pd.Series, pd.Index)):
+        return _jsonable(o.to_numpy())
+    if isinstance(o, (pd.Timestamp, np.datetime64)):
+        return str(o)
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, Path):
+        return str(o)
+    return str(o)
+
+def digest(job: ChartJob) -> str:
+    blob = json.dumps([job.template, job.data, job.opts], default=_jsonable, sort_keys=True)
+    return hashlib.md5(blob.encode("utf-8")).hexdigest()
+
+class ChartPool:
+    def __init__(self, owner: str, jobs: int | None = None):
+        self.owner = Path(owner).stem
+        self.cache = BuildCache(owner)
+        if jobs is None:
+            env = os.getenv("CHART_JOBS")
+            # di dalam worker pool lain → jangan buka pool cpu_count lagi (oversubscription)
+            jobs = int(env) if env else (1 if multiprocessing.parent_process() is not None else 0)
+        self.jobs = jobs
+        self.pending: list[ChartJob] = []
+
+    def submit(self, job: ChartJob) -> str:
+        """Antrekan job; return path relatif docs/ (untuk link markdown)."""
+        self.pending.append(job)
+        return f"assets/{Path(job.out).name}"
+
+    def run(self) -> list:
+        """Render semua job yang hash-nya berubah; return [{chart, status, seconds}]."""
+        jobs, self.pending = self.pending, []
+        todo, report = [], []
+        for job in jobs:
+            extra = {"hash": digest(job), "chart_pool": VERSION}
+            if self.cache.fresh(f"chart:{job.name}", [], [job.out], extra):
+                report.append({"chart": job.name, "status": "cached", "seconds": 0.0})
+            else:
+                todo.append((job, extra))
+        n = self.jobs if self.jobs > 0 else (os.cpu_count() or 1)
+        n = min(n, len(todo))
+        t0 = time.perf_counter()
+        if n <= 1:
+            results = [_render_safe(job) for job, _ in todo]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=n) as ex:
+                results = list(ex.map(_render_safe, [job for job, _ in todo]))
+        for (job, extra), (name, secs, err) in zip(todo, results):
+            if err:
+                print(f"[WARN] chart {name}: {err}", file=sys.stderr)
+                self.cache.forget(f"chart:{name}")
+                report.append({"chart": name, "status": "failed", "seconds": 0.0, "error": err})
+                continue
+            self.cache.record(f"chart:{name}", [], extra)
+            report.append({"chart": name, "status": "rendered", "seconds": round(secs, 4)})
+        self.cache.save()
+        for r in report:
+            print(f"[chart] {r['chart']:<36} {r['status']:<8} {r['seconds']:.3f}s")
+        rendered = [r for r in report if r["status"] == "rendered"]
+        print(f"[chart] {len(rendered)} rendered, {len(report) - len(rendered)} skipped/failed "
+              f"in {time.perf_counter() - t0:.2f}s (workers={max(n, 1)})")
+        TIMINGS_DIR.mkdir(parents=True, exist_ok=True)
+        (TIMINGS_DIR / f"{self.owner}.json").write_text(json.dumps(report, indent=1), encoding="utf-8")
+        return report
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Chart-spec: satu definisi chart → Plotly figure JSON, PNG opsional (lazy, via chart_pool).
+
+- Trace dibangun sekali dari series/frame yang sudah diketik (x datetime/numerik, y float):
+    line()    garis; LTTB downsample ke max_points per output (bentuk & puncak tetap, payload tidak
+              ikut membesar); series mentah disimpan → window PNG dipotong dulu, baru di-decimate
+    points()  marker saja (mis. anomali)
+    bars()    top-N via argpartition (tidak sort seluruh tabel)
+    sankey()  top-N link OD → node/link index
+- Figure.write() menulis JSON ringkas (separators tanpa spasi, y dibulatkan, NaN → null)
+- Figure.png() hanya mengantrekan ChartJob dari trace yang SAMA (tidak derive ulang data);
+  render + skip-by-hash diurus ChartPool.run(). CHART_PNG=0 → PNG dilewati sama sekali
+
+Env:
+  CHART_MAX_POINTS  titik maksimum per trace garis (default 500)
+  CHART_PNG         1 (default) render PNG; 0 = JSON saja
+
+Contoh:
+  fig = Figure("ops_delay_plotly", [line(df["month"], df["delay"], "Delay")], {"yaxis": {"title": "min"}})
+  fig.write(ASSETS)
+  fig.png(pool, ASSETS / "ops.png", window=(start, end), title="...")
+"""
+from __future__ import annotations
+import os, json
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "500"))
+
+@dataclass
+class Trace:
+    kind: str                      # line | points | bar | sankey
+    name: str
+    x: np.ndarray = None           # line: series mentah (sebelum LTTB); lainnya: data final
+    y: np.ndarray = None
+    style: dict = field(default_factory=dict)
+    n_source: int = 0              # jumlah titik/baris sebelum decimation/top-N
+
+    def view(self, window=None):
+        """(x, y) untuk satu output: potong ke window (start, end) dulu, lalu LTTB untuk garis."""
+        x, y = self.x, self.y
+        if window is not None and self.kind in ("line", "points"):
+            lo, hi = (np.datetime64(pd.Timestamp(w), "ns") for w in window)
+            xs = np.asarray(x).astype("datetime64[ns]")
+            m = (xs >= lo) & (xs <= hi)
+            x, y = x[m], y[m]
+        if self.kind == "line":
+            idx = lttb(x, y, self.style.get("max_points") or MAX_POINTS)
+            x, y = x[idx], y[idx]
+        return x, y
+
+# ---- reduksi data ----
+
+def _num(x) -> np.ndarray:
+    """x (datetime/numerik) → float untuk hitung geometri LTTB."""
+    x = np.asarray(x)
+    if x.dtype.kind == "M":
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+def lttb(x, y, n: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: index n titik representatif dari (x, y) terurut x.
+    Titik pertama & terakhir selalu ikut; per bucket dipilih titik dengan luas segitiga
+    terbesar terhadap titik terpilih sebelumnya & rata-rata bucket berikutnya. O(N).
+    """
+    xf, yf = _num(x), np.asarray(y, dtype=float)
+    N = len(xf)
+    if n >= N or n < 3:
+        return np.arange(N)
+    edges = np.linspace(1, N - 1, n - 1).astype(np.int64)   # n-2 bucket di antara titik ujung
+    idx = np.empty(n, dtype=np.int64)
+    idx[0], idx[-1] = 0, N - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nx, ny = xf[hi:edges[i + 2]].mean(), yf[hi:edges[i + 2]].mean()
+        else:
+            nx, ny = xf[-1], yf[-1]
+        area = np.abs((xf[a] - nx) * (yf[lo:hi] - yf[a]) - (xf[a] - xf[lo:hi]) * (ny - yf[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+def top_n(values, n: int) -> np.ndarray:
+    """Index n nilai terbesar (urut turun, tie → urutan asal) tanpa full sort."""
+    v = np.asarray(values, dtype=float)
+    v = np.where(np.isnan(v), -np.inf, v)
+    if n < len(v):
+        cand = np.argpartition(-v, n - 1)[:n]
+        # kandidat yang nilainya sama dengan batas bisa terpotong acak → ambil ulang semua tie
+        cut = v[cand].min()
+        cand = np.union1d(np.flatnonzero(v > cut), np.flatnonzero(v == cut))
+    else:
+        cand = np.arange(len(v))
+    order = np.lexsort((cand, -v[cand]))
+    return cand[order][:n]
+
+# ---- konstruktor trace ----
+
+def line(x, y, name: str, max_points: int | None = None, dash: str | None = None,
+         markers: bool = False, decimals: int = 2) -> Trace:
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    ok = ~np.isnan(y)
+    n_src = len(y)
+    style = {"dash": dash, "markers": markers, "decimals": decimals, "max_points": max_points}
+    return Trace("line", name, x[ok], y[ok], style, n_src)
+
+def points(x, y, name: str, color: str | None = None, size: int = 9, decimals: int = 2) -> Trace:
+    return Trace("points", name, np.asarray(x), np.asarray(y, dtype=float),
+                 {"color": color, "size": size, "decimals": decimals}, len(x))
+
+def bars(labels, values, name: str = "", n: int = 20, horizontal: bool = False,
+         decimals: int | None = None, hovertemplate: str | None = None) -> Trace:
+    labels, values = np.asarray(labels, dtype=object), np.asarray(values, dtype=float)
+    idx = top_n(values, n)
+    return Trace("bar", name, labels[idx].astype(str), values[idx],
+                 {"horizontal": horizontal, "decimals": decimals, "hovertemplate": hovertemplate}, len(values))
+
+def sankey(src, dst, value, n: int = 30) -> Trace:
+    src = np.asarray(src, dtype=object).astype(str)
+    dst = np.asarray(dst, dtype=object).astype(str)
+    value = np.asarray(value, dtype=float)
+    idx = top_n(value, n)
+    s, d, v = src[idx], dst[idx], value[idx]
+    nodes = np.unique(np.concatenate([s, d]))
+    return Trace("sankey", "", nodes, v, {"source": np.searchsorted(nodes, s), "target": np.searchsorted(nodes, d)}, len(value))
+
+def from_frame(df: pd.DataFrame, x: str, y: str, name: str | None = None, **kw) -> Trace:
+    """line() dari kolom frame; x di-parse ke datetime kalau belum."""
+    xs = df[x] if pd.api.types.is_numeric_dtype(df[x]) else pd.to_datetime(df[x], errors="coerce")
+    return line(xs.to_numpy(), df[y].to_numpy(dtype=float), name or y, **kw)
+
+# ---- serialisasi ----
+
+def iso(x) -> list:
+    """datetime64 → 'YYYY-MM-DD' (atau detik kalau ada komponen jam); lainnya → list apa adanya."""
+    x = np.asarray(x)
+    if x.dtype.kind != "M":
+        return x.tolist()
+    x = x.astype("datetime64[s]")
+    unit = "D" if (x.astype(np.int64) % 86400 == 0).all() else "s"
+    return np.datetime_as_string(x, unit=unit).tolist()
+
+def _vals(y, decimals) -> list:
+    y = np.asarray(y, dtype=float)
+    if decimals is not None:
+        y = np.round(y, decimals)
+    return [None if np.isnan(v) else v for v in y.tolist()]
+
+def _plotly(t: Trace) -> dict:
+    st = t.style
+    if t.kind == "line":
+        x, y = t.view()
+        tr = {"type": "scatter", "mode": "lines+markers" if st.get("markers") else "lines",
+              "name": t.name, "x": iso(x), "y": _vals(y, st.get("decimals"))}
+        if st.get("dash"):
+            tr["line"] = {"dash": st["dash"]}
+        return tr
+    if t.kind == "points":
+        marker = {"size": st.get("size", 9)}
+        if st.get("color"):
+            marker["color"] = st["color"]
+        return {"type": "scatter", "mode": "markers", "name": t.name,
+                "x": iso(t.x), "y": _vals(t.y, st.get("decimals")), "marker": marker}
+    if t.kind == "bar":
+        labels, vals = t.x.tolist(), _vals(t.y, st.get("decimals"))
+        tr = {"type": "bar", "orientation": "h", "x": vals, "y": labels} if st.get("horizontal") \
+            else {"type": "bar", "x": labels, "y": vals}
+        if t.name:
+            tr["name"] = t.name
+        if st.get("hovertemplate"):
+            tr["hovertemplate"] = st["hovertemplate"]
+        return tr
+    if t.kind == "sankey":
+        return {"type": "sankey", "node": {"label": t.x.tolist(), "pad": 10, "thickness": 10},
+                "link": {"source": st["source"].tolist(), "target": st["target"].tolist(), "value": _vals(t.y, None)}}
+    raise ValueError(f"unknown trace kind: {t.kind}")
+
+@dataclass
+class Figure:
+    name: str
+    traces: list
+    layout: dict = field(default_factory=dict)
+
+    def to_plotly(self) -> dict:
+        return {"data": [_plotly(t) for t in self.traces], "layout": self.layout}
+
+    def write(self, assets: Path) -> Path:
+        out = Path(assets) / f"{self.name}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(self.to_plotly(), separators=(",", ":")), encoding="utf-8")
+        src = sum(t.n_source for t in self.traces)
+        kept = sum(len(t.view()[1]) for t in self.traces)
+        print(f"[ok] {out.name} ({kept}/{src} points, {out.stat().st_size/1024:.1f} KB)")
+        return out
+
+    def png(self, pool, out: Path, window=None, annotate: str | None = None, **opts) -> str | None:
+        """
+        Antrekan PNG (template chart_pool) dari trace figure ini; return link relatif
+        atau None (CHART_PNG=0 / tidak ada padanan template, mis. sankey).
+        window=(start, end) memotong series mentah garis/marker ke rentang itu sebelum LTTB.
+        """
+        if os.getenv("CHART_PNG", "1") == "0":
+            return None
+        from chart_pool import ChartJob
+        kinds = {t.kind for t in self.traces}
+        if kinds <= {"line", "points"}:
+            series, pts = [], None
+            for t in self.traces:
+                x, y = t.view(window)
+                if t.kind == "line":
+                    series.append({"x": x, "y": y, "label": t.name,
+                                   "linestyle": "--" if t.style.get("dash") else "-",
+                                   "marker": "o" if t.style.get("markers") else None})
+                elif pts is None:
+                    pts = {"x": x, "y": y, "label": t.name, "annotate": annotate}
+            data = {"series": series}
+            if pts is not None:
+                data["points"] = pts
+            return pool.submit(ChartJob(Path(out).stem, Path(out), "line", data, opts))
+        if kinds == {"bar"}:
+            t = self.traces[0]
+            return pool.submit(ChartJob(Path(out).stem, Path(out), "bar",
+                                        {"labels": t.x.tolist(), "values": t.y}, opts))
+        return None
@@ -2,29 +2,28 @@
 """
 Quality report lanjutan:
 - Muat kontrak dari governance/datasets.yml
-- Cek: presence, schema drift/typing, null ratio, uniqueness, expression rules, range, freshness
+- Cek: presence, schema drift/typing, null ratio (kecuali kolom `nullable:`), uniqueness, expression rules, range, freshness
 - Severity: error/warn → aggregate status per dataset & keseluruhan
 - Output: docs/quality_report.md (tabel ringkas + detail)
 - Exit code: 0 (default). Gunakan --fail-on=error untuk blokir pipeline bila ada error.
+- Streaming: --chunksize N (atau file > --stream-threshold-mb) → validasi per chunk, memory konstan
+- Paralel: --jobs N menjalankan cek per dataset di process pool (urutan laporan tetap)
+- Anomali (opsional, blok `anomaly:` di kontrak): robust median/MAD incremental via anomaly_stream.py;
+  hanya periode baru yang di-skor, anomali baru → warning
 """
-import os, sys, hashlib, io
+import os, sys, io
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
 import yaml
 
+from build_cache import md5sum
+
 ROOT = Path(__file__).resolve().parents[1]
 GOV = ROOT / "governance" / "datasets.yml"
 DOCS = ROOT / "docs"
 DOCS.mkdir(parents=True, exist_ok=True)
 
-def _md5(path: Path) -> str:
-    h = hashlib.md5()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(1 << 20), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
 def _coerce_dtype(series: pd.Series, logical: str) -> pd.Series:
     t = logical.lower()
     if t in ("int", "integer"):
@@ -38,6 +37,56 @@ def _coerce_dtype(series: pd.Series, logical: str) -> pd.Series:
 def _fmt_status(ok: bool, lvl: str) -> str:
     return "🟢 OK" if ok else ("🟠 WARN" if lvl=="warn" else "🔴 ERROR")
 
+class _KeyTracker:
+    """
+    Hitung duplikat primary key secara streaming.
+    Simpan hash uint64 per baris di memory; kalau melebihi max_keys, hash di-spill ke
+    file per bucket (partisi by hash) lalu tiap bucket di-sort + dihitung terpisah.
+    (Collision 64-bit diabaikan.)
+    """
+    def __init__(self, max_keys: int = 5_000_000, n_buckets: int = 64):
+        self.max_keys = max_keys
+        self.n_buckets = n_buckets
+        self.buf = []
+        self.n_buf = 0
+        self.tmpdir = None
+
+    def add(self, df: pd.DataFrame, pk: list):
+        h = pd.util.hash_pandas_object(df[pk], index=False).to_numpy(dtype="uint64")
+        self.buf.append(h)
+        self.n_buf += len(h)
+        if self.n_buf > self.max_keys:
+            self._spill()
+
+    def _spill(self):
+        import tempfile
+        import numpy as np
+        if self.tmpdir is None:
+            self.tmpdir = tempfile.TemporaryDirectory(prefix="dq_keys_")
+        h = np.concatenate(self.buf) if self.buf else np.empty(0, dtype="uint64")
+        bucket = (h % self.n_buckets).astype("int64")
+        for b in np.unique(bucket):
+            with open(Path(self.tmpdir.name) / f"{b}.u64", "ab") as f:
+                h[bucket == b].tofile(f)
+        self.buf, self.n_buf = [], 0
+
+    def duplicates(self) -> int:
+        import numpy as np
+        if self.tmpdir is None:
+            h = np.concatenate(self.buf) if self.buf else np.empty(0, dtype="uint64")
+            return int(len(h) - len(np.unique(h)))
+        self._spill()
+        dup = 0
+        for p in Path(self.tmpdir.name).glob("*.u64"):
+            h = np.fromfile(p, dtype="uint64")
+            dup += int(len(h) - len(np.unique(h)))
+        return dup
+
+    def close(self):
+        if self.tmpdir is not None:
+            self.tmpdir.cleanup()
+            self.tmpdir = None
+
 def load_governance():
     if not GOV.exists():
         print(f"[WARN] Governance file not found: {GOV}", file=sys.stderr)
@@ -45,7 +94,11 @@ def load_governance():
     with open(GOV, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
-def check_dataset(did: str, cfg: dict) -> dict:
+def check_dataset(did: str, cfg: dict, chunksize: int | None = None) -> dict:
+    """
+    chunksize=None → baca full CSV sekali (file kecil).
+    chunksize=N → streaming per N baris; state per rule dibatasi, memory konstan.
+    """
     path = ROOT / cfg["path"]
     res = {
         "dataset": did,
@@ -67,16 +120,17 @@ def check_dataset(did: str, cfg: dict) -> dict:
         res["checks"].append(("presence", "🔴 file not found"))
         return res
 
-    res["md5"] = _md5(path)
-    df = pd.read_csv(path)
-    res["row_count"] = len(df)
+    res["md5"] = md5sum(path)
     schema = cfg.get("schema", {}) or {}
+    pk = cfg.get("primary_key")
+    rules = cfg.get("checks", []) or []
+    date_col = cfg.get("date_column")
 
-    # Coerce + schema drift
-    cols = list(df.columns)
+    # Header dulu → schema drift tanpa baca data
+    cols = list(pd.read_csv(path, nrows=0).columns)
     res["columns"] = cols
-    drift_missing = [c for c in schema.keys() if c not in df.columns]
-    drift_new = [c for c in df.columns if c not in schema.keys()]
+    drift_missing = [c for c in schema.keys() if c not in cols]
+    drift_new = [c for c in cols if c not in schema.keys()]
     if drift_missing:
         res["status"] = "ERROR"; res["errors"] += 1
         res["checks"].append(("schema", f"🔴 missing cols: {drift_missing}"))
@@ -84,21 +138,72 @@ def check_dataset(did: str, cfg: dict) -> dict:
         res["warnings"] += 1
         res["checks"].append(("schema", f"🟠 extra cols: {drift_new}"))
 
-    # Typing + nulls
-    type_issues = []
-    null_issues = []
-    for col, logical in schema.items():
-        if col not in df.columns: 
-            continue
-        coerced = _coerce_dtype(df[col], logical)
-        bad = coerced.isna() & df[col].notna()
-        if bad.sum() > 0:
-            type_issues.append((col, logical, int(bad.sum())))
-        df[col] = coerced
-        null_ratio = df[col].isna().mean()
-        if null_ratio > 0:
-            null_issues.append((col, null_ratio))
+    # State per rule (ukurannya tidak tergantung jumlah baris, kecuali key tracker yang spill ke disk)
+    n_rows = 0
+    bad_types = {c: 0 for c in schema if c in cols}
+    n_nulls = {c: 0 for c in schema if c in cols}
+    rule_bad = [0] * len(rules)
+    max_date = pd.NaT
+    date_err = None
+    keys = _KeyTracker() if pk else None
+    anom = cfg.get("anomaly") or {}
+    anom_cols = [c for c in (date_col, anom.get("column"), anom.get("key")) if c] if anom else []
+    anom_parts = []
 
+    if chunksize:
+        chunks = pd.read_csv(path, chunksize=chunksize)
+    else:
+        chunks = [pd.read_csv(path)]
+    try:
+        for df in chunks:
+            n_rows += len(df)
+            # Typing + nulls
+            for col, logical in schema.items():
+                if col not in df.columns:
+                    continue
+                coerced = _coerce_dtype(df[col], logical)
+                bad_types[col] += int((coerced.isna() & df[col].notna()).sum())
+                df[col] = coerced
+                n_nulls[col] += int(df[col].isna().sum())
+            # Kolom untuk anomali (hanya waktu/nilai/key, bukan seluruh chunk)
+            if anom_cols and all(c in df.columns for c in anom_cols):
+                anom_parts.append(df[anom_cols].copy())
+            # Uniqueness
+            if keys is not None:
+                keys.add(df, pk)
+            # Expression & range
+            for i, rule in enumerate(rules):
+                if rule.get("type") == "expression":
+                    ok_mask = df.eval(rule["sql"])
+                    rule_bad[i] += int((~ok_mask).sum())
+                if rule.get("type") == "range":
+                    col = rule["column"]
+                    if col in df.columns:
+                        ge = rule.get("ge"); le = rule.get("le")
+                        bad = pd.Series(False, index=df.index)
+                        if ge is not None: bad |= df[col] < ge
+                        if le is not None: bad |= df[col] > le
+                        rule_bad[i] += int(bad.sum())
+            # Freshness (running max)
+            if date_col and date_col in df.columns and date_err is None:
+                try:
+                    dt = pd.to_datetime(df[date_col], errors="coerce", utc=True).dt.tz_localize(None)
+                    cmax = dt.max()
+                    if pd.notna(cmax) and (pd.isna(max_date) or cmax > max_date):
+                        max_date = cmax
+                except Exception as e:
+                    date_err = e
+    finally:
+        dup = keys.duplicates() if keys is not None else 0
+        if keys is not None:
+            keys.close()
+
+    res["row_count"] = n_rows
+
+    type_issues = [(c, schema[c], n) for c, n in bad_types.items() if n > 0]
+    # kolom `nullable:` di kontrak (mis. proxy yang butuh data opsional) tidak di-warn untuk null
+    nullable = set(cfg.get("nullable", []))
+    null_issues = [(c, n / n_rows if n_rows else 0.0) for c, n in n_nulls.items() if n > 0 and c not in nullable]
     if type_issues:
         res["warnings"] += 1
         res["checks"].append(("typing", f"🟠 coercion issues: {type_issues}"))
@@ -112,59 +217,101 @@ def check_dataset(did: str, cfg: dict) -> dict:
             res["warnings"] += 1
             res["checks"].append(("nulls", f"🟠 null ratios: {[(c, round(r,3)) for (c,r) in null_issues]}"))
 
-    # Uniqueness
-    pk = cfg.get("primary_key")
-    if pk:
-        dup = df.duplicated(subset=pk).sum()
-        if dup > 0:
-            res["status"] = "ERROR"; res["errors"] += 1
-            res["checks"].append(("unique", f"🔴 duplicates on {pk}: {dup}"))
+    if pk and dup > 0:
+        res["status"] = "ERROR"; res["errors"] += 1
+        res["checks"].append(("unique", f"🔴 duplicates on {pk}: {dup}"))
 
-    # Expression & range
-    for rule in cfg.get("checks", []):
+    for rule, bad in zip(rules, rule_bad):
+        if bad <= 0:
+            continue
         if rule.get("type") == "expression":
-            ok_mask = df.eval(rule["sql"])
-            bad = (~ok_mask).sum()
-            if bad > 0:
-                if rule.get("severity","error")=="warn":
-                    res["warnings"] += 1
-                    res["checks"].append(("expr", f"🟠 {rule['sql']} failed rows: {bad}"))
-                else:
-                    res["errors"] += 1; res["status"] = "ERROR"
-                    res["checks"].append(("expr", f"🔴 {rule['sql']} failed rows: {bad}"))
+            if rule.get("severity","error")=="warn":
+                res["warnings"] += 1
+                res["checks"].append(("expr", f"🟠 {rule['sql']} failed rows: {bad}"))
+            else:
+                res["errors"] += 1; res["status"] = "ERROR"
+                res["checks"].append(("expr", f"🔴 {rule['sql']} failed rows: {bad}"))
         if rule.get("type") == "range":
             col = rule["column"]
-            if col in df.columns:
-                ge = rule.get("ge"); le = rule.get("le")
-                bad = pd.Series(False, index=df.index)
-                if ge is not None: bad |= df[col] < ge
-                if le is not None: bad |= df[col] > le
-                nbad = bad.sum()
-                if nbad > 0:
-                    if rule.get("severity","warn")=="warn":
-                        res["warnings"] += 1
-                        res["checks"].append(("range", f"🟠 {col} out-of-range rows: {nbad}"))
-                    else:
-                        res["errors"] += 1; res["status"] = "ERROR"
-                        res["checks"].append(("range", f"🔴 {col} out-of-range rows: {nbad}"))
+            if rule.get("severity","warn")=="warn":
+                res["warnings"] += 1
+                res["checks"].append(("range", f"🟠 {col} out-of-range rows: {bad}"))
+            else:
+                res["errors"] += 1; res["status"] = "ERROR"
+                res["checks"].append(("range", f"🔴 {col} out-of-range rows: {bad}"))
 
     # Freshness
-    date_col = cfg.get("date_column")
-    if date_col and date_col in df.columns:
+    if date_col and date_col in cols:
         try:
-            dt = pd.to_datetime(df[date_col], errors="coerce", utc=True).dt.tz_localize(None)
-            maxd = dt.max()
-            lag = (datetime.utcnow() - maxd).days
+            if date_err is not None:
+                raise date_err
+            lag = (datetime.utcnow() - max_date).days
             limit = int(cfg.get("freshness_max_lag_days", 90))
             if lag > limit:
                 res["warnings"] += 1
-                res["checks"].append(("freshness", f"🟠 stale: max({date_col})={maxd.date()} lag={lag}d > {limit}d"))
+                res["checks"].append(("freshness", f"🟠 stale: max({date_col})={max_date.date()} lag={lag}d > {limit}d"))
         except Exception as e:
             res["warnings"] += 1
             res["checks"].append(("freshness", f"🟠 cannot parse {date_col}: {e}"))
 
+    if anom_parts:
+        _check_anomalies(res, did, anom, date_col, pd.concat(anom_parts, ignore_index=True),
+                         int(cfg.get("freshness_max_lag_days", 90)))
+
     return res
 
+def _check_anomalies(res: dict, did: str, anom: dict, date_col: str, df: pd.DataFrame, fresh_days: int = 90):
+    from anomaly_stream import AnomalyStream, to_ms
+    stream = AnomalyStream(f"quality.{did}", win=int(anom.get("window", 12)), k=float(anom.get("k", 3.0)))
+    col, key = anom["column"], anom.get("key")
+    cold = not stream.keys
+    new = stream.update_frame(df, date_col, col, key)
+    stream.save()
+    if cold and len(new):
+        # tanpa state (.build_cache tidak di-restore, mis. runner CI baru): seluruh histori ter-skor ulang →
+        # yang dianggap "baru" hanya anomali dalam jendela freshness dari tanggal terakhir data
+        t_max = to_ms(df[date_col]).max()
+        new = new[new["t"] >= t_max - fresh_days * 86_400_000]
+    recent = sorted((dict(a, key=k) for k in stream.keys for a in stream.anomalies(k)), key=lambda a: a["t"])[-5:]
+    def fmt(a):
+        z = f"z={a['z']:+.1f}" + (" (flat window)" if a.get("flat") else "")
+        return f"{'' if a['key'] == 'all' else a['key'] + ' '}{pd.Timestamp(a['t'], unit='ms').date()} {z}"
+    if len(new):
+        res["warnings"] += 1
+        latest = [fmt({"key": r.key, "t": r.t, "z": r.z, "flat": r.flat}) for r in new.tail(5).itertuples(index=False)]
+        res["checks"].append(("anomaly", f"🟠 {len(new)} new anomal(ies) in {col} ({stream.scored} new period(s) scored): {latest}"))
+    elif recent:
+        res["checks"].append(("anomaly", f"ℹ️ {col}: no new anomalies ({stream.scored} new period(s) scored); latest: {[fmt(a) for a in recent]}"))
+
+def _check_one(item):
+    did, cfg, chunksize = item
+    return did, check_dataset(did, cfg, chunksize=chunksize)
+
+def _pick_chunksize(cfg: dict, chunksize: int, stream_mb: float):
+    """Streaming kalau --chunksize diset, atau file lebih besar dari --stream-threshold-mb."""
+    if chunksize and chunksize > 0:
+        return chunksize
+    path = ROOT / cfg["path"]
+    if stream_mb and stream_mb > 0 and path.exists() and path.stat().st_size > stream_mb * (1 << 20):
+        return 500_000
+    return None
+
+def run_checks(datasets: dict, jobs: int = 1, chunksize: int = 0, stream_mb: float = 0) -> list:
+    """
+    Jalankan check_dataset untuk semua kontrak.
+    jobs > 1 → process pool (satu dataset per worker); jobs <= 0 → pakai semua CPU.
+    Urutan hasil selalu mengikuti urutan di governance/datasets.yml (deterministik).
+    """
+    items = [(did, cfg, _pick_chunksize(cfg, chunksize, stream_mb)) for did, cfg in datasets.items()]
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(items))
+    if jobs <= 1:
+        return [_check_one(it) for it in items]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        return list(ex.map(_check_one, items))
+
 def badge(status: str) -> str:
     return {"OK":"🟢","ERROR":"🔴","WARN":"🟠"}.get(status, "🟢")
 
@@ -172,6 +319,12 @@ def main():
     import argparse
     ap = argparse.ArgumentParser()
     ap.add_argument("--fail-on", choices=["none","warn","error"], default=os.getenv("DQ_FAIL_ON","none"))
+    ap.add_argument("--jobs", type=int, default=int(os.getenv("DQ_JOBS", "1")),
+                    help="Jumlah worker process untuk cek dataset paralel (0 = semua CPU)")
+    ap.add_argument("--chunksize", type=int, default=int(os.getenv("DQ_CHUNKSIZE", "0")),
+                    help="Validasi streaming per N baris (0 = baca full CSV)")
+    ap.add_argument("--stream-threshold-mb", type=float, default=float(os.getenv("DQ_STREAM_MB", "256")),
+                    help="File lebih besar dari ini otomatis divalidasi secara streaming (0 = off)")
     args = ap.parse_args()
 
     gov = load_governance()
@@ -180,8 +333,8 @@ def main():
     global_errors = 0
     global_warns = 0
 
-    for did, cfg in datasets.items():
-        r = check_dataset(did, cfg)
+    results = run_checks(datasets, jobs=args.jobs, chunksize=args.chunksize, stream_mb=args.stream_threshold_mb)
+    for did, r in results:
         rows.append({
             "Dataset": did,
             "Owner": r["owner"],
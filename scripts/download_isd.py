@@ -1,54 +1,189 @@
 #!/usr/bin/env python3
-import csv, os, sys, argparse, urllib.request, gzip, shutil
+"""
+Downloader NOAA ISD (station-year .gz) — konkuren, resumable, dengan index stasiun ter-cache.
 
-HIST_CSV = "data/noaa_isd/isd-history.csv"
-BASE_URL = "https://www.ncei.noaa.gov/pub/data/noaa"
+- isd-history.csv di-parse sekali (pandas) → data/noaa_isd/isd_index.json
+  {ICAO: [[usaf, wban, begin, end], ...]}; dibangun ulang hanya kalau md5 history berubah
+- Station-year hanya diunduh kalau tahun ada di periode validitas stasiun (BEGIN..END)
+- Thread pool terbatas (--jobs), streaming per chunk ke <file>.part (memory konstan),
+  resume via HTTP Range, retry + backoff, verifikasi ukuran (Content-Length/Content-Range)
+- Skip file yang sudah ada (--verify: cek ukuran ke server via HEAD dulu)
 
-def download(url, out_path):
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    print("Downloading:", url)
-    with urllib.request.urlopen(url, timeout=60) as r, open(out_path, "wb") as f:
-        f.write(r.read())
-    print("Saved:", out_path)
+Contoh:
+  python scripts/download_isd.py --icaos OMDB EGLL --year 2024
+  python scripts/download_isd.py --icaos-file icaos.txt --year 2015 2024 --jobs 16
+"""
+import os, sys, json, time, argparse, urllib.request, urllib.error
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
-def ensure_history():
-    if not os.path.exists(HIST_CSV):
-        download("https://www.ncei.noaa.gov/pub/data/noaa/isd-history.csv", HIST_CSV)
+from build_cache import md5sum
 
-def find_usaf_wban(icaos):
+ROOT = Path(__file__).resolve().parents[1]
+ISD_DIR = ROOT / "data" / "noaa_isd"
+HIST_CSV = ISD_DIR / "isd-history.csv"
+INDEX_JSON = ISD_DIR / "isd_index.json"
+BASE_URL = os.getenv("ISD_BASE_URL", "https://www.ncei.noaa.gov/pub/data/noaa")  # override: mirror lokal
+HIST_URL = f"{BASE_URL}/isd-history.csv"
+CHUNK = 1 << 20
+
+def _http(url, method="GET", headers=None, timeout=60):
+    req = urllib.request.Request(url, method=method, headers=headers or {})
+    return urllib.request.urlopen(req, timeout=timeout)
+
+def remote_size(url):
+    try:
+        with _http(url, "HEAD", timeout=30) as r:
+            n = r.headers.get("Content-Length")
+            return int(n) if n else None
+    except Exception:
+        return None
+
+def download(url, out_path: Path, retries: int = 3, verify: bool = False) -> str:
+    """Return status: 'skip' | 'ok' | 'resumed' | 'missing'. Raise kalau gagal setelah retry."""
+    out_path = Path(out_path)
+    if out_path.exists():
+        if not verify:
+            return "skip"
+        size = remote_size(url)
+        if size is None or size == out_path.stat().st_size:
+            return "skip"
+        print(f"[WARN] {out_path.name}: size {out_path.stat().st_size} != remote {size} → re-download", file=sys.stderr)
+        out_path.unlink()
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    part = out_path.with_name(out_path.name + ".part")
+    resumed = False
+    for attempt in range(1, retries + 1):
+        have = part.stat().st_size if part.exists() else 0
+        headers = {"Range": f"bytes={have}-"} if have else {}
+        try:
+            with _http(url, headers=headers) as r:
+                if have and r.status == 206:
+                    # Content-Range: bytes start-end/total
+                    total = int(r.headers.get("Content-Range", "").rsplit("/", 1)[-1] or 0) or None
+                    mode, resumed = "ab", True
+                else:
+                    n = r.headers.get("Content-Length")
+                    total, mode, have = (int(n) if n else None), "wb", 0
+                with open(part, mode) as f:
+                    while True:
+                        buf = r.read(CHUNK)
+                        if not buf:
+                            break
+                        f.write(buf)
+            size = part.stat().st_size
+            if total is not None and size != total:
+                raise IOError(f"size mismatch: got {size}, expected {total}")
+            part.replace(out_path)
+            return "resumed" if resumed else "ok"
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                part.unlink(missing_ok=True)
+                return "missing"
+            if e.code == 416:
+                # Range di luar ukuran file → .part korup/kelebihan, mulai dari nol
+                part.unlink(missing_ok=True)
+            err = e
+        except Exception as e:
+            err = e
+        if attempt < retries:
+            time.sleep(2 ** attempt)
+    raise RuntimeError(f"{url}: {err}")
+
+def ensure_history(refresh: bool = False):
+    if refresh or not HIST_CSV.exists():
+        print("Downloading:", HIST_URL)
+        if HIST_CSV.exists():
+            HIST_CSV.unlink()
+        download(HIST_URL, HIST_CSV)
+
+def load_index() -> dict:
+    """ICAO → [[usaf, wban, begin, end], ...] (begin/end = YYYYMMDD int, 0 kalau kosong)."""
+    md5 = md5sum(HIST_CSV)
+    if INDEX_JSON.exists():
+        cached = json.loads(INDEX_JSON.read_text(encoding="utf-8"))
+        if cached.get("md5") == md5:
+            return cached["stations"]
+    import pandas as pd
+    h = pd.read_csv(HIST_CSV, dtype=str, usecols=["USAF", "WBAN", "ICAO", "BEGIN", "END"], keep_default_na=False)
+    h = h.apply(lambda s: s.str.strip())
+    h = h[(h["ICAO"] != "") & (h["USAF"] != "") & (h["WBAN"] != "")]
+    for c in ("BEGIN", "END"):
+        h[c] = pd.to_numeric(h[c], errors="coerce").fillna(0).astype(int)
+    h = h.sort_values(["ICAO", "END"], ascending=[True, False])
+    stations = {icao: g[["USAF", "WBAN", "BEGIN", "END"]].values.tolist() for icao, g in h.groupby("ICAO", sort=False)}
+    INDEX_JSON.write_text(json.dumps({"md5": md5, "stations": stations}), encoding="utf-8")
+    print(f"[ok] station index: {len(stations)} ICAO → {INDEX_JSON}")
+    return stations
+
+def find_usaf_wban(icaos, index=None, year=None):
+    """[(icao, usaf, wban)]; kalau `year` diberikan, hanya stasiun yang valid di tahun itu."""
+    index = index if index is not None else load_index()
     out = []
-    with open(HIST_CSV, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        # Columns typically include: USAF,WBAN,CTRY,ST,ICAO,LAT,LON,ELEV...,BEGIN,END
-        for row in reader:
-            icao = (row.get("ICAO") or "").strip()
-            if icao in icaos:
-                usaf = (row.get("USAF") or "").strip()
-                wban = (row.get("WBAN") or "").strip()
-                if usaf and wban:
-                    out.append((icao, usaf, wban))
+    for icao in icaos:
+        for usaf, wban, begin, end in index.get(icao, []):
+            if year is None or ((not begin or begin // 10000 <= year) and (not end or end // 10000 >= year)):
+                out.append((icao, str(usaf), str(wban)))
     return out
 
+def _read_icaos(args):
+    icaos = [c.upper() for c in (args.icaos or [])]
+    if args.icaos_file:
+        for line in Path(args.icaos_file).read_text(encoding="utf-8").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                icaos.append(line.upper())
+    return list(dict.fromkeys(icaos))
+
 def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--icaos", nargs="+", required=True, help="ICAO codes, e.g., OMDB EGLL")
-    ap.add_argument("--year", type=int, required=True, help="Year, e.g., 2025")
+    ap = argparse.ArgumentParser(description="Concurrent, resumable NOAA ISD station-year downloader.")
+    ap.add_argument("--icaos", nargs="+", help="ICAO codes, e.g., OMDB EGLL")
+    ap.add_argument("--icaos-file", help="File berisi ICAO (satu per baris)")
+    ap.add_argument("--year", type=int, nargs="+", required=True, help="Tahun, atau rentang START END (e.g., 2015 2024)")
+    ap.add_argument("--jobs", type=int, default=8, help="Download paralel")
+    ap.add_argument("--retries", type=int, default=3)
+    ap.add_argument("--verify", action="store_true", help="Cek ukuran file yang sudah ada ke server (HEAD)")
+    ap.add_argument("--refresh-history", action="store_true", help="Unduh ulang isd-history.csv")
     args = ap.parse_args()
 
-    ensure_history()
-    stations = find_usaf_wban(set([c.upper() for c in args.icaos]))
-    if not stations:
+    icaos = _read_icaos(args)
+    if not icaos:
+        ap.error("--icaos atau --icaos-file wajib diisi")
+    years = list(range(args.year[0], args.year[-1] + 1)) if len(args.year) == 2 else args.year
+
+    ensure_history(args.refresh_history)
+    index = load_index()
+    unknown = [c for c in icaos if c not in index]
+    if unknown:
+        print(f"[WARN] ICAO not in isd-history: {unknown}", file=sys.stderr)
+
+    tasks = []
+    for year in years:
+        for icao, usaf, wban in find_usaf_wban(icaos, index, year):
+            fname = f"{usaf}-{wban}-{year}.gz"
+            tasks.append((icao, f"{BASE_URL}/{year}/{fname}", ISD_DIR / fname))
+    if not tasks:
         print("No stations found; check ICAO codes.")
         sys.exit(2)
 
-    for icao, usaf, wban in stations:
-        fname = f"{usaf}-{wban}-{args.year}.gz"
-        url = f"{BASE_URL}/{args.year}/{fname}"
-        out_path = os.path.join("data", "noaa_isd", fname)
-        try:
-            download(url, out_path)
-        except Exception as e:
-            print(f"Failed {icao} {url}: {e}")
+    t0 = time.perf_counter()
+    counts = {}
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as ex:
+        futs = {ex.submit(download, url, out, args.retries, args.verify): (icao, url) for icao, url, out in tasks}
+        for fut in as_completed(futs):
+            icao, url = futs[fut]
+            try:
+                status = fut.result()
+            except Exception as e:
+                status = "failed"
+                print(f"Failed {icao} {url}: {e}")
+            counts[status] = counts.get(status, 0) + 1
+            if status in ("ok", "resumed"):
+                print(f"Saved: {url.rsplit('/', 1)[-1]} ({icao}{', resumed' if status == 'resumed' else ''})")
+    print(f"[ok] {len(tasks)} station-year(s) in {time.perf_counter() - t0:.1f}s: "
+          + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    return 1 if counts.get("failed") else 0
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -2,7 +2,7 @@
 """
 Ensure Hub Rank assets are present and consistent.
 
-- Prefer CSV -> JSON
+- Prefer CSV -> JSON (skip kalau JSON lebih baru dari CSV)
 - If CSV empty and JSON exists -> JSON -> CSV
 - If both missing/empty -> write a sensible Top-20 fallback (same as current chart)
 """
@@ -11,11 +11,14 @@ from pathlib import Path
 import json
 import pandas as pd
 
+import chart_spec as cs
+
 ROOT = Path(__file__).resolve().parents[1]
 DOCS = ROOT / "docs"
 ASSETS = DOCS / "assets"
 CSV = ASSETS / "hub_rank.csv"
 JSONP = ASSETS / "hub_rank.json"
+TOP_N = 20
 
 # Fallback (sesuai grafik yang tampil sekarang)
 FALLBACK_X = [
@@ -54,39 +57,45 @@ def json_has_xy(p: Path):
     except Exception:
         return False, [], []
 
-def write_json_from_df(df: pd.DataFrame):
-    # heuristik kolom
+def pick_cols(df: pd.DataFrame):
+    # heuristik kolom label/nilai (pagerank dari build_adv_assets, score dari fallback)
     label_pref = ["iata", "airport", "name", "node", "label"]
-    val_pref = ["score", "degree", "pagerank", "value", "num_routes"]
-    def pick(cols, pref):
-        for c in pref:
-            if c in cols: return c
-        return cols[0] if cols else None
+    val_pref = ["pagerank", "score", "degree", "value", "num_routes"]
     cols = list(df.columns)
-    label = pick(cols, label_pref)
+    label = next((c for c in label_pref if c in cols), cols[0] if cols else None)
     num_cols = [c for c in cols if pd.api.types.is_numeric_dtype(df[c])]
-    val = pick(cols, val_pref) if any(c in cols for c in val_pref) else (num_cols[0] if num_cols else None)
+    val = next((c for c in val_pref if c in cols), num_cols[0] if num_cols else None)
+    return label, val
+
+def hub_rank_figure(df: pd.DataFrame, n: int = TOP_N, horizontal: bool = False) -> cs.Figure:
+    """
+    Satu spec untuk hub_rank.json (dipakai build_adv_assets, build_hub_rank_json, dan script ini).
+    build_adv_assets: top-30 horizontal (PageRank); fallback dari CSV/JSON di sini: top-20 vertikal.
+    """
+    label, val = pick_cols(df)
     if not label or not val:
         raise ValueError("Cannot determine label/value columns for JSON build.")
-    top = df.sort_values(val, ascending=False).head(20)
-    fig = {
-        "data": [{
-            "type": "bar",
-            "x": top[label].astype(str).tolist(),
-            "y": top[val].astype(float).tolist(),
-            "name": "Top-20",
-            "hovertemplate": "%{x}: %{y:,}<extra></extra>"
-        }],
-        "layout": {
-            "title": {"text": "Top-20 airport degree (total)"},
+    hover = "%{y}: %{x:.4g}<extra></extra>" if horizontal else "%{x}: %{y:.4g}<extra></extra>"
+    trace = cs.bars(df[label], df[val], name=f"Top-{n}", n=n, horizontal=horizontal, decimals=6, hovertemplate=hover)
+    if horizontal:
+        layout = {
+            "margin": {"l": 80, "r": 10, "t": 20, "b": 40},
+            "xaxis": {"title": "PageRank" if val == "pagerank" else val},
+            "yaxis": {"title": "Airport (IATA)"},
+            "height": 520
+        }
+    else:
+        layout = {
+            "title": {"text": f"Top-{n} airports by {val}"},
             "margin": {"l": 50, "r": 10, "t": 30, "b": 90},
             "xaxis": {"tickangle": -45, "automargin": True},
-            "yaxis": {"title": val, "automargin": True, "tickformat": ",d"},
+            "yaxis": {"title": val, "automargin": True},
             "height": 520
         }
-    }
-    JSONP.write_text(json.dumps(fig), encoding="utf-8")
-    print("[ok] wrote", JSONP)
+    return cs.Figure("hub_rank", [trace], layout)
+
+def write_json_from_df(df: pd.DataFrame):
+    hub_rank_figure(df).write(ASSETS)
 
 def write_csv_from_xy(x, y):
     df = pd.DataFrame({"iata": list(map(str, x)), "score": y})
@@ -101,6 +110,10 @@ def main():
     json_ok, xj, yj = json_has_xy(JSONP)
 
     if csv_ok:
+        # JSON dari build_adv_assets sudah dibangun dari CSV yang sama → tidak perlu ditulis ulang
+        if json_ok and JSONP.stat().st_mtime >= CSV.stat().st_mtime:
+            print("[ok] hub_rank.json up to date")
+            return 0
         df = pd.read_csv(CSV)
         write_json_from_df(df)
         return 0
@@ -6,10 +6,12 @@ Snowflake loader (pro):
 - --table-prefix RAW.
 - Idempotent: stage overwrite + MATCH_BY_COLUMN_NAME
 """
-import os, sys, argparse, glob, hashlib
+import os, sys, argparse, glob
 from pathlib import Path
 import pandas as pd
 
+from build_cache import md5sum
+
 ACCOUNT = os.getenv("SNOWFLAKE_ACCOUNT")
 USER    = os.getenv("SNOWFLAKE_USER")
 PWD     = os.getenv("SNOWFLAKE_PASSWORD")
@@ -18,12 +20,6 @@ WH      = os.getenv("SNOWFLAKE_WAREHOUSE", "")
 DB      = os.getenv("SNOWFLAKE_DATABASE", "")
 SCHEMA  = os.getenv("SNOWFLAKE_SCHEMA", "")
 
-def md5sum(p: Path) -> str:
-    h = hashlib.md5()
-    with open(p, "rb") as f:
-        for chunk in iter(lambda: f.read(1<<20), b""): h.update(chunk)
-    return h.hexdigest()
-
 def connect():
     import snowflake.connector as sf
     ctx = sf.connect(
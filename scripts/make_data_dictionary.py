@@ -40,99 +40,132 @@ def preview_markdown(df: pd.DataFrame, max_rows: int = 5) -> str:
     # Keep small width
     return df2.to_markdown(index=False)
 
-def describe_relation(con: duckdb.DuckDBPyConnection, rel_sql: str, src_label: str) -> Dict:
+def _profile_sql(cols: List[Dict], rel: str, approx: bool) -> str:
+    """One aggregate SELECT that computes nulls/distinct/min/max/avg for every column."""
+    exprs = ["COUNT(*) AS n_rows"]
+    for i, c in enumerate(cols):
+        q = qident(c["name"])
+        distinct = f"approx_count_distinct({q})" if approx else f"COUNT(DISTINCT {q})"
+        exprs.append(f"(COUNT(*) - COUNT({q}))::BIGINT AS c{i}_nulls")
+        exprs.append(f"{distinct}::BIGINT AS c{i}_distinct")
+        if is_numeric(c["type"]) or is_datetime(c["type"]):
+            exprs.append(f"MIN({q}) AS c{i}_min")
+            exprs.append(f"MAX({q}) AS c{i}_max")
+        if is_numeric(c["type"]):
+            exprs.append(f"AVG({q}) AS c{i}_avg")
+    return "SELECT\n  " + ",\n  ".join(exprs) + f"\nFROM {rel}"
+
+def _topk_sql(text_cols: List[str], rel: str, k: int) -> str:
+    """
+    Top-k for all text columns in one grouped scan (GROUPING SETS, one set per column).
+    g = position in text_cols, v = value as VARCHAR (NULL kept as its own group).
+    """
+    g_case = " ".join(f"WHEN GROUPING({qident(c)}) = 0 THEN {i}" for i, c in enumerate(text_cols))
+    v_case = " ".join(f"WHEN GROUPING({qident(c)}) = 0 THEN {qident(c)}::VARCHAR" for c in text_cols)
+    sets = ", ".join(f"({qident(c)})" for c in text_cols)
+    return f"""
+    SELECT g, v, c FROM (
+      SELECT CASE {g_case} END AS g, CASE {v_case} END AS v, COUNT(*) AS c
+      FROM {rel}
+      GROUP BY GROUPING SETS ({sets})
+    )
+    QUALIFY row_number() OVER (PARTITION BY g ORDER BY c DESC NULLS LAST, v) <= {int(k)}
+    ORDER BY g, c DESC, v
+    """
+
+def _topk_rows(con: duckdb.DuckDBPyConnection, text_cols: List[str], rel: str, k: int):
+    """
+    Top-k as (column, value, count). One GROUPING SETS scan; if it fails (e.g. one column
+    cannot be cast to VARCHAR), fall back to one query per column so the rest keep their top-k.
+    NULL groups come back from .df() as NaN → mapped to None (rendered "None").
+    """
+    def rows(cols):
+        tk = con.execute(_topk_sql(cols, rel, k)).df()
+        return [(cols[int(g)], None if pd.isna(v) else v, c) for g, v, c in zip(tk["g"], tk["v"], tk["c"])]
+    try:
+        return rows(text_cols)
+    except Exception:
+        out = []
+        for c in text_cols:
+            try:
+                out += rows([c])
+            except Exception as e:
+                print(f"[WARN] top-k {c}: {e}", file=sys.stderr)
+        return out
+
+def describe_relation(con: duckdb.DuckDBPyConnection, rel_sql: str, src_label: str,
+                      approx: bool = False, sample_rows: int = 100_000,
+                      materialize: bool = True, topk: int = 5) -> Dict:
     """
     rel_sql: e.g. read_csv_auto('path', header=true)  OR  (SELECT * FROM my_table)
     Returns dict with: row_count, columns: [{name, type, stats, topk}]
+
+    Source di-materialise sekali ke temp table, lalu semua statistik kolom dihitung
+    dalam satu agregat + satu GROUPING SETS scan (bukan 2-3 query per kolom).
+    approx=True: distinct via HyperLogLog (approx_count_distinct) dan top-k dari
+    reservoir sample `sample_rows` baris (count diskalakan, ditandai "~").
     """
-    # Get schema via DESCRIBE
-    desc = con.execute(f"DESCRIBE SELECT * FROM {rel_sql}").df()
-    cols = [{"name": r["column_name"], "type": r["column_type"]} for _, r in desc.iterrows()]
-
-    # Row count
-    n_rows = con.execute(f"SELECT COUNT(*) FROM {rel_sql}").fetchone()[0]
-
-    # Preview
-    prev = con.execute(f"SELECT * FROM {rel_sql} LIMIT 5").df()
-
-    # Column stats
-    out_cols = []
-    for c in cols:
-        name = c["name"]
-        dtype = c["type"]
-        col_sql = f"{rel_sql}"
-        stats = {}
-        # nulls & distinct
-        stats_df = con.execute(
-            f"""
-            SELECT 
-              COUNT(*) AS n_total,
-              (COUNT(*) - COUNT({qident(name)}))::BIGINT AS n_nulls,
-              COUNT(DISTINCT {qident(name)})::BIGINT AS n_distinct
-            FROM {col_sql}
-            """
-        ).df().iloc[0]
-        stats["n_total"] = int(stats_df["n_total"])
-        stats["n_nulls"] = int(stats_df["n_nulls"])
-        stats["n_distinct"] = int(stats_df["n_distinct"])
-
-        if is_numeric(dtype):
-            num_df = con.execute(
-                f"""
-                SELECT 
-                  MIN({qident(name)}) AS min_v,
-                  MAX({qident(name)}) AS max_v,
-                  AVG({qident(name)}) AS avg_v
-                FROM {col_sql}
-                """
-            ).df().iloc[0]
-            stats["min"] = num_df["min_v"]
-            stats["max"] = num_df["max_v"]
-            stats["avg"] = float(num_df["avg_v"]) if pd.notna(num_df["avg_v"]) else None
-            topk_list = []  # for numeric, show no topk by default
-        elif is_datetime(dtype):
-            dt_df = con.execute(
-                f"""
-                SELECT 
-                  MIN({qident(name)}) AS min_v,
-                  MAX({qident(name)}) AS max_v
-                FROM {col_sql}
-                """
-            ).df().iloc[0]
-            stats["min"] = dt_df["min_v"]
-            stats["max"] = dt_df["max_v"]
-            stats["avg"] = None
-            topk_list = []
-        else:
-            # text-ish: show top-5 values
-            try:
-                topk_df = con.execute(
-                    f"""
-                    SELECT {qident(name)} AS val, COUNT(*) AS c
-                    FROM {col_sql}
-                    GROUP BY 1
-                    ORDER BY c DESC NULLS LAST, val
-                    LIMIT 5
-                    """
-                ).df()
-                topk_list = [f"{str(v)} ({int(c)})" for v, c in zip(topk_df["val"], topk_df["c"])]
-            except Exception:
-                topk_list = []
-
-            stats["min"] = None
-            stats["max"] = None
-            stats["avg"] = None
-
-        out_cols.append({
-            "name": name,
-            "type": dtype,
-            "stats": stats,
-            "topk": topk_list
-        })
+    rel = rel_sql
+    if materialize:
+        con.execute(f"CREATE OR REPLACE TEMP TABLE _dd_rel AS SELECT * FROM {rel_sql}")
+        rel = "_dd_rel"
+
+    try:
+        # Get schema via DESCRIBE
+        desc = con.execute(f"DESCRIBE SELECT * FROM {rel}").df()
+        cols = [{"name": r["column_name"], "type": r["column_type"]} for _, r in desc.iterrows()]
+
+        # Preview
+        prev = con.execute(f"SELECT * FROM {rel} LIMIT 5").df()
+
+        # All column stats in one scan
+        agg = con.execute(_profile_sql(cols, rel, approx)).df().iloc[0]
+        n_rows = int(agg["n_rows"])
+
+        # Top-k for text-ish columns in one grouped scan
+        text_cols = [c["name"] for c in cols if not is_numeric(c["type"]) and not is_datetime(c["type"])]
+        topk_map: Dict[str, List[str]] = {c: [] for c in text_cols}
+        if text_cols and n_rows > 0:
+            topk_rel = rel
+            scale = 1.0
+            if approx and n_rows > sample_rows:
+                topk_rel = f"(SELECT * FROM {rel} USING SAMPLE reservoir({int(sample_rows)} ROWS) REPEATABLE (42))"
+                scale = n_rows / float(sample_rows)
+            for name, v, c in _topk_rows(con, text_cols, topk_rel, topk):
+                cnt = f"~{int(round(c * scale))}" if scale != 1.0 else f"{int(c)}"
+                topk_map[name].append(f"{str(v)} ({cnt})")
+
+        out_cols = []
+        for i, c in enumerate(cols):
+            name = c["name"]
+            dtype = c["type"]
+            stats = {
+                "n_total": n_rows,
+                "n_nulls": int(agg[f"c{i}_nulls"]),
+                "n_distinct": int(agg[f"c{i}_distinct"]),
+                "min": None,
+                "max": None,
+                "avg": None,
+            }
+            if is_numeric(dtype) or is_datetime(dtype):
+                stats["min"] = None if pd.isna(agg[f"c{i}_min"]) else agg[f"c{i}_min"]
+                stats["max"] = None if pd.isna(agg[f"c{i}_max"]) else agg[f"c{i}_max"]
+            if is_numeric(dtype):
+                stats["avg"] = float(agg[f"c{i}_avg"]) if pd.notna(agg[f"c{i}_avg"]) else None
+
+            out_cols.append({
+                "name": name,
+                "type": dtype,
+                "stats": stats,
+                "topk": topk_map.get(name, [])
+            })
+    finally:
+        if materialize:
+            con.execute("DROP TABLE IF EXISTS _dd_rel")
 
     return {
         "source": src_label,
-        "row_count": int(n_rows),
+        "row_count": n_rows,
         "preview": prev,
         "columns": out_cols
     }
@@ -187,6 +220,8 @@ def main():
     ap.add_argument("--duckdb", type=str, default=None, help="Path DuckDB (mis. warehouse_local/otp.duckdb)")
     ap.add_argument("--tables", type=str, default="", help="Comma-separated list tabel DuckDB yang mau didokumentasi")
     ap.add_argument("--out", type=str, default="docs/data_dictionary.md", help="Output Markdown path")
+    ap.add_argument("--approx", action="store_true", help="Mode cepat: HyperLogLog distinct + top-k dari reservoir sample")
+    ap.add_argument("--sample-rows", type=int, default=100_000, help="Ukuran reservoir sample untuk top-k (mode --approx)")
     args = ap.parse_args()
 
     ensure_parent(args.out)
@@ -204,7 +239,7 @@ def main():
             for p in csv_files:
                 path_escaped = str(p).replace("'", "''")  # escape single-quote untuk SQL string
                 rel = f"read_csv_auto('{path_escaped}', header=true)"
-                dd = describe_relation(con, rel, f"CSV: {p}")
+                dd = describe_relation(con, rel, f"CSV: {p}", approx=args.approx, sample_rows=args.sample_rows)
                 sections.append(dict_to_markdown(p.name, dd))
 
     # 2) DuckDB tables
@@ -212,7 +247,9 @@ def main():
         wanted = [t.strip() for t in args.tables.split(",") if t.strip()]
         for t in wanted:
             rel = f"(SELECT * FROM {qident(t)})"
-            dd = describe_relation(con, rel, f"DuckDB table: {t}")
+            # tabel DuckDB sudah kolumnar → tidak perlu materialise ulang
+            dd = describe_relation(con, rel, f"DuckDB table: {t}", approx=args.approx,
+                                   sample_rows=args.sample_rows, materialize=False)
             sections.append(dict_to_markdown(f"{t} (DuckDB)", dd))
 
     # Assemble markdown
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+OD lookup index untuk route_counts: adjacency CSR (out & in) sebagai file .npy
+yang bisa di-memmap, jadi query tetangga satu bandara = slice array, bukan filter pandas.
+
+Layout data/derived/od_index/:
+  nodes.npy                          IATA terurut (U-string, id = posisi)
+  out_indptr.npy, out_indices.npy, out_weight.npy   baris = asal, tetangga urut num_routes desc
+  in_indptr.npy,  in_indices.npy,  in_weight.npy    baris = tujuan
+  meta.json                          md5 sumber, jumlah node/edge
+
+Contoh:
+  python scripts/od_index.py --build
+  python scripts/od_index.py DXB --top 10 --hops 2
+
+  from od_index import ODIndex
+  idx = ODIndex.load()
+  idx.top_destinations("DXB", 5)     # [("LHR", 5), ...]
+  idx.k_hop("CGK", 2)                # {"SIN": 1, "LHR": 2, ...} IATA terjangkau ≤ 2 leg → jumlah leg minimum
+"""
+from __future__ import annotations
+import argparse, json
+from pathlib import Path
+import numpy as np
+
+from route_graph import encode_edges
+from build_cache import BuildCache, md5sum
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLISH = ROOT / "publish"
+INDEX_DIR = ROOT / "data" / "derived" / "od_index"
+ARRAYS = ("nodes", "out_indptr", "out_indices", "out_weight", "in_indptr", "in_indices", "in_weight")
+
+def _csr(rows: np.ndarray, cols: np.ndarray, w: np.ndarray, n: int):
+    """CSR (indptr, indices, weight); dalam tiap baris urut weight desc lalu id tujuan."""
+    order = np.lexsort((cols, -w, rows))
+    counts = np.bincount(rows, minlength=n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, cols[order].astype(np.int32), w[order].astype(np.int32)
+
+def build_index(csv_path: Path = PUBLISH / "route_counts.csv", out_dir: Path = INDEX_DIR) -> bool:
+    from publish_loader import read_publish
+    if not csv_path.exists():
+        print(f"[skip] od_index: {csv_path} not found")
+        return False
+    rc = read_publish(csv_path).dropna(subset=["src_iata", "dst_iata"])
+    nodes, si, di, w = encode_edges(rc["src_iata"].astype(str), rc["dst_iata"].astype(str),
+                                    rc["num_routes"].fillna(0))
+    n = len(nodes)
+    arrays = {"nodes": nodes}
+    arrays["out_indptr"], arrays["out_indices"], arrays["out_weight"] = _csr(si, di, w, n)
+    arrays["in_indptr"], arrays["in_indices"], arrays["in_weight"] = _csr(di, si, w, n)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(out_dir / f"{name}.npy", arr)
+    meta = {"source": csv_path.name, "md5": md5sum(csv_path), "nodes": n, "edges": int(len(si))}
+    (out_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    print(f"[ok] od_index: {n} nodes, {len(si)} edges → {out_dir}")
+    return True
+
+class ODIndex:
+    """Query API di atas array CSR (memmap read-only secara default)."""
+
+    def __init__(self, arrays: dict):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self._id = {code: i for i, code in enumerate(self.nodes.tolist())}
+
+    @classmethod
+    def load(cls, index_dir: Path = INDEX_DIR, mmap: bool = True) -> "ODIndex":
+        mode = "r" if mmap else None
+        return cls({name: np.load(Path(index_dir) / f"{name}.npy", mmap_mode=mode) for name in ARRAYS})
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, iata: str):
+        return iata in self._id
+
+    def node_id(self, iata: str) -> int:
+        try:
+            return self._id[iata]
+        except KeyError:
+            raise KeyError(f"unknown airport {iata!r}") from None
+
+    def _row(self, side: str, iata: str):
+        i = self.node_id(iata)
+        indptr = getattr(self, f"{side}_indptr")
+        lo, hi = int(indptr[i]), int(indptr[i + 1])
+        return getattr(self, f"{side}_indices")[lo:hi], getattr(self, f"{side}_weight")[lo:hi]
+
+    def out_neighbors(self, iata: str) -> list:
+        """Tujuan langsung dari `iata`, urut num_routes desc."""
+        return self.nodes[self._row("out", iata)[0]].tolist()
+
+    def in_neighbors(self, iata: str) -> list:
+        """Asal yang punya rute langsung ke `iata`, urut num_routes desc."""
+        return self.nodes[self._row("in", iata)[0]].tolist()
+
+    def top_destinations(self, iata: str, n: int = 10) -> list:
+        """[(tujuan, num_routes)] Top-N; baris CSR sudah terurut → cukup slice."""
+        idx, w = self._row("out", iata)
+        return list(zip(self.nodes[idx[:n]].tolist(), w[:n].tolist()))
+
+    def k_hop(self, iata: str, k: int = 2, direction: str = "out") -> dict:
+        """{iata: jumlah leg minimum} untuk semua bandara terjangkau dalam ≤ k leg (BFS per frontier)."""
+        indptr = getattr(self, f"{direction}_indptr")
+        indices = getattr(self, f"{direction}_indices")
+        dist = np.full(len(self.nodes), -1, dtype=np.int32)
+        src = self.node_id(iata)
+        dist[src] = 0
+        frontier = np.array([src], dtype=np.int64)
+        for hop in range(1, k + 1):
+            if not len(frontier):
+                break
+            lo, hi = indptr[frontier], indptr[frontier + 1]
+            lens = hi - lo
+            # gather semua tetangga frontier tanpa loop Python per node
+            pos = np.repeat(lo - np.cumsum(np.r_[0, lens[:-1]]), lens) + np.arange(lens.sum())
+            nxt = np.unique(indices[pos])
+            nxt = nxt[dist[nxt] < 0]
+            dist[nxt] = hop
+            frontier = nxt.astype(np.int64)
+        hit = np.flatnonzero(dist > 0)
+        return dict(zip(self.nodes[hit].tolist(), dist[hit].tolist()))
+
+def ensure_index(csv_path: Path = PUBLISH / "route_counts.csv", out_dir: Path = INDEX_DIR) -> bool:
+    """Build ulang hanya kalau route_counts / script berubah (build_cache.py)."""
+    cache = BuildCache(__file__)
+    cache.run("od_index", lambda: build_index(csv_path, out_dir), [csv_path],
+              [out_dir / f"{a}.npy" for a in ARRAYS] + [out_dir / "meta.json"], extra={"out": str(out_dir)})
+    return (out_dir / "meta.json").exists()
+
+def main():
+    ap = argparse.ArgumentParser(description="Build/query the CSR OD index over route_counts.")
+    ap.add_argument("airport", nargs="?", help="IATA untuk di-query")
+    ap.add_argument("--build", action="store_true", help="Build index (incremental)")
+    ap.add_argument("--csv", type=Path, default=PUBLISH / "route_counts.csv")
+    ap.add_argument("--index-dir", type=Path, default=INDEX_DIR)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--hops", type=int, default=0, help="Tampilkan jumlah bandara terjangkau ≤ N leg")
+    args = ap.parse_args()
+
+    if args.build or not (args.index_dir / "meta.json").exists():
+        ensure_index(args.csv, args.index_dir)
+    if not args.airport:
+        return 0
+    idx = ODIndex.load(args.index_dir)
+    code = args.airport.upper()
+    if code not in idx:
+        print(f"[WARN] {code} not in index")
+        return 1
+    print(f"{code}: out={len(idx.out_neighbors(code))} in={len(idx.in_neighbors(code))}")
+    for dst, w in idx.top_destinations(code, args.top):
+        print(f"  → {dst}  {w}")
+    if args.hops:
+        reach = idx.k_hop(code, args.hops)
+        by_hop = np.bincount(list(reach.values()), minlength=args.hops + 1)[1:]
+        print(f"  reachable ≤{args.hops} leg(s): {len(reach)} ({', '.join(f'{h + 1}: {c}' for h, c in enumerate(by_hop))})")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Collector OpenSky /states/all kontinu (asyncio) di sekitar OMDB.
+
+- Poll terjadwal (interval tetap, tanpa drift); fetch HTTP jalan di thread via asyncio.to_thread
+- Array `states` dinormalisasi jadi record kolumnar bertipe (STATE_FIELDS) + kolom `ts` snapshot
+- Sink time-partitioned: <out>/date=YYYY-MM-DD/hour=HH/
+    * parquet → part-*.parquet per flush; compaction gabung part jam yang sudah lewat → data.parquet
+    * ndjson  → append ke part-<pid>.ndjson; compaction gabung → data.ndjson
+- TrackBuffer: ring buffer posisi terakhir per icao24 (deque maxlen) + evict pesawat yang
+  tidak terlihat > ttl → memory tetap terbatas walau jalan berhari-hari
+- Offline: --replay DIR menjalankan HTTP server lokal yang memutar ulang snapshot JSON
+  (format sama dengan output opensky_sample.py) → collector bisa dites tanpa internet
+
+Contoh:
+  python scripts/opensky_collector.py --interval 10 --polls 0
+  python scripts/opensky_collector.py --replay data/opensky --interval 0.2 --polls 50 --format ndjson
+"""
+from __future__ import annotations
+import argparse, asyncio, base64, json, os, sys, threading, time, urllib.request
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT = ROOT / "data" / "opensky" / "stream"
+API = "https://opensky-network.org/api/states/all"
+
+# OMDB ± ~2.5° (subset dari bbox UAE di opensky_sample.py)
+BBOX = {"lamin": 22.75, "lamax": 27.75, "lomin": 52.85, "lomax": 57.85}
+
+# urutan field state vector OpenSky → dtype kolom (sensors dibuang)
+STATE_FIELDS = (
+    ("icao24", "U6"), ("callsign", "U8"), ("origin_country", "U64"),
+    ("time_position", "float64"), ("last_contact", "float64"),
+    ("longitude", "float64"), ("latitude", "float64"), ("baro_altitude", "float64"),
+    ("on_ground", "bool"), ("velocity", "float64"), ("true_track", "float64"),
+    ("vertical_rate", "float64"), ("sensors", None), ("geo_altitude", "float64"),
+    ("squawk", "U4"), ("spi", "bool"), ("position_source", "float64"), ("category", "float64"),
+)
+COLUMNS = ("ts",) + tuple(name for name, dt in STATE_FIELDS if dt)
+
+def normalize(payload: dict) -> dict:
+    """Snapshot JSON → {kolom: np.ndarray}; string kosong/None → '' , angka None → NaN."""
+    states = payload.get("states") or []
+    n = len(states)
+    ts = float(payload.get("time") or time.time())
+    cols = {"ts": np.full(n, ts)}
+    width = len(STATE_FIELDS)
+    # pad tiap baris ke lebar penuh (API lama tidak punya `category`), transpose sekali
+    rows = [list(s[:width]) + [None] * (width - len(s)) for s in states]
+    fields = list(zip(*rows)) if rows else [()] * width
+    for (name, dt), vals in zip(STATE_FIELDS, fields):
+        if dt is None:
+            continue
+        if dt.startswith("U"):
+            cols[name] = np.array([(v or "").strip() for v in vals], dtype=dt)
+        elif dt == "bool":
+            cols[name] = np.array([bool(v) for v in vals], dtype=bool)
+        else:
+            cols[name] = np.array([np.nan if v is None else v for v in vals], dtype=dt)
+    return cols
+
+class TrackBuffer:
+    """Ring buffer (ts, lat, lon, baro_alt, velocity) per icao24, jumlah titik & pesawat dibatasi."""
+
+    def __init__(self, maxlen: int = 120, ttl: float = 900.0, max_aircraft: int = 5000):
+        self.maxlen, self.ttl, self.max_aircraft = maxlen, ttl, max_aircraft
+        self.tracks: dict = {}
+        self.last_seen: dict = {}
+
+    def update(self, cols: dict):
+        ok = np.isfinite(cols["latitude"]) & np.isfinite(cols["longitude"])
+        recs = zip(cols["icao24"][ok].tolist(), cols["ts"][ok].tolist(), cols["latitude"][ok].tolist(),
+                   cols["longitude"][ok].tolist(), cols["baro_altitude"][ok].tolist(), cols["velocity"][ok].tolist())
+        now = 0.0
+        for icao, ts, lat, lon, alt, vel in recs:
+            dq = self.tracks.get(icao)
+            if dq is None:
+                dq = self.tracks[icao] = deque(maxlen=self.maxlen)
+            dq.append((ts, lat, lon, alt, vel))
+            self.last_seen[icao] = ts
+            now = max(now, ts)
+        if now:
+            self.evict(now)
+
+    def evict(self, now: float):
+        stale = [k for k, t in self.last_seen.items() if now - t > self.ttl]
+        if len(self.last_seen) - len(stale) > self.max_aircraft:
+            by_age = sorted(self.last_seen, key=self.last_seen.get)
+            stale = by_age[: len(self.last_seen) - self.max_aircraft]
+        for k in stale:
+            self.tracks.pop(k, None)
+            self.last_seen.pop(k, None)
+
+    def track(self, icao24: str) -> list:
+        return list(self.tracks.get(icao24, ()))
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def points(self) -> int:
+        return sum(len(d) for d in self.tracks.values())
+
+def _partition(ts: float) -> str:
+    t = datetime.fromtimestamp(ts, tz=timezone.utc)
+    return f"date={t:%Y-%m-%d}/hour={t:%H}"
+
+class PartitionedSink:
+    """Buffer kolumnar → file per partisi jam; flush tiap `flush_rows` baris."""
+
+    def __init__(self, root: Path = OUT, fmt: str = "parquet", flush_rows: int = 20_000):
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                print("[WARN] pyarrow not installed → fallback ndjson", file=sys.stderr)
+                fmt = "ndjson"
+        self.root, self.fmt, self.flush_rows = Path(root), fmt, flush_rows
+        self.pending: list = []
+        self.n_pending = 0
+        self.rows_written = 0
+        self._seq = 0
+
+    def append(self, cols: dict):
+        if len(cols["ts"]):
+            self.pending.append(cols)
+            self.n_pending += len(cols["ts"])
+        if self.n_pending >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch = {c: np.concatenate([p[c] for p in self.pending]) for c in COLUMNS}
+        self.pending, self.n_pending = [], 0
+        parts = np.array([_partition(t) for t in np.unique(batch["ts"])])
+        part_of = dict(zip(np.unique(batch["ts"]).tolist(), parts.tolist()))
+        keys = np.array([part_of[t] for t in batch["ts"].tolist()])
+        for part in np.unique(keys):
+            m = keys == part
+            d = self.root / part
+            d.mkdir(parents=True, exist_ok=True)
+            chunk = {c: batch[c][m] for c in COLUMNS}
+            if self.fmt == "parquet":
+                self._write_parquet(d, chunk)
+            else:
+                self._write_ndjson(d, chunk)
+            self.rows_written += int(m.sum())
+
+    def _write_parquet(self, d: Path, chunk: dict):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._seq += 1
+        name = f"part-{os.getpid()}-{int(time.time() * 1000)}-{self._seq}.parquet"
+        pq.write_table(pa.table(chunk), d / name)
+
+    def _write_ndjson(self, d: Path, chunk: dict):
+        lists = {c: chunk[c].tolist() for c in COLUMNS}
+        n = len(lists["ts"])
+        with open(d / f"part-{os.getpid()}.ndjson", "a", encoding="utf-8") as f:
+            for i in range(n):
+                rec = {c: (None if isinstance(lists[c][i], float) and lists[c][i] != lists[c][i] else lists[c][i])
+                       for c in COLUMNS}
+                f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+
+    def compact(self, before_ts: float | None = None) -> int:
+        """Gabung part file di partisi jam yang sudah selesai (< jam dari before_ts) jadi satu file."""
+        current = _partition(before_ts if before_ts is not None else time.time())
+        merged = 0
+        for d in sorted(self.root.glob("date=*/hour=*")):
+            if f"{d.parent.name}/{d.name}" >= current:
+                continue
+            if self.fmt == "parquet":
+                parts = sorted(d.glob("part-*.parquet"))
+                if not parts:
+                    continue
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                tables = [pq.read_table(p) for p in parts]
+                target = d / "data.parquet"
+                if target.exists():
+                    tables.insert(0, pq.read_table(target))
+                tmp = d / "data.parquet.tmp"
+                pq.write_table(pa.concat_tables(tables), tmp)
+                tmp.replace(target)
+            else:
+                parts = sorted(d.glob("part-*.ndjson"))
+                if not parts:
+                    continue
+                with open(d / "data.ndjson", "a", encoding="utf-8") as out:
+                    for p in parts:
+                        with open(p, encoding="utf-8") as f:
+                            for line in f:
+                                out.write(line)
+            for p in parts:
+                p.unlink()
+            merged += len(parts)
+        if merged:
+            print(f"[opensky] compacted {merged} part file(s)")
+        return merged
+
+def _fetch(url: str, timeout: float) -> dict:
+    req = urllib.request.Request(url, headers={"Accept": "application/json"})
+    user, pw = os.getenv("OPENSKY_USER"), os.getenv("OPENSKY_PASS")
+    if user and pw:
+        req.add_header("Authorization", "Basic " + base64.b64encode(f"{user}:{pw}".encode()).decode())
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+async def collect(url: str, sink: PartitionedSink, tracks: TrackBuffer, interval: float = 10.0,
+                  polls: int = 0, compact_every: int = 360, timeout: float = 30.0) -> dict:
+    """Loop poll; polls=0 → jalan terus. Return statistik run."""
+    loop = asyncio.get_running_loop()
+    stats = {"polls": 0, "errors": 0, "rows": 0}
+    next_at = loop.time()
+    backoff = interval
+    while not polls or stats["polls"] < polls:
+        stats["polls"] += 1
+        try:
+            payload = await asyncio.to_thread(_fetch, url, timeout)
+            cols = normalize(payload)
+            sink.append(cols)
+            tracks.update(cols)
+            stats["rows"] += len(cols["ts"])
+            backoff = interval
+        except Exception as e:
+            stats["errors"] += 1
+            backoff = min(max(backoff * 2, 1.0), 300.0)
+            print(f"[WARN] poll {stats['polls']} failed: {e}", file=sys.stderr)
+        if compact_every and stats["polls"] % compact_every == 0:
+            sink.flush()
+            sink.compact()
+        next_at += interval if backoff == interval else backoff
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+    sink.flush()
+    return stats
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            body = srv.snapshots[srv.pos % len(srv.snapshots)]
+            srv.pos += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve_replay(snapshot_dir: Path, port: int = 0, shift_time: bool = True):
+    """
+    HTTP server lokal yang memutar snapshot *.json berurutan (loop). shift_time=True menggeser
+    `time` tiap putaran supaya partisi/ts tetap maju. Return (server, url); stop: server.shutdown().
+    """
+    files = sorted(Path(snapshot_dir).glob("*.json"))
+    if not files:
+        raise FileNotFoundError(f"no *.json snapshots in {snapshot_dir}")
+    raw = [json.loads(p.read_text(encoding="utf-8")) for p in files]
+    t0 = min(int(r.get("time") or 0) for r in raw)
+    span = max(int(r.get("time") or 0) for r in raw) - t0 + 10
+
+    class _Snapshots:
+        def __len__(self):
+            return len(raw)
+
+        def __getitem__(self, i):
+            r = raw[i % len(raw)]
+            if shift_time:
+                r = dict(r, time=int(r.get("time") or t0) + span * (srv.pos // len(raw)))
+            return json.dumps(r).encode("utf-8")
+
+    srv = ThreadingHTTPServer(("127.0.0.1", port), _ReplayHandler)
+    srv.snapshots, srv.pos, srv.lock = _Snapshots(), 0, threading.Lock()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    host, p = srv.server_address
+    return srv, f"http://{host}:{p}/api/states/all"
+
+def main():
+    ap = argparse.ArgumentParser(description="Continuous OpenSky state-vector collector near OMDB.")
+    ap.add_argument("--interval", type=float, default=10.0, help="Detik antar poll")
+    ap.add_argument("--polls", type=int, default=0, help="Jumlah poll (0 = terus)")
+    ap.add_argument("--bbox", type=float, nargs=4, metavar=("LAMIN", "LAMAX", "LOMIN", "LOMAX"),
+                    default=[BBOX["lamin"], BBOX["lamax"], BBOX["lomin"], BBOX["lomax"]])
+    ap.add_argument("--format", choices=["parquet", "ndjson"], default="parquet")
+    ap.add_argument("--out", type=Path, default=OUT)
+    ap.add_argument("--flush-rows", type=int, default=20_000)
+    ap.add_argument("--compact-every", type=int, default=360, help="Compaction tiap N poll (0 = off)")
+    ap.add_argument("--track-len", type=int, default=120, help="Titik per icao24 di ring buffer")
+    ap.add_argument("--replay", type=Path, help="Folder snapshot JSON → server replay lokal (offline)")
+    args = ap.parse_args()
+
+    srv = None
+    if args.replay:
+        srv, url = serve_replay(args.replay)
+        print(f"[opensky] replaying {len(srv.snapshots)} snapshot(s) from {args.replay} at {url}")
+    else:
+        lamin, lamax, lomin, lomax = args.bbox
+        url = f"{API}?lamin={lamin}&lamax={lamax}&lomin={lomin}&lomax={lomax}"
+        print(f"[opensky] polling {url} every {args.interval}s")
+
+    sink = PartitionedSink(args.out, args.format, args.flush_rows)
+    tracks = TrackBuffer(args.track_len)
+    try:
+        stats = asyncio.run(collect(url, sink, tracks, args.interval, args.polls, args.compact_every))
+    except KeyboardInterrupt:
+        sink.flush()
+        stats = {"polls": "interrupted"}
+    finally:
+        if srv:
+            srv.shutdown()
+    print(f"[ok] opensky: {stats}, rows written={sink.rows_written}, "
+          f"tracked={len(tracks)} aircraft / {tracks.points()} points → {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
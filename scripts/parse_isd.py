@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Parser NOAA ISD (data/noaa_isd/*.gz) → Parquet kolumnar per stasiun.
+
+- gzip di-decode per chunk (--chunk-mb), dipotong di newline terakhir
+- Mandatory section dibaca lewat offset byte NumPy (tanpa split/str per baris):
+  wind dir/speed, ceiling, visibility, suhu, dew point, SLP + quality flag
+- Additional section: gust (OC1) dan presipitasi (AA1) lewat regex bytes di level chunk
+- Nilai missing (9999/99999/...) atau quality flag suspect/erroneous (2, 3, 6, 7) → NaN
+- Output: data/noaa_isd/parquet/station=<USAF-WBAN>/<year>.parquet
+- Banyak file → process pool (--jobs); file yang tidak berubah di-skip (build_cache.py)
+
+Contoh:
+  python scripts/parse_isd.py --jobs 0
+  python scripts/parse_isd.py data/noaa_isd/411940-99999-2024.gz
+"""
+from __future__ import annotations
+import argparse, gzip, os, re, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from build_cache import BuildCache
+
+ROOT = Path(__file__).resolve().parents[1]
+ISD_DIR = ROOT / "data" / "noaa_isd"
+PARQUET_DIR = ISD_DIR / "parquet"
+MIN_LEN = 105  # panjang mandatory section
+
+# nama → (offset 0-based, width, skala, sentinel missing, offset quality flag | None)
+FIELDS = {
+    "lat":           (28, 6, 1000, 99999, None),
+    "lon":           (34, 7, 1000, 999999, None),
+    "elev_m":        (46, 5, 1, 9999, None),
+    "wind_dir":      (60, 3, 1, 999, 63),
+    "wind_speed_ms": (65, 4, 10, 9999, 69),
+    "ceiling_m":     (70, 5, 1, 99999, 75),
+    "visibility_m":  (78, 6, 1, 999999, 84),
+    "temp_c":        (87, 5, 10, 9999, 92),
+    "dewpoint_c":    (93, 5, 10, 9999, 98),
+    "slp_hpa":       (99, 5, 10, 99999, 104),
+}
+BAD_QC = np.frombuffer(b"2367", dtype=np.uint8)
+
+_OC1 = re.compile(rb"OC1(\d{4})(\d)")
+_AA1 = re.compile(rb"AA1(\d{2})(\d{4})(\d)(\d)")
+
+def _slice(buf: np.ndarray, starts: np.ndarray, off: int, width: int) -> np.ndarray:
+    """Matriks (n_line, width) byte untuk satu field fixed-width."""
+    return buf[starts[:, None] + (off + np.arange(width))[None, :]]
+
+def _int_field(buf, starts, off, width) -> np.ndarray:
+    """Field numerik (opsional bertanda +/-) → int64; karakter non-digit → int64 min (invalid)."""
+    m = _slice(buf, starts, off, width).astype(np.int64)
+    sign = np.where(m[:, 0] == ord("-"), -1, 1)
+    signed = (m[:, 0] == ord("+")) | (m[:, 0] == ord("-"))
+    digits = m - ord("0")
+    digits[:, 0] = np.where(signed, 0, digits[:, 0])
+    ok = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    val = digits @ (10 ** np.arange(width - 1, -1, -1, dtype=np.int64))
+    return np.where(ok, sign * val, np.iinfo(np.int64).min)
+
+def _line_of(pos, starts):
+    return np.searchsorted(starts, pos, side="right") - 1
+
+def parse_chunk(data: bytes) -> dict:
+    buf = np.frombuffer(data, dtype=np.uint8)
+    nl = np.flatnonzero(buf == 10)
+    starts = np.r_[0, nl[:-1] + 1] if len(nl) else np.zeros(0, dtype=np.int64)
+    ends = nl
+    keep = (ends - starts) >= MIN_LEN
+    all_starts = starts
+    starts = starts[keep]
+    n = len(starts)
+    cols = {}
+
+    station = _slice(buf, starts, 4, 11)
+    cols["station"] = station.view(f"S11").ravel()
+    ymd = _int_field(buf, starts, 15, 8)
+    hm = _int_field(buf, starts, 23, 4)
+    cols["ts"] = pd.to_datetime(ymd * 10000 + hm, format="%Y%m%d%H%M", errors="coerce").to_numpy()
+    cols["report_type"] = _slice(buf, starts, 41, 5).view("S5").ravel()
+
+    for name, (off, width, scale, missing, qoff) in FIELDS.items():
+        raw = _int_field(buf, starts, off, width)
+        bad = (np.abs(raw) == missing) | (raw == np.iinfo(np.int64).min)
+        if qoff is not None:
+            bad |= np.isin(buf[starts + qoff], BAD_QC)
+        cols[name] = np.where(bad, np.nan, raw / scale)
+
+    # additional section → nilai per baris (NaN kalau tidak ada)
+    line_idx = np.full(len(all_starts), -1, dtype=np.int64)
+    line_idx[keep] = np.arange(n)
+    gust = np.full(n, np.nan)
+    precip = np.full(n, np.nan)
+    precip_h = np.full(n, np.nan)
+    hits = [(m.start(), int(m.group(1)), m.group(2)) for m in _OC1.finditer(data)]
+    if hits:
+        pos, val, q = np.array([h[0] for h in hits]), np.array([h[1] for h in hits]), [h[2] for h in hits]
+        li = line_idx[_line_of(pos, all_starts)]
+        ok = (li >= 0) & (val != 9999) & ~np.isin(np.frombuffer(b"".join(q), np.uint8), BAD_QC)
+        gust[li[ok][::-1]] = val[ok][::-1] / 10.0      # first match per baris menang
+    hits = [(m.start(), int(m.group(1)), int(m.group(2)), m.group(4)) for m in _AA1.finditer(data)]
+    if hits:
+        pos = np.array([h[0] for h in hits])
+        hrs, depth = np.array([h[1] for h in hits]), np.array([h[2] for h in hits])
+        q = np.frombuffer(b"".join(h[3] for h in hits), np.uint8)
+        li = line_idx[_line_of(pos, all_starts)]
+        ok = (li >= 0) & (hrs != 99) & (depth != 9999) & ~np.isin(q, BAD_QC)
+        precip[li[ok][::-1]] = depth[ok][::-1] / 10.0
+        precip_h[li[ok][::-1]] = hrs[ok][::-1]
+    cols["gust_ms"], cols["precip_mm"], cols["precip_hours"] = gust, precip, precip_h
+    return cols
+
+def parse_file(path: Path, chunk_mb: int = 16) -> pd.DataFrame:
+    parts, tail = [], b""
+    with gzip.open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_mb << 20)
+            if not block:
+                break
+            block = tail + block
+            cut = block.rfind(b"\n") + 1
+            tail = block[cut:]
+            if cut:
+                parts.append(parse_chunk(block[:cut]))
+    if tail.strip():
+        parts.append(parse_chunk(tail + b"\n"))
+    if not parts:
+        return pd.DataFrame()
+    df = pd.DataFrame({c: np.concatenate([p[c] for p in parts]) for c in parts[0]})
+    for c in ("station", "report_type"):
+        df[c] = df[c].str.decode("ascii").str.strip()
+    df["station"] = df["station"].str[:6] + "-" + df["station"].str[6:]
+    return df.dropna(subset=["ts"]).sort_values("ts", kind="stable").reset_index(drop=True)
+
+def out_path(src: Path, out_dir: Path = PARQUET_DIR) -> Path:
+    # nama file ISD: USAF-WBAN-YEAR.gz
+    usaf, wban, year = src.name[:-3].split("-")
+    return out_dir / f"station={usaf}-{wban}" / f"{year}.parquet"
+
+def convert(args) -> tuple:
+    src, dst, chunk_mb = args
+    t0 = time.perf_counter()
+    df = parse_file(Path(src), chunk_mb)
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_suffix(".parquet.tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(dst)
+    return str(src), len(df), time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser(description="Parse NOAA ISD station-year files into station-partitioned Parquet.")
+    ap.add_argument("files", nargs="*", type=Path, help="Default: semua data/noaa_isd/*-*-*.gz")
+    ap.add_argument("--out", type=Path, default=PARQUET_DIR)
+    ap.add_argument("--jobs", type=int, default=int(os.getenv("ISD_JOBS", "0")), help="0 = semua CPU")
+    ap.add_argument("--chunk-mb", type=int, default=16)
+    args = ap.parse_args()
+
+    files = args.files or sorted(p for p in ISD_DIR.glob("*.gz") if re.fullmatch(r"\d+-\d+-\d{4}\.gz", p.name))
+    if not files:
+        print(f"[skip] no ISD .gz files in {ISD_DIR}")
+        return 0
+
+    cache = BuildCache(__file__)
+    todo = []
+    for f in files:
+        dst = out_path(f, args.out)
+        if cache.fresh(f"isd:{f.name}", [f], [dst]):
+            continue
+        todo.append((str(f), str(dst), args.chunk_mb))
+    print(f"[isd] {len(files)} file(s), {len(files) - len(todo)} up to date, {len(todo)} to parse")
+    if not todo:
+        return 0
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    jobs = min(jobs, len(todo))
+    failed = 0
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        futs = [ex.submit(convert, t) for t in todo]
+        for (src, dst, _), fut in zip(todo, futs):
+            key = f"isd:{Path(src).name}"
+            try:
+                _, n, secs = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"[WARN] {Path(src).name}: {e}", file=sys.stderr)
+                cache.forget(key)
+                continue
+            print(f"[ok] {Path(src).name}: {n} obs in {secs:.2f}s → {dst}")
+            cache.record(key, [Path(src)])
+    cache.save()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Shared loader untuk publish/*.csv.
+
+- Dtype diambil dari kontrak governance/datasets.yml (date → datetime64, int, float);
+  dataset tanpa kontrak pakai inferensi pandas biasa.
+- Typed Parquet mirror ditulis di sebelah CSV (publish/<name>.parquet) dengan md5 CSV
+  di metadata; build berikutnya baca Parquet selama CSV tidak berubah.
+- Memo in-process: tiap file di-parse sekali per proses, caller dapat copy.
+
+Contoh:
+    from publish_loader import read_publish
+    ts = read_publish("euro_atfm_timeseries")            # publish/ default
+    deg = read_publish("airport_degree", PUBLISH_DIR)
+"""
+from __future__ import annotations
+import os, sys
+from pathlib import Path
+import pandas as pd
+
+from build_cache import md5sum
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLISH = ROOT / "publish"
+GOV = ROOT / "governance" / "datasets.yml"
+
+_FRAMES: dict = {}
+_SCHEMAS: dict | None = None
+_MD5_KEY = b"publish_loader.csv_md5"
+
+def governed_schema(name: str) -> dict:
+    """Logical schema {col: type} untuk dataset `name` (by id atau nama file), {} kalau tidak ada."""
+    global _SCHEMAS
+    if _SCHEMAS is None:
+        _SCHEMAS = {}
+        try:
+            import yaml
+            gov = yaml.safe_load(GOV.read_text(encoding="utf-8")) or {}
+            for did, cfg in (gov.get("datasets") or {}).items():
+                schema = cfg.get("schema") or {}
+                _SCHEMAS[did] = schema
+                if cfg.get("path"):
+                    _SCHEMAS.setdefault(Path(cfg["path"]).stem, schema)
+        except Exception as e:
+            print(f"[WARN] governance schema unavailable: {e}", file=sys.stderr)
+    return _SCHEMAS.get(name, {})
+
+def _apply_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    for col, logical in schema.items():
+        if col not in df.columns:
+            continue
+        t = str(logical).lower()
+        if t in ("int", "integer"):
+            s = pd.to_numeric(df[col], errors="coerce")
+            df[col] = s.astype("int64") if s.notna().all() else s.astype("Int64")
+        elif t in ("float", "double", "number"):
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        elif t in ("date", "datetime", "timestamp"):
+            df[col] = pd.to_datetime(df[col], errors="coerce", utc=True).dt.tz_localize(None)
+    return df
+
+def _read_parquet_mirror(pq_path: Path, csv_md5: str):
+    try:
+        import pyarrow.parquet as pq
+        meta = pq.read_schema(pq_path).metadata or {}
+        if meta.get(_MD5_KEY, b"").decode() != csv_md5:
+            return None
+        return pq.read_table(pq_path).to_pandas()
+    except Exception:
+        return None
+
+def _write_parquet_mirror(df: pd.DataFrame, pq_path: Path, csv_md5: str):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return
+    # tmp per proses: stage build_site paralel bisa me-mirror CSV yang sama bersamaan
+    tmp = pq_path.with_suffix(f".{os.getpid()}.parquet.tmp")
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        meta = dict(table.schema.metadata or {})
+        meta[_MD5_KEY] = csv_md5.encode()
+        pq.write_table(table.replace_schema_metadata(meta), tmp)
+        tmp.replace(pq_path)
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        print(f"[WARN] parquet mirror {pq_path.name} not written: {e}", file=sys.stderr)
+
+def read_publish(name: str | Path, publish_dir: Path | None = None, mirror: bool = True) -> pd.DataFrame:
+    """
+    Baca dataset publish sebagai DataFrame bertipe.
+    `name` = stem ("route_counts") atau path CSV. Return copy (aman dimodifikasi caller).
+    """
+    if isinstance(name, Path) or str(name).endswith(".csv"):
+        csv_path = Path(name)
+    else:
+        csv_path = Path(publish_dir or PUBLISH) / f"{name}.csv"
+    st = csv_path.stat()
+    key = (str(csv_path.resolve()), st.st_size, st.st_mtime_ns)
+    df = _FRAMES.get(key)
+    if df is None:
+        csv_md5 = md5sum(csv_path)
+        pq_path = csv_path.with_suffix(".parquet")
+        df = _read_parquet_mirror(pq_path, csv_md5) if (mirror and pq_path.exists()) else None
+        if df is None:
+            df = _apply_schema(pd.read_csv(csv_path), governed_schema(csv_path.stem))
+            if mirror:
+                _write_parquet_mirror(df, pq_path, csv_md5)
+        _FRAMES[key] = df
+    return df.copy()
+
+def clear_cache():
+    _FRAMES.clear()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Sinkronisasi publish/*.csv → DuckDB warehouse persisten (warehouse_local/otp.duckdb).
+
+- Tipe kolom & primary key dari governance/datasets.yml (dataset lain: read_csv_auto, tanpa PK)
+- Incremental:
+    * md5 CSV sama dengan sync terakhir      → skip
+    * dataset punya date_column               → hanya partisi bulan yang berubah di-replace
+    * dataset punya primary_key               → INSERT OR REPLACE + hapus key yang hilang
+    * selain itu                              → replace penuh (dalam satu transaksi)
+- State sync disimpan di tabel _sync_state & _sync_partitions di warehouse yang sama
+
+Contoh:
+  python scripts/sync_warehouse.py
+  python scripts/make_data_dictionary.py --duckdb warehouse_local/otp.duckdb --tables route_counts,airport_degree
+"""
+from __future__ import annotations
+import argparse, sys
+from pathlib import Path
+from datetime import datetime, timezone
+import duckdb
+import yaml
+
+from build_cache import md5sum
+
+ROOT = Path(__file__).resolve().parents[1]
+GOV = ROOT / "governance" / "datasets.yml"
+PUBLISH = ROOT / "publish"
+WAREHOUSE = ROOT / "warehouse_local" / "otp.duckdb"
+
+DUCK_TYPES = {
+    "int": "BIGINT", "integer": "BIGINT",
+    "float": "DOUBLE", "double": "DOUBLE", "number": "DOUBLE",
+    "date": "DATE", "datetime": "TIMESTAMP", "timestamp": "TIMESTAMP",
+    "string": "VARCHAR",
+}
+
+def qident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _lit(s) -> str:
+    return "'" + str(s).replace("'", "''") + "'"
+
+def load_contracts() -> dict:
+    """dataset stem → contract (dataset tanpa kontrak tetap di-sync dengan tipe auto)."""
+    if not GOV.exists():
+        return {}
+    gov = yaml.safe_load(GOV.read_text(encoding="utf-8")) or {}
+    out = {}
+    for did, cfg in (gov.get("datasets") or {}).items():
+        out[Path(cfg.get("path", did)).stem] = {"id": did, **cfg}
+    return out
+
+def ensure_state(con):
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS _sync_state (
+            dataset VARCHAR PRIMARY KEY, md5 VARCHAR, row_count BIGINT,
+            mode VARCHAR, synced_at TIMESTAMP
+        )""")
+    # sig dulu UBIGINT (bit_xor) → tabel lama dibuang; partisi di-replace sekali pada sync berikut
+    old = con.execute(
+        "SELECT data_type FROM information_schema.columns WHERE table_name = '_sync_partitions' AND column_name = 'sig'"
+    ).fetchone()
+    if old and old[0] != "HUGEINT":
+        con.execute("DROP TABLE _sync_partitions")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS _sync_partitions (
+            dataset VARCHAR, part DATE, n BIGINT, sig HUGEINT,
+            PRIMARY KEY (dataset, part)
+        )""")
+
+def stage_csv(con, csv_path: Path, schema: dict, pk: list) -> list:
+    """Load CSV ke temp table _stg dengan tipe dari kontrak; return daftar kolom."""
+    con.execute(f"CREATE OR REPLACE TEMP TABLE _raw AS SELECT * FROM read_csv_auto({_lit(csv_path)}, header=true, all_varchar=true)")
+    cols = [r[0] for r in con.execute("DESCRIBE _raw").fetchall()]
+    if schema:
+        sel = []
+        for c in cols:
+            logical = str(schema.get(c, "string")).lower()
+            sel.append(f"TRY_CAST({qident(c)} AS {DUCK_TYPES.get(logical, 'VARCHAR')}) AS {qident(c)}")
+        con.execute(f"CREATE OR REPLACE TEMP TABLE _stg AS SELECT {', '.join(sel)} FROM _raw")
+    else:
+        con.execute(f"CREATE OR REPLACE TEMP TABLE _stg AS SELECT * FROM read_csv_auto({_lit(csv_path)}, header=true)")
+    con.execute("DROP TABLE _raw")
+
+    if pk:
+        keys = ", ".join(qident(k) for k in pk)
+        not_null = " AND ".join(f"{qident(k)} IS NOT NULL" for k in pk)
+        n0 = con.execute("SELECT COUNT(*) FROM _stg").fetchone()[0]
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE _stg AS
+            SELECT * FROM _stg WHERE {not_null}
+            QUALIFY row_number() OVER (PARTITION BY {keys}) = 1
+        """)
+        dropped = n0 - con.execute("SELECT COUNT(*) FROM _stg").fetchone()[0]
+        if dropped:
+            print(f"[WARN] {csv_path.name}: {dropped} row(s) with null/duplicate key {pk} not loaded", file=sys.stderr)
+    return cols
+
+def ensure_table(con, table: str, pk: list) -> bool:
+    """Buat tabel target dari struktur _stg (+ PK). Recreate kalau kolom/tipe berubah. Return True kalau baru."""
+    stg = con.execute("DESCRIBE _stg").fetchall()
+    exists = con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ? AND table_schema = 'main'", [table]
+    ).fetchone()[0] > 0
+    if exists:
+        cur = con.execute(f"DESCRIBE {qident(table)}").fetchall()
+        if [(r[0], r[1]) for r in cur] == [(r[0], r[1]) for r in stg]:
+            return False
+        print(f"[sync] {table}: schema changed → recreate")
+        con.execute(f"DROP TABLE {qident(table)}")
+        con.execute("DELETE FROM _sync_partitions WHERE dataset = ?", [table])
+    cols = [f"{qident(r[0])} {r[1]}" + (" NOT NULL" if r[0] in pk else "") for r in stg]
+    if pk:
+        cols.append(f"PRIMARY KEY ({', '.join(qident(k) for k in pk)})")
+    con.execute(f"CREATE TABLE {qident(table)} ({', '.join(cols)})")
+    return True
+
+def _row_hash(cols: list) -> str:
+    return f"hash({', '.join(qident(c) for c in cols)})"
+
+def sync_partitions(con, table: str, cols: list, date_col: str) -> str:
+    """Replace hanya partisi bulan yang signature-nya (count + jumlah hash baris) berubah."""
+    # sum, bukan bit_xor: xor membatalkan baris duplikat berpasangan (2 salinan = 0 salinan)
+    part = f"date_trunc('month', {qident(date_col)})::DATE"
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE _stg_parts AS
+        SELECT {part} AS part, COUNT(*) AS n, sum({_row_hash(cols)})::HUGEINT AS sig
+        FROM _stg GROUP BY 1
+    """)
+    changed = con.execute("""
+        SELECT s.part FROM _stg_parts s
+        LEFT JOIN _sync_partitions p ON p.dataset = ? AND p.part IS NOT DISTINCT FROM s.part
+        WHERE p.part IS NULL OR p.n <> s.n OR p.sig <> s.sig
+    """, [table]).fetchall()
+    removed = con.execute("""
+        SELECT p.part FROM _sync_partitions p
+        WHERE p.dataset = ? AND p.part NOT IN (SELECT part FROM _stg_parts WHERE part IS NOT NULL)
+    """, [table]).fetchall()
+    touched = [r[0] for r in changed] + [r[0] for r in removed]
+    if touched:
+        con.execute("CREATE OR REPLACE TEMP TABLE _touched AS SELECT UNNEST(?::DATE[]) AS part", [touched])
+        null_part = any(p is None for p in touched)
+        cond = f"{part} IN (SELECT part FROM _touched)" + (f" OR {qident(date_col)} IS NULL" if null_part else "")
+        con.execute(f"DELETE FROM {qident(table)} WHERE {cond}")
+        con.execute(f"INSERT INTO {qident(table)} SELECT * FROM _stg WHERE {cond}")
+    con.execute("DELETE FROM _sync_partitions WHERE dataset = ?", [table])
+    con.execute("INSERT INTO _sync_partitions SELECT ?, part, n, sig FROM _stg_parts", [table])
+    return f"partitions: {len(changed)} changed, {len(removed)} removed"
+
+def sync_upsert(con, table: str, pk: list) -> str:
+    keys = ", ".join(qident(k) for k in pk)
+    n_gone = con.execute(f"""
+        SELECT COUNT(*) FROM {qident(table)} WHERE ({keys}) NOT IN (SELECT ({keys}) FROM _stg)
+    """).fetchone()[0]
+    if n_gone:
+        con.execute(f"DELETE FROM {qident(table)} WHERE ({keys}) NOT IN (SELECT ({keys}) FROM _stg)")
+    con.execute(f"INSERT OR REPLACE INTO {qident(table)} SELECT * FROM _stg")
+    return f"upsert on {pk}, {n_gone} key(s) removed"
+
+def sync_replace(con, table: str) -> str:
+    con.execute(f"DELETE FROM {qident(table)}")
+    con.execute(f"INSERT INTO {qident(table)} SELECT * FROM _stg")
+    return "full replace"
+
+def sync_dataset(con, csv_path: Path, contract: dict, force: bool = False) -> dict:
+    table = csv_path.stem
+    md5 = md5sum(csv_path)
+    prev = con.execute("SELECT md5 FROM _sync_state WHERE dataset = ?", [table]).fetchone()
+    if prev and prev[0] == md5 and not force:
+        print(f"[sync] {table}: unchanged (md5={md5[:8]})")
+        return {"dataset": table, "mode": "unchanged"}
+
+    schema = contract.get("schema") or {}
+    pk = list(contract.get("primary_key") or [])
+    date_col = contract.get("date_column")
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        cols = stage_csv(con, csv_path, schema, pk)
+        created = ensure_table(con, table, pk)
+        if date_col and date_col in cols:
+            mode = sync_partitions(con, table, cols, date_col)
+        elif pk and not created:
+            mode = sync_upsert(con, table, pk)
+        else:
+            mode = sync_replace(con, table)
+        n = con.execute(f"SELECT COUNT(*) FROM {qident(table)}").fetchone()[0]
+        con.execute("INSERT OR REPLACE INTO _sync_state VALUES (?, ?, ?, ?, ?)",
+                    [table, md5, n, mode, datetime.now(timezone.utc).replace(tzinfo=None)])
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    print(f"[sync] {table}: {n} rows ({mode})")
+    return {"dataset": table, "mode": mode, "rows": n}
+
+def main():
+    ap = argparse.ArgumentParser(description="Sync publish CSVs into a persistent DuckDB warehouse.")
+    ap.add_argument("--duckdb", type=Path, default=WAREHOUSE)
+    ap.add_argument("--csv-dir", type=Path, default=PUBLISH)
+    ap.add_argument("--tables", type=str, default="", help="Comma-separated subset (default: semua CSV)")
+    ap.add_argument("--force", action="store_true", help="Sync ulang walau md5 tidak berubah")
+    args = ap.parse_args()
+
+    contracts = load_contracts()
+    wanted = {t.strip() for t in args.tables.split(",") if t.strip()}
+    files = [p for p in sorted(args.csv_dir.glob("*.csv")) if not wanted or p.stem in wanted]
+    if not files:
+        print(f"No CSV files in {args.csv_dir}; nothing to sync.")
+        return 0
+
+    args.duckdb.parent.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(str(args.duckdb))
+    try:
+        ensure_state(con)
+        for p in files:
+            sync_dataset(con, p, contracts.get(p.stem, {}), force=args.force)
+        con.execute("CHECKPOINT")
+    finally:
+        con.close()
+    print(f"[OK] warehouse: {args.duckdb}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())